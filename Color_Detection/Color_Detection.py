@@ -1,43 +1,98 @@
+import json
+import os
+import threading
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
-import pandas as pd
-from sklearn.cluster import KMeans
-from scipy.spatial import distance
-import matplotlib.pyplot as plt
-import json
-from IPython.display import Image, display
+
+from Color_Detection.palette import load_palette
+
+# The heavy dependencies (ultralytics, scikit-learn) are imported inside the
+# methods that need them so that importing this module stays cheap.
+# The command line entry point lives in Color_Detection/color_cli.py.
+
+DEFAULT_COLORS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "colors.csv")
+COLORS_CSV_ENV = "COLOR_DETECTION_COLORS_CSV"
+
+_color_tables = {}
+_color_tables_lock = threading.Lock()
+
+
+def resolve_colors_path(colors_path=None):
+    """
+    Resolve the location of the color table.
+    :param colors_path: Explicit path. Falls back to the COLOR_DETECTION_COLORS_CSV
+                        environment variable and then to the colors.csv next to this file.
+    :return: Absolute path of the color table.
+    """
+    path = colors_path or os.environ.get(COLORS_CSV_ENV) or DEFAULT_COLORS_CSV
+    return os.path.abspath(path)
+
+
+def load_color_table(colors_path=None):
+    """
+    Load the color table once per process. The CSV is compiled to a memory-mapped binary
+    palette (see palette.py) that is rebuilt automatically whenever the CSV changes.
+    :param colors_path: Path to a colors.csv file (see resolve_colors_path).
+    :return: Palette with names, rgb (uint8) and lab (float32) tables.
+    """
+    path = resolve_colors_path(colors_path)
+    with _color_tables_lock:
+        table = _color_tables.get(path)
+        if table is None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"The color table '{path}' does not exist.")
+            table = load_palette(path)
+            _color_tables[path] = table
+    return table
+
 
 class colordetector:
-    
-    def __init__(self, model_path):
+
+    def __init__(self, model_path, colors_path=None, color_space="rgb"):
         """
         Initialize the YOLO detector with the model path.
         :param model_path: Path to the YOLO model weights (e.g., 'best.pt').
+        :param colors_path: Optional path to the color table (see resolve_colors_path).
+        :param color_space: "rgb" (Euclidean RGB distance) or "lab" (CIE76 distance in LAB).
         """
+        from ultralytics import YOLO
+
+        if color_space not in ("rgb", "lab"):
+            raise ValueError(f"Invalid color space: {color_space}")
+
         self.model = YOLO(model_path)
-        self.colors_df = pd.read_csv("C:/Users/mahmoy2/OneDrive - Medtronic PLC/Downloads/Graduation-Project-Smart-Glasses/Color_Detection/colors.csv", header=None)
-        colors_df.columns = ['ColorName', 'Unused', 'Hex', 'R', 'G', 'B']
-        colors_df = colors_df.drop(columns=['Unused'])
-    
-    def get_closest_color_name(rgb):
-        rgb = np.array(rgb)
-        colordetector.colors_df['distance'] = colordetector.colors_df.apply(
-            lambda row: distance.euclidean((row['R'], row['G'], row['B']), rgb),
-            axis=1
-        )
-        return colordetector.colors_df.loc[colordetector.colors_df['distance'].idxmin(), 'ColorName']
-
-    
-    def detect_color(image, is_traffic_light=False):
+        self.palette = load_color_table(colors_path)
+        self.color_space = color_space
+        self._palette_rgb = self.palette.rgb.astype(np.int32)
+
+    def get_closest_color_name(self, rgb):
+        """
+        Find the name of the table color closest to the given RGB value.
+        :param rgb: Sequence of three ints (R, G, B).
+        :return: Color name.
+        """
+        if self.color_space == "lab":
+            pixel = np.asarray(rgb, dtype=np.float32).reshape(1, 1, 3) / 255.0
+            diff = self.palette.lab - cv2.cvtColor(pixel, cv2.COLOR_RGB2Lab).reshape(3)
+        else:
+            diff = self._palette_rgb - np.asarray(rgb, dtype=np.int32)
+        return self.palette.name(int(np.argmin(np.einsum("ij,ij->i", diff, diff))))
+
+    def detect_color(self, image, is_traffic_light=False):
+        """
+        Detect the dominant color of an image region.
+        :param image: BGR image (numpy array).
+        :param is_traffic_light: If True, classify the lit lamp as Red, Yellow or Green.
+        :return: Color name or "Unknown".
+        """
         if is_traffic_light:
             h, w = image.shape[:2]
             image = image[h//4:3*h//4, w//4:3*w//4]
 
-        blurred = cv2.GaussianBlur(image, (5, 5), 0)
-        hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+            blurred = cv2.GaussianBlur(image, (5, 5), 0)
+            hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
 
-        if is_traffic_light:
             masks = {
                 "Red": [
                     cv2.inRange(hsv, (0, 150, 100), (10, 255, 255)),
@@ -58,6 +113,11 @@ class colordetector:
             max_color = max(counts, key=counts.get)
             return max_color if counts[max_color] > 50 else "Unknown"
 
+        if image.size == 0:
+            return "Unknown"
+
+        from sklearn.cluster import KMeans
+
         pixels = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).reshape(-1, 3)
         kmeans = KMeans(n_clusters=3, n_init=10)
         kmeans.fit(pixels)
@@ -72,11 +132,15 @@ class colordetector:
         dominant_idx = valid_clusters[np.argmax(cluster_sizes[valid_clusters])]
         dominant_color = kmeans.cluster_centers_[dominant_idx].astype(int)
 
-        return colordetector.get_closest_color_name(dominant_color)
+        return self.get_closest_color_name(dominant_color)
 
-    
-    def recognize_object(image_path):
-        results = colordetector.model(image_path)
+    def recognize_object(self, image):
+        """
+        Run the YOLO model on an image.
+        :param image: Image path or BGR image (numpy array).
+        :return: List of detections with label, bbox (x1, y1, x2, y2) and confidence.
+        """
+        results = self.model(image)
         detected_objects = []
 
         for detection in results[0].boxes:
@@ -91,8 +155,27 @@ class colordetector:
 
         return detected_objects
 
-    
-    def main(image_path):
+    def detect(self, image):
+        """
+        Detect objects in an image and label each one with its color.
+        :param image: BGR image (numpy array).
+        :return: List of detections, each with an added "color" field.
+        """
+        detected_objects = self.recognize_object(image)
+
+        for obj in detected_objects:
+            x1, y1, x2, y2 = obj["bbox"]
+            roi = image[y1:y2, x1:x2]
+            obj["color"] = self.detect_color(roi, is_traffic_light=obj["label"] == "traffic light")
+
+        return detected_objects
+
+    def detect_file(self, image_path):
+        """
+        Run color detection on an image file.
+        :param image_path: Path to the input image.
+        :return: Dict with the image path and the colored detections, or an "error" field.
+        """
         output = {
             "image_path": image_path,
             "detected_objects": []
@@ -101,39 +184,16 @@ class colordetector:
         image = cv2.imread(image_path)
         if image is None:
             output["error"] = "Unable to load image"
-            return json.dumps(output, indent=4)
-
-        detected_objects = colordetector.recognize_object(image_path)
-
-        for obj in detected_objects:
-            x1, y1, x2, y2 = obj["bbox"]
-            roi = image[y1:y2, x1:x2]
+            return output
 
-            if obj["label"] == "traffic light":
-                color = colordetector.detect_color(roi, is_traffic_light=True)
-                plt.imshow(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
-                plt.title(f"Traffic Light: {color}")
-                plt.axis("off")
-                plt.show()
-            else:
-                color = colordetector.detect_color(roi)
+        output["detected_objects"] = self.detect(image)
 
-            obj["color"] = color
-            output["detected_objects"].append(obj)
+        return output
 
-        return json.dumps(output, indent=4)
-
-# Run test
-image_path = "C:/Users/mahmoy2/OneDrive - Medtronic PLC/Downloads/Graduation-Project-Smart-Glasses/Color_Detection/traffic light yellow.jpg"
-result = colordetector.main(image_path)
-
-# Display image
-display(Image(filename=image_path))
-
-# Print result
-print("")
-print(result)
-
-# Save result to file
-with open("results.json", "w") as f:
-    f.write(result)
\ No newline at end of file
+    def main(self, image_path):
+        """
+        Run color detection on an image file.
+        :param image_path: Path to the input image.
+        :return: JSON string with the image path and the colored detections.
+        """
+        return json.dumps(self.detect_file(image_path), indent=4)
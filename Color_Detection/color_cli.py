@@ -0,0 +1,295 @@
+import sys
+import os
+# When run as a script this folder is sys.path[0], and "Color_Detection" would resolve to
+# Color_Detection.py instead of the package, so swap it for the repository root.
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path = [p for p in sys.path if os.path.abspath(p or os.curdir) != _here]
+sys.path.insert(0, os.path.dirname(_here))
+import argparse
+import glob
+import json
+import multiprocessing
+import subprocess
+import time
+
+DEFAULT_MODEL_PATH = "Color_Detection/yolo11n.pt"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+IMPORT_TIME_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_times.jsonl")
+
+# Modules that must not be pulled in just by importing the library
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "matplotlib", "IPython", "ultralytics", "torch"]
+
+_IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_detect(args):
+    """
+    Run color detection on a single image and print the JSON result.
+    """
+    from Color_Detection.Color_Detection import colordetector
+
+    detector = colordetector(args.model, colors_path=args.colors)
+    result = detector.main(args.image)
+    print(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(result)
+
+    if args.show:
+        import cv2
+        import matplotlib.pyplot as plt
+
+        image = cv2.imread(args.image)
+        if image is not None:
+            plt.imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            plt.title(", ".join(f"{obj['label']}: {obj['color']}" for obj in json.loads(result)["detected_objects"]))
+            plt.axis("off")
+            plt.show()
+
+
+def run_compile_palette(args):
+    """
+    Compile the color table CSV into the binary palette used at runtime.
+    """
+    from Color_Detection.Color_Detection import resolve_colors_path
+    from Color_Detection.palette import compile_palette, load_palette
+
+    csv_path = resolve_colors_path(args.colors)
+    palette_path = compile_palette(csv_path, args.output)
+    palette = load_palette(csv_path, palette_path)
+    print(f"Compiled {len(palette)} colors from {csv_path} to {palette_path} ({os.path.getsize(palette_path)} bytes)")
+
+
+def find_images(source, recursive=False):
+    """
+    List the images to process.
+
+    Args:
+        source (str): A directory or a glob pattern (e.g. "data/**/*.jpg").
+        recursive (bool): Also search sub-directories when source is a directory.
+
+    Returns:
+        list: Sorted image paths.
+    """
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+        paths = glob.glob(pattern, recursive=recursive)
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def load_records(output_path):
+    """
+    Read a JSON Lines output file into the last record written for each image. A retried
+    image may appear more than once; its latest record wins. A truncated last line (from an
+    interrupted run) is ignored.
+
+    Returns:
+        dict: Image path -> record, in the order the images first appear.
+    """
+    records = {}
+    if not os.path.exists(output_path):
+        return records
+
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["image_path"]] = record
+    return records
+
+
+def prepare_resume(output_path, images):
+    """
+    Work out what a resumed batch still has to do, and rewrite the output file so it holds
+    one record per image: failed images are retried, so their error records are dropped.
+
+    Returns:
+        tuple: (number of images already done, list of image paths to process)
+    """
+    records = load_records(output_path)
+    completed = {path for path, record in records.items() if "error" not in record}
+    pending = [p for p in images if p not in completed]
+    retried = set(pending)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for path, record in records.items():
+            if path not in retried:
+                f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, output_path)
+    return len(completed), pending
+
+
+# One detector per worker process, created by _init_worker
+_worker_detector = None
+
+
+def _init_worker(model_path, colors_path, threads_per_worker):
+    """
+    Load the model once in each worker process. Limiting the per-process thread pools
+    keeps N workers from oversubscribing the CPU.
+    """
+    global _worker_detector
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads_per_worker)
+
+    import cv2
+    cv2.setNumThreads(threads_per_worker)
+
+    from Color_Detection.Color_Detection import colordetector
+    _worker_detector = colordetector(model_path, colors_path=colors_path)
+
+
+def _detect_worker(image_path):
+    start = time.perf_counter()
+    try:
+        record = _worker_detector.detect_file(image_path)
+    except Exception as e:
+        record = {"image_path": image_path, "detected_objects": [], "error": str(e)}
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def run_batch(args):
+    """
+    Annotate a directory or glob of images on a process pool, streaming one JSON
+    object per image to the output file as soon as it is ready.
+    """
+    images = find_images(args.source, args.recursive)
+    if not args.resume and os.path.exists(args.output):
+        print(f"Error: '{args.output}' already exists. Use --resume to continue it or choose another file.")
+        return 1
+
+    completed, pending = prepare_resume(args.output, images) if args.resume else (0, images)
+    print(f"Found {len(images)} images, {completed} already done, {len(pending)} to process "
+          f"with {args.workers} workers.")
+    if not pending:
+        return 0
+
+    start = time.perf_counter()
+    failures = 0
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.workers, initializer=_init_worker,
+                  initargs=(args.model, args.colors, args.threads_per_worker)) as pool, \
+            open(args.output, "a") as out:
+        for done, record in enumerate(pool.imap_unordered(_detect_worker, pending, chunksize=args.chunksize), 1):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if "error" in record:
+                failures += 1
+                print(f"[{done}/{len(pending)}] {record['image_path']}: {record['error']}")
+            elif done % args.progress_every == 0 or done == len(pending):
+                elapsed = time.perf_counter() - start
+                print(f"[{done}/{len(pending)}] {done / elapsed:.2f} images/s")
+
+    print(f"Wrote {len(pending) - failures} results to {args.output} ({failures} failed).")
+    return 1 if failures else 0
+
+
+def measure_import_time(module="Color_Detection.Color_Detection", runs=5):
+    """
+    Measure how long a fresh interpreter takes to import a module.
+
+    Args:
+        module (str): Dotted module name to import.
+        runs (int): Number of fresh interpreters to start.
+
+    Returns:
+        dict: Median and per-run import times, plus any heavy modules the import loaded.
+    """
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    heavy = set()
+
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-c", probe], cwd=repo_root,
+                                   capture_output=True, text=True, check=True)
+        record = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(record["seconds"])
+        heavy.update(record["heavy"])
+
+    samples.sort()
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "module": module,
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "median_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "samples_ms": [round(s * 1000, 2) for s in samples],
+        "heavy_modules_loaded": sorted(heavy),
+    }
+
+
+def run_import_time(args):
+    """
+    Measure the library import time and append it to the import time log.
+    """
+    record = measure_import_time(args.module, args.runs)
+    print(json.dumps(record, indent=4))
+
+    with open(args.log, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    if record["heavy_modules_loaded"]:
+        print(f"Warning: importing {args.module} loaded {', '.join(record['heavy_modules_loaded'])}")
+        return 1
+    if args.budget_ms is not None and record["median_ms"] > args.budget_ms:
+        print(f"Warning: import took {record['median_ms']} ms, over the {args.budget_ms} ms budget")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Object color detection")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    detect_parser = subparsers.add_parser("detect", help="Detect object colors in a single image")
+    detect_parser.add_argument("image", help="Path to the input image")
+    detect_parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to the YOLO model weights")
+    detect_parser.add_argument("--colors", default=None, help="Path to the color table (default: colors.csv)")
+    detect_parser.add_argument("--output", default=None, help="Also write the JSON result to this file")
+    detect_parser.add_argument("--show", action="store_true", help="Display the image with the detected colors")
+    detect_parser.set_defaults(func=run_detect)
+
+    batch_parser = subparsers.add_parser("batch", help="Annotate many images on a process pool (JSON Lines output)")
+    batch_parser.add_argument("source", help="Image directory or glob pattern")
+    batch_parser.add_argument("--output", required=True, help="JSON Lines file, one object per image")
+    batch_parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to the YOLO model weights")
+    batch_parser.add_argument("--colors", default=None, help="Path to the color table (default: colors.csv)")
+    batch_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    batch_parser.add_argument("--threads-per-worker", type=int, default=1, help="CPU threads each worker may use")
+    batch_parser.add_argument("--chunksize", type=int, default=1, help="Images handed to a worker at a time")
+    batch_parser.add_argument("--recursive", action="store_true", help="Include sub-directories of a source directory")
+    batch_parser.add_argument("--resume", action="store_true", help="Skip images already done in the output file and retry failed ones")
+    batch_parser.add_argument("--progress-every", type=int, default=20, help="Print throughput every N images")
+    batch_parser.set_defaults(func=run_batch)
+
+    palette_parser = subparsers.add_parser("compile-palette", help="Compile colors.csv into the binary palette")
+    palette_parser.add_argument("--colors", default=None, help="Path to the color table (default: colors.csv)")
+    palette_parser.add_argument("--output", default=None, help="Palette path (default: next to the CSV)")
+    palette_parser.set_defaults(func=run_compile_palette)
+
+    import_parser = subparsers.add_parser("import-time", help="Measure and log the library import time")
+    import_parser.add_argument("--module", default="Color_Detection.Color_Detection", help="Module to import")
+    import_parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    import_parser.add_argument("--log", default=IMPORT_TIME_LOG, help="JSON Lines file the measurement is appended to")
+    import_parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the median import time exceeds this")
+    import_parser.set_defaults(func=run_import_time)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
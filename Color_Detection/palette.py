@@ -0,0 +1,179 @@
+import csv
+import hashlib
+import os
+import struct
+
+import cv2
+import numpy as np
+
+# Compiled palette layout. The whole file is a single 1-D uint8 .npy array so it can be
+# opened with np.load(mmap_mode="r") and sliced into typed views without copying.
+#
+#   header      48 bytes  magic, version, count, name count, name blob size, sha256 of the CSV
+#   rgb         count x 3 uint8
+#   lab         count x 3 float32    (L in [0, 100], a/b in [-128, 127])
+#   name_ids    count     uint16     index into the interned name table
+#   offsets     names + 1 uint32     byte offsets of each name in the blob
+#   blob        utf-8 names, stored once each
+
+PALETTE_MAGIC = b"CPAL"
+PALETTE_VERSION = 1
+_HEADER = struct.Struct("<4sIIII")
+_HEADER_SIZE = _HEADER.size + 32
+
+
+def _align(offset, alignment=4):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _sections(count, name_count, blob_size):
+    """Byte ranges of every section for the given sizes."""
+    rgb = (_HEADER_SIZE, _HEADER_SIZE + count * 3)
+    lab_start = _align(rgb[1])
+    lab = (lab_start, lab_start + count * 3 * 4)
+    ids = (lab[1], lab[1] + count * 2)
+    offsets_start = _align(ids[1])
+    offsets = (offsets_start, offsets_start + (name_count + 1) * 4)
+    blob = (offsets[1], offsets[1] + blob_size)
+    return rgb, lab, ids, offsets, blob
+
+
+def palette_path_for(csv_path):
+    """Default location of the compiled palette for a CSV (next to it)."""
+    return os.path.splitext(csv_path)[0] + ".palette.npy"
+
+
+def csv_checksum(csv_path):
+    """SHA-256 of the CSV contents."""
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def read_colors_csv(csv_path):
+    """
+    Parse colors.csv.
+    :param csv_path: Path to a CSV with columns ColorName, Unused, Hex, R, G, B.
+    :return: Tuple (names, rgb) with rgb as an (N, 3) uint8 array.
+    """
+    names, rgb = [], []
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 6:
+                continue
+            names.append(row[0])
+            rgb.append((int(row[3]), int(row[4]), int(row[5])))
+    return names, np.array(rgb, dtype=np.uint8).reshape(-1, 3)
+
+
+def build_palette(csv_path):
+    """
+    Compile a CSV color table into the binary palette layout.
+    :param csv_path: Path to the colors.csv file.
+    :return: 1-D uint8 array holding the compiled palette.
+    """
+    checksum = csv_checksum(csv_path)
+    names, rgb = read_colors_csv(csv_path)
+    count = len(names)
+
+    # Intern the names so repeated names are stored once
+    interned, name_ids = {}, np.empty(count, dtype=np.uint16)
+    for i, name in enumerate(names):
+        name_ids[i] = interned.setdefault(name, len(interned))
+    encoded = [name.encode("utf-8") for name in interned]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    blob = b"".join(encoded)
+
+    lab = cv2.cvtColor(rgb.reshape(1, -1, 3).astype(np.float32) / 255.0, cv2.COLOR_RGB2Lab).reshape(-1, 3)
+
+    sections = _sections(count, len(encoded), len(blob))
+    data = np.zeros(sections[-1][1], dtype=np.uint8)
+    data[:_HEADER.size] = np.frombuffer(
+        _HEADER.pack(PALETTE_MAGIC, PALETTE_VERSION, count, len(encoded), len(blob)), dtype=np.uint8)
+    data[_HEADER.size:_HEADER_SIZE] = np.frombuffer(checksum, dtype=np.uint8)
+    for (start, end), array in zip(sections, (rgb, lab.astype(np.float32), name_ids, offsets)):
+        data[start:end] = np.frombuffer(np.ascontiguousarray(array).tobytes(), dtype=np.uint8)
+    data[sections[-1][0]:sections[-1][1]] = np.frombuffer(blob, dtype=np.uint8)
+    return data
+
+
+def compile_palette(csv_path, palette_path=None):
+    """
+    Compile a CSV color table and write it next to the CSV (or to palette_path).
+    The file is written to a temporary name first so readers never see a partial palette.
+    :return: Path of the compiled palette.
+    """
+    palette_path = palette_path or palette_path_for(csv_path)
+    tmp_path = f"{palette_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, build_palette(csv_path))
+    os.replace(tmp_path, palette_path)
+    return palette_path
+
+
+class Palette:
+    """Read-only view over a compiled palette."""
+
+    def __init__(self, data):
+        """
+        :param data: 1-D uint8 array (usually a read-only memmap) in the compiled layout.
+        """
+        magic, version, count, name_count, blob_size = _HEADER.unpack(bytes(data[:_HEADER.size]))
+        if magic != PALETTE_MAGIC or version != PALETTE_VERSION:
+            raise ValueError("Not a compiled color palette, or an unsupported version.")
+
+        rgb, lab, ids, offsets, blob = _sections(count, name_count, blob_size)
+        if data.shape[0] < blob[1]:
+            raise ValueError("Compiled color palette is truncated.")
+
+        self.data = data
+        self.checksum = bytes(data[_HEADER.size:_HEADER_SIZE])
+        self.rgb = data[rgb[0]:rgb[1]].reshape(count, 3)
+        self.lab = data[lab[0]:lab[1]].view(np.float32).reshape(count, 3)
+        self.name_ids = data[ids[0]:ids[1]].view(np.uint16)
+        self._offsets = data[offsets[0]:offsets[1]].view(np.uint32)
+        self._blob = data[blob[0]:blob[1]]
+        self._names = None
+
+    def __len__(self):
+        return self.rgb.shape[0]
+
+    def name(self, index):
+        """Name of the color at the given row."""
+        name_id = int(self.name_ids[index])
+        start, end = int(self._offsets[name_id]), int(self._offsets[name_id + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    @property
+    def names(self):
+        """All color names, decoded on first use."""
+        if self._names is None:
+            self._names = [self.name(i) for i in range(len(self))]
+        return self._names
+
+
+def load_palette(csv_path, palette_path=None):
+    """
+    Load the compiled palette for a CSV, (re)building it first if it is missing,
+    unreadable or was compiled from a different version of the CSV.
+    If the palette cannot be written (e.g. read-only install) it is compiled in memory.
+    :param csv_path: Path to the colors.csv file.
+    :param palette_path: Location of the compiled palette (default: next to the CSV).
+    :return: Palette.
+    """
+    palette_path = palette_path or palette_path_for(csv_path)
+    checksum = csv_checksum(csv_path)
+
+    if os.path.exists(palette_path):
+        try:
+            palette = Palette(np.load(palette_path, mmap_mode="r"))
+            if palette.checksum == checksum:
+                return palette
+        except (ValueError, OSError):
+            pass
+
+    try:
+        compile_palette(csv_path, palette_path)
+    except OSError:
+        return Palette(build_palette(csv_path))
+    return Palette(np.load(palette_path, mmap_mode="r"))
@@ -1,11 +1,24 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from typing import Callable
 import keyboard
 import time
 import threading
 import logging
-import pyttsx3
 import winsound
 import queue
+import asyncio
+import concurrent.futures
+import collections
+from Input_Manager.speech_backend import PersistentTTS, can_play_wav, play_wav
+from Input_Manager.gesture_scheduler import GestureScheduler
+from Input_Manager.action_dispatcher import ActionDispatcher
+from Input_Manager.phrase_cache import PhraseCache
+from Input_Manager.speech_queue import HAZARD, NO_EXPIRY, RESULT, STATUS, SpeechQueue, cancel_speech
+from Input_Manager.speech_pace import PaceController, terse
+from Utils.latency_stats import LatencyStats
 
 # Set up logging
 logging.basicConfig(
@@ -37,55 +50,229 @@ class HapticFeedback:
         winsound.Beep(800, 100)
 
 class SpeechEngine:
-    _stop_sentinel = object()
-    def __init__(self, rate: int = 150):
+    def __init__(self, rate: int = 150, max_rate: int = 230, target_lag: float = 4.0, startup_timeout: float = 10.0,
+                 phrase_cache: bool = True, phrases=(), promote_after: int = 2, max_phrase_words: int = 6):
+        """
+        Args:
+            rate (int): Normal speech rate in words per minute.
+            max_rate (int): Fastest rate used to catch up with a backlog (see PaceController).
+            target_lag (float): Seconds within which queued speech should be heard.
+            startup_timeout (float): Seconds to wait for the engine health check.
+            phrase_cache (bool): Play frequent phrases from pre-rendered audio (see PhraseCache).
+                                 Needs winsound for playback.
+            phrases (iterable): Phrases to render into the cache in the background right away.
+            promote_after (int): Other short phrases are cached once they have been spoken this often.
+            max_phrase_words (int): Longer texts (OCR results) are never cached.
+        """
         self.rate = rate
-        self._speech_queue = queue.Queue()
+        self.tts = PersistentTTS(rate)
+        self.pace = PaceController(rate, max_rate, target_lag)
+        self.health = None
+        self.cache = PhraseCache() if phrase_cache and can_play_wav() else None
+        self.promote_after = promote_after
+        self.max_phrase_words = max_phrase_words
+        self._uses = collections.Counter()
+        self.cached_first_audio = LatencyStats()  # Time to first audio of phrases played from the cache
+        self._to_render = collections.deque()  # Phrases waiting to be rendered while the speech thread is idle
+        self._speech_queue = SpeechQueue()
         self._speech_thread = None
-        self._initialize_thread()
+        self._initialize_thread(startup_timeout)
+        self.precache(phrases)
 
-    def _initialize_thread(self):
-        engine = pyttsx3.init()
-        engine.setProperty('rate', self.rate)
-        engine.stop()
-        self._speech_thread = threading.Thread(target=self._speech_loop, daemon=True)
+    def _initialize_thread(self, startup_timeout):
+        # The engine is created and health checked on the speech thread, which keeps it for its lifetime
+        ready = threading.Event()
+        self._speech_thread = threading.Thread(target=self._speech_loop, args=(ready,), daemon=True)
         self._speech_thread.start()
+        if not ready.wait(startup_timeout):
+            raise RuntimeError("Speech engine did not start in time")
+        if not self.health['ok']:
+            raise RuntimeError(f"Speech engine health check failed: {self.health['error']}")
+        logger.info(f"Speech engine ready in {self.health['init_ms']} ms "
+                    f"({self.health['driver']}, {self.health['voices']} voices)")
 
-    def _speech_loop(self):
+    def _speech_loop(self, ready):
+        self.health = self.tts.health_check()
+        ready.set()
+        if not self.health['ok']:
+            return
         while True:
-            item = self._speech_queue.get()
-            if item is self._stop_sentinel:
-                self._speech_queue.task_done()
+            try:
+                # Render waiting phrases whenever nothing has been queued for a moment
+                item = self._speech_queue.get(timeout=0.2 if self._to_render else None)
+            except queue.Empty:
+                if self._to_render:
+                    self._render_next()
+                continue
+            if item is None:  # Closed by stop()
                 break
-            if isinstance(item, str):
-                try:
-                    engine = pyttsx3.init()
-                    engine.setProperty('rate', self.rate)
-                    engine.say(item)
-                    engine.runAndWait()
-                    engine.stop()
-                except Exception as e:
-                    logger.error(f"Speech error: {e}")
-            self._speech_queue.task_done()
-
-    def speak(self, text: str):
-        if text.strip():
-            self._speech_queue.put(text)
+            # Speed up, and shorten announcements, while the backlog would be heard too late
+            words, oldest_wait = self._speech_queue.backlog()
+            rate, use_terse = self.pace.update(words + len(item.text.split()),
+                                               max(oldest_wait, time.perf_counter() - item.queued_at))
+            self.tts.set_rate(rate)
+            try:
+                spoken = self._say(terse(item.text) if use_terse else item.text, item.queued_at)
+                self._speech_queue.done(spoken)
+            except Exception as e:
+                logger.error(f"Speech error: {e}")
+                self._speech_queue.done(False, e)
+            if not self._speech_queue.depth():
+                self.pace.idle()
+        self.tts.close()
+
+    def _say(self, text, queued_at) -> bool:
+        """Say a text from the cache or the engine; returns False if it was cut off."""
+        interrupt = self._speech_queue.interrupt
+        if self.cache is None:
+            return self.tts.speak(text, queued_at, interrupt)
+        path = self.cache.get(text, self.tts.rate)
+        if path is not None:
+            started = play_wav(path, interrupt)
+            self.cache.played(started is not None)
+            if started is not None:
+                self.cached_first_audio.add(started - queued_at)
+                return not interrupt.is_set()
+        spoken = self.tts.speak(text, queued_at, interrupt)
+        # Short phrases that keep coming back are rendered for next time
+        if len(text.split()) <= self.max_phrase_words:
+            if len(self._uses) > 1000:
+                self._uses.clear()
+            self._uses[text] += 1
+            if self._uses[text] == self.promote_after:
+                self._to_render.append(text)
+        return spoken
+
+    def _render_next(self):
+        text = self._to_render.popleft()
+        self.tts.set_rate(self.rate)  # Phrases are cached at the normal rate
+        key = self.cache.key(text, self.tts.rate)
+        if key in self.cache:
+            return
+        if not (self.tts.render(text, self.cache.path(key)) and self.cache.add(key)):
+            logger.warning(f"Could not render phrase: '{text}'")
+
+    def precache(self, phrases):
+        """Render phrases into the phrase cache in the background, while nothing else is being said."""
+        if self.cache is not None:
+            self._to_render.extend(phrase for phrase in phrases if phrase.strip())
+            self._speech_queue.wake()  # Lets the speech thread start rendering if it is idle
+
+    def speak(self, text: str, priority: int = RESULT, flush: bool = False,
+              max_age: float | None = None) -> concurrent.futures.Future:
+        """
+        Queue text to be said (see SpeechQueue).
+
+        Args:
+            text (str): Text to say.
+            priority (int): HAZARD, RESULT or STATUS. Hazard warnings interrupt other speech.
+            flush (bool): The text starts a new action: drop what earlier actions still have
+                          queued or playing, except hazard warnings.
+            max_age (float | None): Seconds after which the text is no longer worth saying; None
+                                    uses the default of its priority, NO_EXPIRY keeps it until
+                                    the next action flushes it (e.g. the lines of a page).
+
+        Returns:
+            Future: Resolves to True once the text has been said to the end, or False if it
+                    was cut off; cancelled if it was dropped unsaid. future.cancel() drops a
+                    queued text; cancel(future) also cuts it off while it is being said.
+        """
+        if not text.strip():
+            future = concurrent.futures.Future()
+            future.set_result(True)
+            return future
+        return self._speech_queue.put(text, priority, flush, max_age)
+
+    def say_and_wait(self, text: str, priority: int = RESULT, flush: bool = False, timeout: float | None = None) -> bool:
+        """
+        Say a text and block until it has been said, e.g. to pulse or take a picture right
+        after an announcement. Safe to call from any thread except the speech thread.
+
+        Returns:
+            bool: True if it was said to the end; False if it was cut off, dropped, or not
+                  finished within `timeout` seconds (it is then dropped or cut off).
+        """
+        future = self.speak(text, priority, flush)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            cancel_speech(future)
+            return False
+        except concurrent.futures.CancelledError:
+            return False
+
+    async def speak_async(self, text: str, priority: int = RESULT, flush: bool = False) -> bool:
+        """
+        speak() for asyncio code: resolves once the text has been said. Cancelling the
+        awaiting task (e.g. through asyncio.wait_for) drops the text, or cuts it off if it
+        is being said.
+        """
+        future = self.speak(text, priority, flush)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel_speech(future)
+            raise
+
+    def cancel(self, future) -> bool:
+        """
+        Stop one speak() call: drop the text if it is still queued, or cut it off if it is
+        being said.
+
+        Returns:
+            bool: False if it had already been said (or dropped).
+        """
+        return cancel_speech(future)
+
+    def is_speaking(self) -> bool:
+        """True while something is being said or waiting to be said."""
+        return self._speech_queue.is_busy()
+
+    def wait_until_done(self, timeout: float | None = None) -> bool:
+        """
+        Block until everything queued has been said.
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        return self._speech_queue.wait_idle(timeout)
+
+    def flush(self):
+        """Drop all queued speech except hazard warnings, and cut off what is being said."""
+        self._speech_queue.flush()
+
+    def metrics(self) -> dict:
+        """Speech engine counters and time-to-first-audio percentiles (see PersistentTTS.metrics), speech queue depth
+        and wait times (see SpeechQueue.metrics), pacing (see PaceController.metrics) and phrase cache hit rates."""
+        metrics = dict(self.tts.metrics(), queue=self._speech_queue.metrics(), pace=self.pace.metrics())
+        if self.cache is not None:
+            metrics['phrase_cache'] = dict(self.cache.metrics(), time_to_first_audio=self.cached_first_audio.summary())
+        return metrics
 
     def stop(self):
         if self._speech_thread and self._speech_thread.is_alive():
-            self._speech_queue.put(self._stop_sentinel)
+            self._speech_queue.close()
             self._speech_thread.join(timeout=3)
             self._speech_thread = None
 
 class KeyDetector:
-    def __init__(self, scan_code: int, press_callback):
+    """
+    Turns the presses and releases of one key into gestures: 'single', 'double' and
+    'triple' taps, and 'hold'.
+
+    Key events arrive on the keyboard hook thread and timeouts on the GestureScheduler
+    thread; both go through the same state machine under one lock. Gestures are reported
+    to `press_callback(scan_code, gesture)` outside the lock, on the scheduler thread.
+    """
+
+    def __init__(self, scan_code: int, press_callback, scheduler: GestureScheduler | None = None):
         self.scan_code = scan_code
         self.press_callback = press_callback
-        self.press_time = 0
-        self.release_time = 0
+        self.scheduler = scheduler or GestureScheduler()
+        self.press_time = -1.0
+        self.release_time = -1.0
         self.press_count = 0
-        self.last_release_time = 0
+        self.last_release_time = -1.0
         self.hold_detected = False
         self.key_pressed = False
         self.hold_threshold = 0.5
@@ -94,65 +281,89 @@ class KeyDetector:
         self.max_taps = 3
         self.hold_check_timer = None
         self.tap_check_timer = None
+        self._lock = threading.Lock()
+        self.stats = collections.Counter()
+        self.decision_delay = LatencyStats()  # From the key event that settled a gesture to reporting it
+
+    def on_event(self, event):
+        """keyboard.hook() callback: passes key down and key up events to on_press and on_release."""
+        if event.event_type == keyboard.KEY_DOWN:
+            self.on_press(event)
+        elif event.event_type == keyboard.KEY_UP:
+            self.on_release(event)
 
     def on_press(self, event):
-        if event.scan_code != self.scan_code or self.key_pressed or (time.time() - self.press_time) < self.debounce_time:
+        if event.scan_code != self.scan_code:
             return
-        self.key_pressed = True
-        current_time = time.time()
-        self.press_time = current_time
-        self.hold_detected = False
-        if self.tap_check_timer:
-            self.tap_check_timer.cancel()
-        self.hold_check_timer = threading.Timer(self.hold_threshold, self._trigger_hold, [current_time])
-        self.hold_check_timer.start()
+        current_time = time.monotonic()
+        with self._lock:
+            if self.key_pressed or (current_time - self.press_time) < self.debounce_time:
+                return  # Key repeat, or a bounce
+            self.key_pressed = True
+            self.press_time = current_time
+            self.hold_detected = False
+            if self.tap_check_timer:
+                self.tap_check_timer.cancel()
+            self.hold_check_timer = self.scheduler.call_at(current_time + self.hold_threshold, self._trigger_hold, current_time)
 
     def on_release(self, event):
-        if event.scan_code != self.scan_code or not self.key_pressed or (time.time() - self.release_time) < self.debounce_time:
-            return
-        self.key_pressed = False
-        current_time = time.time()
-        self.release_time = current_time
-        if self.hold_check_timer and not self.hold_detected:
-            self.hold_check_timer.cancel()
-        if self.hold_detected:
-            self.hold_detected = False
+        if event.scan_code != self.scan_code:
             return
-        if (current_time - self.last_release_time) < self.tap_threshold:
-            self.press_count += 1
-        else:
-            self.press_count = 1
-        self.last_release_time = current_time
-        self.tap_check_timer = threading.Timer(self.tap_threshold, self._check_tap_count, [current_time])
-        self.tap_check_timer.start()
+        current_time = time.monotonic()
+        with self._lock:
+            if not self.key_pressed or (current_time - self.release_time) < self.debounce_time:
+                return
+            self.key_pressed = False
+            self.release_time = current_time
+            if self.hold_check_timer and not self.hold_detected:
+                self.hold_check_timer.cancel()
+            if self.hold_detected:
+                self.hold_detected = False
+                return
+            if (current_time - self.last_release_time) < self.tap_threshold:
+                self.press_count += 1
+            else:
+                self.press_count = 1
+            self.last_release_time = current_time
+            self.tap_check_timer = self.scheduler.call_at(current_time + self.tap_threshold, self._check_tap_count, current_time)
 
     def _trigger_hold(self, press_time):
-        if press_time == self.press_time and not self.hold_detected and self.key_pressed:
+        with self._lock:
+            if press_time != self.press_time or self.hold_detected or not self.key_pressed:
+                return
             self.hold_detected = True
             self.press_count = 0
-            self.press_callback(self.scan_code, 'hold')
+        self._report('hold', press_time)
 
     def _check_tap_count(self, release_time):
-        if release_time != self.last_release_time or self.hold_detected or self.key_pressed:
-            return
-        if self.press_count > self.max_taps:
-            self.press_count = 0
+        with self._lock:
+            if release_time != self.last_release_time or self.hold_detected or self.key_pressed:
+                return
+            count, self.press_count = self.press_count, 0
+        if count > self.max_taps:
+            self.stats['too_many_taps'] += 1
             return
-        if self.press_count == 1:
-            self.press_callback(self.scan_code, 'single')
-        elif self.press_count == 2:
-            self.press_callback(self.scan_code, 'double')
-        elif self.press_count == 3:
-            self.press_callback(self.scan_code, 'triple')
-        self.press_count = 0
+        gesture = {1: 'single', 2: 'double', 3: 'triple'}.get(count)
+        if gesture:
+            self._report(gesture, release_time)
+
+    def _report(self, gesture, settled_at):
+        self.decision_delay.add(time.monotonic() - settled_at)
+        self.stats[gesture] += 1
+        self.press_callback(self.scan_code, gesture)
+
+    def metrics(self) -> dict:
+        """Gestures reported per kind and the decision delay (hold or tap window plus scheduling)."""
+        return dict(self.stats, decision_delay=self.decision_delay.summary())
 
 class InputManager:
-    def __init__(self):
+    def __init__(self, speech_phrases=()):
         self.logger = logger
         self.logger.debug("Initializing InputManager...")
-        self.speech_engine = SpeechEngine()
-        self.input_active = True
+        self.speech_engine = SpeechEngine(phrases=speech_phrases)
+        self.dispatcher = ActionDispatcher()  # Runs the actions off the gesture thread
         self.key_detectors: dict[int, KeyDetector] = {}
+        self.gesture_scheduler = GestureScheduler()  # Times the gestures of every key
         self.action_handlers: dict[str, Callable] = {
             'single': self.default_single_handler,
             'double': self.default_double_handler,
@@ -181,35 +392,70 @@ class InputManager:
         self.speak(f"Key {key} held down")
 
     def handle_key_action(self, scan_code: int, action_type: str):
-        if not self.input_active:
-            return
-        self.input_active = False
+        """Queue the handler of a gesture on the dispatcher and return at once (see dispatch)."""
         self.logger.info(f"Detected {action_type} press on key with scan code {scan_code}")
         if action_type in self.action_handlers:
-            self.action_handlers[action_type](scan_code)
+            return self.dispatch(f"{action_type} {scan_code}", self.action_handlers[action_type], scan_code)
         else:
             self.logger.warning(f"No handler defined for action type: {action_type}")
-        self.input_active = True
+
+    def dispatch(self, name: str, handler: Callable, *args) -> concurrent.futures.Future:
+        """
+        Run an action on the worker pool. It supersedes the actions still running: their
+        remaining speech is dropped, so only the newest action is heard.
+
+        Args:
+            name (str): What the action is; the same action queued twice runs once.
+            handler (Callable): Called with `args` on a worker thread.
+
+        Returns:
+            Future: Result of the handler; cancelled if the action was dropped before it started.
+        """
+        return self.dispatcher.submit(name, handler, *args)
+
+    def cancel_actions(self):
+        """Cancel what the actions are doing and saying."""
+        self.dispatcher.cancel_all()
+        self.speech_engine.flush()
 
     def start(self, scan_codes=None):
         if scan_codes is None:
             scan_codes = [-176, -177, -179]
         for code in scan_codes:
-            detector = KeyDetector(code, self.handle_key_action)
+            detector = KeyDetector(code, self.handle_key_action, self.gesture_scheduler)
             self.key_detectors[code] = detector
-            keyboard.hook(detector.on_press)
-            keyboard.hook(detector.on_release)
+            keyboard.hook(detector.on_event)
         logger.info(f"Listening for scan codes: {', '.join(str(c) for c in scan_codes)}")
         self.speak("System ready. Listening for headset buttons.")
 
-    def speak(self, text):
+    def speak(self, text, priority=RESULT, flush=False, max_age=None):
+        if self.dispatcher.cancelled():
+            # Said from an action that a newer one has superseded
+            self.dispatcher.count('suppressed_speech')
+            future = concurrent.futures.Future()
+            future.cancel()
+            return future
         try:
-            self.speech_engine.speak(text)
+            return self.speech_engine.speak(text, priority, flush, max_age)
         except Exception as e:
             logger.error(f"Speak error: {e}")
+            future = concurrent.futures.Future()
+            future.set_exception(e)
+            return future
+
+    def gesture_metrics(self) -> dict:
+        return {
+            'scheduler': self.gesture_scheduler.metrics(),
+            'keys': {code: detector.metrics() for code, detector in self.key_detectors.items()},
+        }
 
     def stop(self):
         keyboard.unhook_all()
+        self.gesture_scheduler.close()
+        self.dispatcher.shutdown()
+        logger.info(f"Gesture metrics: {self.gesture_metrics()}")
+        logger.info(f"Action metrics: {self.dispatcher.metrics()}")
+        logger.info(f"Speech metrics: {self.speech_engine.metrics()}")
         self.speech_engine.stop()
         logger.info("InputManager stopped.")
 
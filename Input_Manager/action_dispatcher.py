@@ -0,0 +1,165 @@
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+from Utils.latency_stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class Action:
+    __slots__ = ("name", "handler", "args", "future", "cancelled", "queued_at")
+
+    def __init__(self, name: str, handler, args):
+        self.name = name
+        self.handler = handler
+        self.args = args
+        self.future = concurrent.futures.Future()
+        self.cancelled = threading.Event()  # Set once a newer action superseded this one
+        self.queued_at = time.perf_counter()
+
+
+class ActionDispatcher:
+    """
+    Runs the actions of gestures and voice commands on a small worker pool, so the thread
+    that reported the gesture returns at once and the buttons stay responsive while a
+    model is busy.
+
+    A new action supersedes the ones already running: they are marked cancelled, and
+    speech from a cancelled action is dropped (see InputManager.speak), so the user only
+    hears the newest action. Python threads cannot be stopped from outside, so a
+    superseded action keeps its worker until it returns; handlers that loop can check
+    cancelled() to return early. When every worker is busy new actions wait, at most
+    `max_pending` of them: the same action queued twice is coalesced into one, and past
+    the limit the oldest waiting action is dropped.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 1, supersede: bool = True):
+        """
+        Args:
+            max_workers (int): Actions that can run at the same time, superseded ones included.
+            max_pending (int): Actions that can wait for a worker.
+            supersede (bool): Cancel running actions when a new one is submitted.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.supersede = supersede
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="action")
+        self._running = set()
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self.stats = collections.Counter()
+        self.queue_wait = LatencyStats()  # From submitting an action to it starting
+        self.run_time = LatencyStats()
+
+    def submit(self, name: str, handler, *args) -> concurrent.futures.Future:
+        """
+        Queue `handler(*args)` and return at once.
+
+        Args:
+            name (str): What the action is (e.g. "single -176"); equal names are coalesced while waiting.
+
+        Returns:
+            Future: Result of the handler; cancelled if the action was dropped before it started.
+        """
+        action = Action(name, handler, args)
+        with self._lock:
+            self.stats['received'] += 1
+            if self._closed:
+                action.future.cancel()
+                return action.future
+            if self.supersede:
+                self._cancel_running_locked()
+            for waiting in self._pending:
+                if waiting.name == name:
+                    self.stats['coalesced'] += 1
+                    return waiting.future
+            if self.supersede:
+                for waiting in self._pending:  # Still waiting, and already out of date
+                    self._drop_locked(waiting)
+                self._pending.clear()
+            self._pending.append(action)
+            while len(self._pending) > self.max_pending:
+                self._drop_locked(self._pending.popleft())
+            self._start_locked()
+        return action.future
+
+    def _cancel_running_locked(self):
+        for running in self._running:
+            if not running.cancelled.is_set():
+                running.cancelled.set()
+                self.stats['superseded'] += 1
+
+    def _drop_locked(self, action):
+        action.cancelled.set()
+        action.future.cancel()
+        self.stats['dropped'] += 1
+        logger.info(f"Dropped action {action.name}")
+
+    def _start_locked(self):
+        while self._pending and len(self._running) < self.max_workers:
+            action = self._pending.popleft()
+            if not action.future.set_running_or_notify_cancel():
+                continue
+            self._running.add(action)
+            self.queue_wait.add(time.perf_counter() - action.queued_at)
+            self.stats['started'] += 1
+            self._executor.submit(self._run, action)
+
+    def _run(self, action):
+        self._local.action = action
+        start = time.perf_counter()
+        try:
+            result = action.handler(*action.args)
+        except Exception as e:
+            logger.error(f"Action {action.name} failed: {e}")
+            outcome = 'failed'
+            action.future.set_exception(e)
+        else:
+            outcome = 'completed'
+            action.future.set_result(result)
+        finally:
+            self._local.action = None
+            self.run_time.add(time.perf_counter() - start)
+            with self._lock:
+                self.stats[outcome] += 1
+                self._running.discard(action)
+                self._start_locked()
+
+    def cancelled(self) -> bool:
+        """True on the thread of an action that has been superseded (False outside actions)."""
+        action = getattr(self._local, 'action', None)
+        return action is not None and action.cancelled.is_set()
+
+    def count(self, name: str):
+        """Count an event of the actions (e.g. 'suppressed_speech') in the dispatcher's counters."""
+        with self._lock:
+            self.stats[name] += 1
+
+    def cancel_all(self):
+        """Supersede the running actions and drop the waiting ones."""
+        with self._lock:
+            self._cancel_running_locked()
+            for waiting in self._pending:
+                self._drop_locked(waiting)
+            self._pending.clear()
+
+    def is_busy(self) -> bool:
+        with self._lock:
+            return bool(self._running or self._pending)
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=wait)
+
+    def metrics(self) -> dict:
+        """Counters (received, started, completed, failed, superseded, coalesced, dropped, suppressed_speech), queue wait and run time."""
+        with self._lock:
+            metrics = dict(self.stats, running=len(self._running), pending=len(self._pending))
+        return dict(metrics, queue_wait=self.queue_wait.summary(), run_time=self.run_time.summary())
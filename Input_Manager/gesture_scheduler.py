@@ -0,0 +1,111 @@
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from Utils.latency_stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    __slots__ = ("deadline", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, seq: int, callback, args):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop the callback from running; a no-op once it has run."""
+        self.cancelled = True
+
+    def __lt__(self, other):
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class GestureScheduler:
+    """
+    One thread that runs the timed callbacks of all keys (hold and tap timeouts), in
+    deadline order on the monotonic clock, instead of a threading.Timer thread per press
+    and release.
+
+    Cancelled timers stay in the heap and are skipped when they come due; they are never
+    more than one tap window old, so the heap stays small. Callbacks run on the scheduler
+    thread and must return quickly, since every other key's timing waits for them.
+    """
+
+    def __init__(self, name: str = "gesture-scheduler"):
+        self.name = name
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.stats = collections.Counter()
+        self.lateness = LatencyStats()  # How long after their deadline callbacks ran
+
+    def call_at(self, deadline: float, callback, *args) -> TimerHandle:
+        """Run `callback(*args)` at time.monotonic() `deadline`."""
+        handle = TimerHandle(deadline, next(self._seq), callback, args)
+        with self._cond:
+            if self._closed:
+                handle.cancel()
+                return handle
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, handle)
+            self.stats['scheduled'] += 1
+            if self._heap[0] is handle:
+                self._cond.notify()
+        return handle
+
+    def call_later(self, delay: float, callback, *args) -> TimerHandle:
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def _next_due(self):
+        with self._cond:
+            while not self._closed:
+                while self._heap and self._heap[0].cancelled:
+                    heapq.heappop(self._heap)
+                    self.stats['cancelled'] += 1
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0].deadline - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                self.stats['fired'] += 1
+                return heapq.heappop(self._heap)
+        return None
+
+    def _run(self):
+        while True:
+            handle = self._next_due()
+            if handle is None:
+                return
+            self.lateness.add(time.monotonic() - handle.deadline)
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.error(f"Gesture timer callback failed: {e}")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._heap = []
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def metrics(self) -> dict:
+        """Counters (scheduled, fired, cancelled), pending timers and how late timers fired."""
+        with self._cond:
+            metrics = dict(self.stats, pending=len(self._heap))
+        return dict(metrics, lateness=self.lateness.summary())
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import collections
+import hashlib
+import os
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_cache")
+
+
+def is_wav(data: bytes) -> bool:
+    """True if `data` looks like a WAV file with at least some audio after its header."""
+    return len(data) > 44 and data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+class PhraseCache:
+    """
+    Size-bounded LRU cache of synthesized phrases as WAV files on disk.
+
+    Phrases are keyed by their normalized text and the speech rate, so audio rendered at
+    another rate is simply a miss. The files survive restarts: they are named after their
+    key, and their modification time is refreshed on use so the least recently used ones
+    are evicted first. Files are checked once, when added or first looked up, and played
+    from disk (see speech_backend.play_wav); a lookup only counts as a hit once the caller
+    reports that playback started (see played()).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_disk_bytes: int = 64 * 2**20):
+        """
+        Args:
+            cache_dir (str): Directory for the WAV files (created if missing).
+            max_disk_bytes (int): Disk budget of the cache directory.
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._disk = collections.OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._checked = set()                   # keys whose file was read and is valid WAV audio
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan_disk()
+
+    @staticmethod
+    def key(text: str, rate: int) -> str:
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha1(f"{rate}|{normalized}".encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".wav")
+
+    def _scan_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._checked.discard(key)
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            self.stats['evictions'] += 1
+
+    def _drop(self, key: str):
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._checked.discard(key)
+
+    @staticmethod
+    def _read_header(path: str) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read(45)
+        except OSError:
+            return b""
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._disk
+
+    def get(self, text: str, rate: int) -> str | None:
+        """The path of the cached audio of a phrase, or None on a miss."""
+        key = self.key(text, rate)
+        path = self.path(key)
+        with self._lock:
+            self.stats['lookups'] += 1
+            if key not in self._disk:
+                self.stats['misses'] += 1
+                return None
+            checked = key in self._checked
+        if not checked and not is_wav(self._read_header(path)):
+            with self._lock:
+                self._drop(key)
+                self.stats['misses'] += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._drop(key)
+                self.stats['misses'] += 1
+            return None
+        with self._lock:
+            self._checked.add(key)
+            self._disk.move_to_end(key)
+        return path
+
+    def played(self, started: bool):
+        """Report whether the audio returned by the last get() started playing."""
+        with self._lock:
+            self.stats['hits' if started else 'play_failures'] += 1
+
+    def add(self, key: str) -> bool:
+        """
+        Add the file that was just rendered to path(key).
+
+        Returns:
+            bool: False if the file is not valid WAV audio (it is then deleted).
+        """
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if not is_wav(self._read_header(path)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            self._disk_bytes += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            self._checked.add(key)
+            self._evict()
+            self.stats['added'] += 1
+        return True
+
+    def metrics(self) -> dict:
+        """Lookups, hits (audio that started playing), misses, hit rate, evictions and cache size."""
+        with self._lock:
+            return dict(self.stats,
+                        hit_rate=round(self.stats['hits'] / self.stats['lookups'], 3) if self.stats['lookups'] else None,
+                        entries=len(self._disk),
+                        disk_bytes=self._disk_bytes)
@@ -0,0 +1,316 @@
+from __future__ import annotations
+import collections
+import importlib.metadata
+import logging
+import threading
+import time
+import wave
+
+import pyttsx3
+
+from Utils.latency_stats import LatencyStats
+
+try:
+    import winsound  # Plays cached phrases; only available on Windows
+except ImportError:
+    winsound = None
+
+logger = logging.getLogger(__name__)
+
+# PersistentTTS recovers broken engines through three pyttsx3 internals: Engine._inLoop,
+# pyttsx3._activeEngines (the per-driver engine cache) and the driver behind Engine.proxy.
+# They are not public API; they were checked against the pinned version (requirements.txt)
+# and are only reached through the helpers below, which skip the step a missing one serves.
+PYTTSX3_TESTED_VERSION = "2.99"
+try:
+    PYTTSX3_VERSION = importlib.metadata.version("pyttsx3")
+except importlib.metadata.PackageNotFoundError:
+    PYTTSX3_VERSION = None
+if PYTTSX3_VERSION != PYTTSX3_TESTED_VERSION and not hasattr(pyttsx3, '_activeEngines'):
+    logger.warning(f"pyttsx3 {PYTTSX3_VERSION} has no engine cache; speech engine recovery may reuse a broken "
+                   f"engine (tested with {PYTTSX3_TESTED_VERSION})")
+
+
+def _in_loop(engine) -> bool:
+    return getattr(engine, '_inLoop', False)
+
+
+def _forget_engine(driver: str | None):
+    """Drop a driver's engine from pyttsx3's cache, so the next init() loads a new one."""
+    cache = getattr(pyttsx3, '_activeEngines', None)
+    if cache is not None:
+        cache.pop(driver, None)
+
+
+def _end_driver_loop(engine):
+    """End the run loop of the driver behind an engine, bypassing the engine's own endLoop()."""
+    driver = getattr(getattr(engine, 'proxy', None), '_driver', None)
+    if driver is not None:
+        driver.endLoop()
+
+
+def can_play_wav() -> bool:
+    return winsound is not None
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path) as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+def play_wav(path: str, interrupt: threading.Event | None = None) -> float | None:
+    """
+    Play a WAV file, blocking until it has played or `interrupt` is set. PlaySound cannot
+    play audio from memory asynchronously, so cached audio is played from its file.
+
+    Returns:
+        float | None: time.perf_counter() when playback started, or None if it could not be
+                      played (no audio playback on this platform, or a bad file).
+    """
+    if winsound is None:
+        return None
+    try:
+        duration = wav_duration(path)
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_NODEFAULT | winsound.SND_ASYNC)
+    except Exception as e:
+        logger.warning(f"Could not play cached audio: {e}")
+        return None
+    started = time.perf_counter()
+    if interrupt is None:
+        time.sleep(duration)
+    elif interrupt.wait(duration):
+        winsound.PlaySound(None, 0)  # Stops the sound that is playing
+    return started
+
+
+class PersistentTTS:
+    """
+    A pyttsx3 engine that is created once and reused for every utterance, instead of
+    initializing the driver again for each phrase.
+
+    pyttsx3 engines belong to the thread that created them (SAPI5 is COM based), so all
+    methods must be called from the same thread, normally the speech thread. When an
+    utterance raises, runAndWait() returns without the utterance ever starting, or it
+    hangs well past the time the text should take to say (reused engines do both on some
+    drivers), the engine is considered broken: it is thrown away and the utterance is
+    retried on a freshly created one.
+    """
+
+    def __init__(self, rate: int = 150, driver: str | None = None, max_retries: int = 1, stall_timeout: float = 5.0):
+        """
+        Args:
+            rate (int): Speech rate in words per minute.
+            driver (str | None): pyttsx3 driver name; None picks the platform default.
+            max_retries (int): Fresh engines to try an utterance on after the engine broke.
+            stall_timeout (float): Seconds past twice the expected speaking time after which
+                                   an utterance counts as hung.
+        """
+        self.rate = rate
+        self.driver = driver
+        self.max_retries = max_retries
+        self.stall_timeout = stall_timeout
+        self._engine = None
+        self._stalled = False
+        self._interrupt = None
+        self._started = None
+        self._audio_started = None
+        self._completed = None
+        self.stats = collections.Counter()
+        self.time_to_first_audio = LatencyStats()  # From queueing the text to the first audio
+        self.engine_delay = LatencyStats()         # From handing the text to the engine to the first audio
+        self.init_time = LatencyStats()
+
+    def _create_engine(self):
+        start = time.perf_counter()
+        engine = pyttsx3.init(self.driver)
+        engine.setProperty('rate', self.rate)
+        engine.connect('started-utterance', self._on_started)
+        engine.connect('started-word', self._on_word)
+        engine.connect('finished-utterance', self._on_finished)
+        self.init_time.add(time.perf_counter() - start)
+        self.stats['engine_inits'] += 1
+        return engine
+
+    def _discard_engine(self):
+        engine, self._engine = self._engine, None
+        if engine is None:
+            return
+        try:
+            engine.stop()
+            if _in_loop(engine):
+                engine.endLoop()
+        except Exception:
+            pass
+        # pyttsx3.init() hands back the cached engine of a driver while it is alive; drop it
+        # from the cache so the next init() really loads a new driver
+        _forget_engine(self.driver)
+
+    def set_rate(self, rate: int):
+        """Change the speech rate (words per minute) from the next utterance on."""
+        if rate != self.rate:
+            self.rate = rate
+            if self._engine is not None:
+                self._engine.setProperty('rate', rate)
+
+    def _end_stalled_loop(self, engine):
+        # Runs on a timer thread; the drivers' run loops poll a flag, so endLoop() can stop them from here
+        self._stalled = True
+        try:
+            engine.endLoop()
+        except Exception:
+            # endLoop() stops the current utterance first, which is what a broken driver may fail
+            # at; end the driver's run loop directly instead
+            try:
+                _end_driver_loop(engine)
+            except Exception:
+                pass
+
+    # Driver callbacks, called on the speech thread from inside runAndWait()
+    def _on_started(self, **_):
+        self._started = time.perf_counter()
+
+    def _on_word(self, **_):
+        # SAPI5 announces the utterance before the audio stream opens; its first word event
+        # is the closest thing to the moment sound comes out
+        if self._audio_started is None:
+            self._audio_started = time.perf_counter()
+        # Stopping from inside a callback keeps the engine on its own thread
+        if self._interrupt is not None and self._interrupt.is_set():
+            self._engine.stop()
+
+    def _on_finished(self, completed=True, **_):
+        self._completed = completed
+
+    def health_check(self) -> dict:
+        """
+        Create the engine and check it is usable: the driver loads, has at least one voice
+        and accepts the configured rate. Call it on the speech thread before the first utterance.
+
+        Returns:
+            dict: 'ok', 'driver', 'voices' (count), 'init_ms' and 'error' (None when ok).
+        """
+        start = time.perf_counter()
+        report = {'ok': False, 'driver': self.driver, 'voices': 0, 'init_ms': None, 'error': None}
+        try:
+            self._discard_engine()
+            self._engine = self._create_engine()
+            report['driver'] = getattr(self._engine, 'driver_name', self.driver)
+            report['voices'] = len(self._engine.getProperty('voices') or [])
+            if not report['voices']:
+                raise RuntimeError("no voices installed")
+            if not self._engine.getProperty('rate'):
+                raise RuntimeError("the engine did not accept the speech rate")
+            report['ok'] = True
+        except Exception as e:
+            report['error'] = str(e)
+            self._discard_engine()
+        report['init_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return report
+
+    def _ensure_engine(self) -> bool:
+        if self._engine is None:
+            try:
+                self._engine = self._create_engine()
+            except Exception as e:
+                logger.error(f"Could not create speech engine: {e}")
+                self.stats['init_failures'] += 1
+                return False
+        return True
+
+    def _run(self, command, text: str) -> bool:
+        """
+        Queue a command on the engine and run its loop under the stall watchdog.
+
+        Returns:
+            bool: False if the engine broke (it has then been discarded).
+        """
+        self._stalled = False
+        expected = 2 * len(text.split()) * 60.0 / self.rate
+        watchdog = threading.Timer(expected + self.stall_timeout, self._end_stalled_loop, [self._engine])
+        watchdog.daemon = True
+        try:
+            watchdog.start()
+            command(text)
+            self._engine.runAndWait()
+        except Exception as e:
+            logger.warning(f"Speech engine failed ({e}), restarting it")
+            self.stats['engine_failures'] += 1
+            self._discard_engine()
+            return False
+        finally:
+            watchdog.cancel()
+        if self._stalled:
+            logger.warning("Speech engine hung, restarting it")
+            self.stats['engine_stalls'] += 1
+            self._discard_engine()
+            return False
+        return True
+
+    def speak(self, text: str, queued_at: float | None = None, interrupt: threading.Event | None = None) -> bool:
+        """
+        Speak a text, blocking until it has been spoken.
+
+        Args:
+            text (str): Text to speak.
+            queued_at (float | None): time.perf_counter() when the text was queued, for the
+                                      time-to-first-audio statistics.
+            interrupt (threading.Event | None): Stops the utterance at the next word when set.
+
+        Returns:
+            bool: True if the text was spoken to the end.
+        """
+        self._interrupt = interrupt
+        for attempt in range(self.max_retries + 1):
+            if interrupt is not None and interrupt.is_set():
+                self.stats['interrupted'] += 1
+                return False
+            if attempt:
+                self.stats['retries'] += 1
+            if not self._ensure_engine():
+                continue
+            self._started = self._audio_started = self._completed = None
+            said_at = time.perf_counter()
+            if not self._run(self._engine.say, text):
+                continue
+            if self._started is None:
+                logger.warning("Speech engine returned without speaking, restarting it")
+                self.stats['engine_failures'] += 1
+                self._discard_engine()
+                continue
+
+            first_audio = self._audio_started or self._started
+            self.engine_delay.add(first_audio - said_at)
+            if queued_at is not None:
+                self.time_to_first_audio.add(first_audio - queued_at)
+            self.stats['utterances'] += 1
+            if self._completed is False:
+                self.stats['interrupted'] += 1
+                return False
+            return True
+
+        logger.error(f"Dropped speech after {self.max_retries + 1} attempts: '{text}'")
+        self.stats['dropped'] += 1
+        return False
+
+    def render(self, text: str, path: str) -> bool:
+        """
+        Synthesize a text to a WAV file instead of the speakers (see PhraseCache).
+
+        Returns:
+            bool: True if the engine finished writing the file.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self._ensure_engine() and self._run(lambda t: self._engine.save_to_file(t, path), text):
+                self.stats['renders'] += 1
+                return True
+        return False
+
+    def close(self):
+        self._discard_engine()
+
+    def metrics(self) -> dict:
+        """Counters (utterances, interrupted, renders, engine_inits, engine_failures, engine_stalls, retries, dropped) and timing percentiles."""
+        return dict(self.stats,
+                    time_to_first_audio=self.time_to_first_audio.summary(),
+                    engine_delay=self.engine_delay.summary(),
+                    engine_init=self.init_time.summary())
@@ -0,0 +1,94 @@
+import collections
+import re
+
+from Utils.latency_stats import LatencyStats
+
+# Shorter forms of the announcements, used while speech lags behind
+TERSE_TEMPLATES = [
+    (re.compile(r"^Running (?P<what>.+)$", re.IGNORECASE), r"\g<what>"),              # "Running OCR" -> "OCR"
+    (re.compile(r"^(?P<what>No .+) detected$", re.IGNORECASE), r"\g<what>"),          # "No objects detected" -> "No objects"
+    (re.compile(r"^(?P<what>.+) detected$", re.IGNORECASE), r"\g<what>"),             # "two persons and a car detected" -> "two persons and a car"
+    (re.compile(r"^(?P<what>Error running [^:]+): .+$", re.IGNORECASE), r"\g<what>"),  # Drop the exception details
+]
+
+
+def terse(text: str) -> str:
+    """The short form of an announcement (see TERSE_TEMPLATES), or the text itself if it has none."""
+    for pattern, replacement in TERSE_TEMPLATES:
+        if pattern.match(text):
+            return pattern.sub(replacement, text, count=1)
+    return text
+
+
+class PaceController:
+    """
+    Keeps speech from falling behind the camera.
+
+    Before each utterance the speech thread reports the backlog: the words still to be said
+    and how long the oldest of them has been waiting. From that the controller predicts the
+    lag at which the last queued item will be heard. If it exceeds `target_lag` the speaking
+    rate is raised just enough to catch up, up to `max_rate`; if even that is not enough,
+    announcements switch to their terse forms (see terse()). As the backlog drains the rate
+    steps back down to `base_rate` and the full forms return.
+    """
+
+    def __init__(self, base_rate: int = 150, max_rate: int = 230, target_lag: float = 4.0, step_down: int = 15):
+        """
+        Args:
+            base_rate (int): Normal speech rate in words per minute.
+            max_rate (int): Fastest rate the user is comfortable with.
+            target_lag (float): Seconds within which queued speech should be heard.
+            step_down (int): Words per minute the rate drops per utterance once the backlog allows it.
+        """
+        self.base_rate = base_rate
+        self.max_rate = max(max_rate, base_rate)
+        self.target_lag = target_lag
+        self.step_down = step_down
+        self.rate = base_rate
+        self.terse = False
+        self.predicted_lag = LatencyStats()
+        self.stats = collections.Counter()
+
+    def update(self, words: int, oldest_wait: float):
+        """
+        Pick the rate and verbosity for the next utterance.
+
+        Args:
+            words (int): Words queued, including the utterance about to be said.
+            oldest_wait (float): Seconds the oldest of them has been queued.
+
+        Returns:
+            tuple: (speech rate in words per minute, True to use terse announcements)
+        """
+        speaking = words * 60.0 / self.base_rate
+        lag = oldest_wait + speaking
+        self.predicted_lag.add(lag)
+
+        # Rate at which the backlog would be heard within the target (what is left of it after the wait so far)
+        budget = max(self.target_lag - oldest_wait, 0.5)
+        needed = min(max(self.base_rate * speaking / budget, self.base_rate), self.max_rate)
+        if needed > self.rate:
+            self.rate = int(needed)
+        else:
+            self.rate = int(max(needed, self.rate - self.step_down))
+
+        # Terse forms while even the fastest rate cannot keep up; back to full ones once well within the target
+        at_max_rate = oldest_wait + words * 60.0 / self.max_rate
+        if at_max_rate > self.target_lag:
+            self.terse = True
+        elif lag < self.target_lag / 2:
+            self.terse = False
+
+        self.stats['utterances'] += 1
+        self.stats['fast_utterances'] += self.rate > self.base_rate
+        self.stats['terse_utterances'] += self.terse
+        return self.rate, self.terse
+
+    def idle(self):
+        """The queue has drained: back to the normal rate and full announcements."""
+        self.rate = self.base_rate
+        self.terse = False
+
+    def metrics(self) -> dict:
+        """Current rate and verbosity, counters (utterances, fast_utterances, terse_utterances) and predicted lag percentiles."""
+        return dict(self.stats, rate=self.rate, terse=self.terse, predicted_lag=self.predicted_lag.summary())
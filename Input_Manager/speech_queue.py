@@ -0,0 +1,348 @@
+from __future__ import annotations
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import queue
+import re
+import threading
+import time
+
+from Utils.latency_stats import LatencyStats
+
+# Speech priorities, most urgent first
+HAZARD = 0   # Warnings about obstacles and traffic
+RESULT = 1   # Results of the action the user asked for
+STATUS = 2   # Status chatter ("Running OCR")
+PRIORITY_NAMES = {HAZARD: "hazard", RESULT: "result", STATUS: "status"}
+
+# Seconds after which a queued item is no longer worth saying. A hazard warning that could
+# not be said right away describes a scene that has already changed.
+MAX_AGE = {HAZARD: 3.0, RESULT: 30.0, STATUS: 5.0}
+# max_age of items that are only dropped by a flush, e.g. the lines of a page being read aloud
+NO_EXPIRY = float("inf")
+
+# "<subject> detected" items queued next to each other are said as one sentence ("No objects detected" is not one)
+DETECTED = re.compile(r"^(?!no )(?P<subject>.+) detected$", re.IGNORECASE)
+
+NUMBER_WORDS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+
+def plural(noun: str) -> str:
+    """English plural of a class name ("person" -> "persons", "bus" -> "buses", "traffic light" -> "traffic lights")."""
+    if re.search(r"(s|x|z|ch|sh)$", noun):
+        return noun + "es"
+    if re.search(r"[^aeiou]y$", noun):
+        return noun[:-1] + "ies"
+    return noun + "s"
+
+
+def counted(subject: str, count: int) -> str:
+    """'a car', 'an apple', 'two persons'; subjects that are not plain words are counted as they are ("two times 10 EGP")."""
+    number = NUMBER_WORDS[count] if count < len(NUMBER_WORDS) else str(count)
+    if not re.fullmatch(r"[A-Za-z][A-Za-z ]*", subject):
+        return subject if count == 1 else f"{number} times {subject}"
+    if count == 1:
+        return ("an " if subject[0].lower() in "aeiou" else "a ") + subject
+    return f"{number} {plural(subject)}"
+
+
+def coalesce_detections(subjects) -> str:
+    """One sentence for several detections: ["person", "car", "person", "chair"] -> "two persons, a car and a chair detected"."""
+    counts = collections.Counter()
+    spellings = {}
+    for subject in subjects:
+        key = subject.strip().lower()
+        counts[key] += 1
+        spellings.setdefault(key, subject.strip())
+    parts = [counted(spellings[key], count) for key, count in counts.items()]
+    listed = parts[0] if len(parts) == 1 else ", ".join(parts[:-1]) + " and " + parts[-1]
+    return f"{listed} detected"
+
+
+class SpeechFuture(concurrent.futures.Future):
+    """
+    Completion of one speak() call. The result is True once the text has been said to the
+    end and False if it was cut off; the future is cancelled if the text was dropped
+    unsaid (flushed, expired, or cancelled by the caller).
+
+    cancel() behaves as for any Future: it only drops a text that has not started. A text
+    that is being said is cut off with interrupt() instead; the result is then False.
+    """
+
+    def __init__(self, speech_queue):
+        """
+        Args:
+            speech_queue: What says the text; its interrupt_future(future) cuts an utterance off.
+        """
+        super().__init__()
+        self._speech_queue = speech_queue
+
+    def interrupt(self) -> bool:
+        """
+        Cut the text off if it is being said.
+
+        Returns:
+            bool: False if it is not being said (still queued, or already finished).
+        """
+        return self._speech_queue.interrupt_future(self)
+
+
+def cancel_speech(future) -> bool:
+    """Drop a queued text, or cut it off if it is being said; any speak() future is accepted."""
+    if future.cancel():
+        return True
+    return isinstance(future, SpeechFuture) and future.interrupt()
+
+
+class SpeechItem:
+    __slots__ = ("text", "priority", "queued_at", "max_age", "seq", "futures")
+
+    def __init__(self, text: str, priority: int, queued_at: float, max_age: float, seq: int, future: SpeechFuture):
+        self.text = text
+        self.priority = priority
+        self.queued_at = queued_at
+        self.max_age = max_age
+        self.seq = seq
+        self.futures = [future]  # More than one when adjacent items were merged
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SpeechQueue:
+    """
+    Priority queue for the speech thread.
+
+    Items are said most urgent first, and in order within a priority. On top of that:
+    - A hazard warning interrupts less urgent speech that is already playing (the speech
+      thread watches `interrupt`).
+    - put(..., flush=True) starts a new action: everything queued or playing from earlier
+      actions, except hazard warnings, is dropped.
+    - Items older than their max_age (by default MAX_AGE for their priority) are dropped
+      instead of said.
+    - "<subject> detected" items that are queued next to each other are merged into one
+      utterance ("two persons, a car and a chair detected").
+
+    put() returns a SpeechFuture that resolves when its text has been said.
+    """
+
+    def __init__(self, max_age: dict | None = None, preempt: int = HAZARD, coalesce: bool = True):
+        """
+        Args:
+            max_age (dict | None): Seconds per priority after which queued items are dropped (see MAX_AGE).
+            preempt (int): Items at this priority or more urgent interrupt less urgent speech.
+            coalesce (bool): Merge adjacent "<subject> detected" items.
+        """
+        self.max_age = dict(MAX_AGE, **(max_age or {}))
+        self.preempt = preempt
+        self.coalesce = coalesce
+        self.current = None            # Item being said
+        self.interrupt = threading.Event()
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._woken = False
+        self.stats = collections.Counter()
+        self.max_depth = 0
+        self.wait_times = {priority: LatencyStats() for priority in PRIORITY_NAMES}
+
+    def put(self, text: str, priority: int = RESULT, flush: bool = False, max_age: float | None = None) -> SpeechFuture:
+        """
+        Queue a text.
+
+        Args:
+            text (str): Text to say.
+            priority (int): HAZARD, RESULT or STATUS.
+            flush (bool): Drop what is queued or playing first (see the class description).
+            max_age (float | None): Seconds after which the text is dropped unsaid; None uses the
+                                    default of its priority, NO_EXPIRY keeps it until it is flushed.
+        """
+        future = SpeechFuture(self)
+        with self._cond:
+            if self._closed:
+                future.cancel()
+                return future
+            if flush:
+                self._flush_locked()
+            if max_age is None:
+                max_age = self.max_age[priority]
+            item = SpeechItem(text, priority, time.perf_counter(), max_age, next(self._seq), future)
+            heapq.heappush(self._heap, item)
+            self.stats['queued'] += 1
+            self.max_depth = max(self.max_depth, len(self._heap))
+            current = self.current
+            if current is not None and ((priority <= self.preempt and priority < current.priority)
+                                        or (flush and current.priority > HAZARD)):
+                self.interrupt.set()
+                self.stats['preempted'] += 1
+            self._cond.notify_all()
+        return future
+
+    def _flush_locked(self):
+        kept = []
+        for item in self._heap:
+            if item.priority == HAZARD:
+                kept.append(item)
+            else:
+                self._drop(item)
+                self.stats['flushed'] += 1
+        self._heap = kept
+        heapq.heapify(self._heap)
+        self._cond.notify_all()
+
+    @staticmethod
+    def _drop(item):
+        for future in item.futures:
+            future.cancel()
+
+    def flush(self):
+        """Drop everything queued except hazard warnings, and interrupt the current item unless it is one."""
+        with self._cond:
+            self._flush_locked()
+            if self.current is not None and self.current.priority > HAZARD:
+                self.interrupt.set()
+                self.stats['preempted'] += 1
+
+    def interrupt_future(self, future) -> bool:
+        """Cut off the current utterance if it is the one `future` belongs to (see SpeechFuture.interrupt)."""
+        with self._cond:
+            if self.current is None or future not in self.current.futures:
+                return False
+            self.interrupt.set()
+            self.stats['interrupted'] += 1
+            return True
+
+    def get(self, timeout: float | None = None) -> SpeechItem | None:
+        """
+        Take the next item to say; it becomes `current` until done() is called.
+
+        Returns:
+            SpeechItem | None: The item, or None once the queue has been closed.
+
+        Raises:
+            queue.Empty: If nothing was queued within `timeout` seconds, or wake() was called
+                         while nothing was queued (queued items are taken first).
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                item = self._pop_locked()
+                if item is not None:
+                    break
+                if self._woken:
+                    self._woken = False
+                    raise queue.Empty
+                if not self._cond.wait(timeout):
+                    raise queue.Empty
+            self.interrupt.clear()
+            self.current = item
+        return item
+
+    def _take_locked(self, now):
+        """Pop the head item if it is still wanted, marking its future as running; None if it was dropped."""
+        item = heapq.heappop(self._heap)
+        if now - item.queued_at > item.max_age:
+            self.stats['expired'] += 1
+            self._drop(item)
+            return None
+        if not item.futures[0].set_running_or_notify_cancel():
+            self.stats['cancelled'] += 1
+            return None
+        self.wait_times[item.priority].add(now - item.queued_at)
+        return item
+
+    def _pop_locked(self):
+        now = time.perf_counter()
+        while self._heap:
+            item = self._take_locked(now)
+            if item is None:
+                continue
+            match = DETECTED.match(item.text) if self.coalesce else None
+            if match:
+                subjects = [match['subject']]
+                while self._heap and self._heap[0].priority == item.priority:
+                    following = DETECTED.match(self._heap[0].text)
+                    if not following:
+                        break
+                    merged = self._take_locked(now)
+                    if merged is not None:
+                        subjects.append(following['subject'])
+                        item.futures.extend(merged.futures)
+                        self.stats['coalesced'] += 1
+                if len(subjects) > 1:
+                    item.text = coalesce_detections(subjects)
+            return item
+        return None
+
+    def done(self, result: bool = True, error: BaseException | None = None):
+        """
+        Finish the current item and resolve its futures.
+
+        Args:
+            result (bool): True if it was said to the end, False if it was cut off.
+            error (BaseException | None): Exception that stopped it from being said.
+        """
+        with self._cond:
+            item, self.current = self.current, None
+            self.stats['spoken' if result and error is None else 'cut_off'] += 1
+            self._cond.notify_all()
+        for future in item.futures:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def is_busy(self) -> bool:
+        """True while something is being said or waiting to be said."""
+        with self._cond:
+            return self.current is not None or bool(self._heap)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """
+        Block until everything queued has been said (or dropped).
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._closed or (self.current is None and not self._heap), timeout)
+
+    def wake(self):
+        """Make get() raise queue.Empty once nothing is queued, so the speech thread can do background work."""
+        with self._cond:
+            self._woken = True
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self.interrupt.set()
+            for item in self._heap:
+                self._drop(item)
+            self._heap = []
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def backlog(self):
+        """
+        Returns:
+            tuple: (words queued, seconds the oldest queued item has been waiting)
+        """
+        now = time.perf_counter()
+        with self._cond:
+            words = sum(len(item.text.split()) for item in self._heap)
+            oldest = max((now - item.queued_at for item in self._heap), default=0.0)
+        return words, oldest
+
+    def metrics(self) -> dict:
+        """Counters (queued, spoken, cut_off, preempted, interrupted, cancelled, flushed, expired, coalesced), queue depth and wait times per priority."""
+        with self._cond:
+            metrics = dict(self.stats, depth=len(self._heap), max_depth=self.max_depth)
+        metrics['wait'] = {PRIORITY_NAMES[p]: stats.summary() for p, stats in self.wait_times.items() if stats.count}
+        return metrics
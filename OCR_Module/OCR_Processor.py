@@ -1,44 +1,147 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import cv2
-import pytesseract
 import json
-import os
+import multiprocessing
+import numpy as np
+import queue
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from OCR_Module.tesseract_engine import TSV_COLUMNS, TesseractEngine, create_engine
+from OCR_Module.preprocess import METHODS, Preprocessor, binarize
+from OCR_Module.text_regions import find_text_lines, find_text_regions, region_coverage, split_into_bands
+
+DEFAULT_TESSERACT_PATH = 'C:/Program Files/Tesseract-OCR/Tesseract.exe'
+
+
+def draw_annotations(image, results):
+    """
+    Draw OCR word boxes and text on a copy of the image.
+
+    Args:
+        image (np.ndarray): BGR (or grayscale) image.
+        results (list): Words as returned by OCRProcessor.recognize.
+
+    Returns:
+        np.ndarray: Annotated BGR copy of the image.
+    """
+    annotated = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image.copy()
+    for word in results:
+        b = word['bbox']
+        x, y, w, h = b['x'], b['y'], b['width'], b['height']
+        cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(annotated, word['text'], (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+    return annotated
+
+# One OCR processor per document worker process, created by _init_document_worker
+_document_ocr = None
+
+
+def _init_document_worker(engine_args, settings):
+    global _document_ocr
+    # One core per worker: keep OpenCV and Tesseract's OpenMP from oversubscribing the machine
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    cv2.setNumThreads(1)
+    _document_ocr = OCRProcessor(engine_args['tesseract_path'], engine_args['backend'], engine_args['lang'], **settings)
+
+
+def _ocr_band(band, conf_threshold):
+    return _document_ocr.recognize(band, conf_threshold)
+
+
+def box_overlap(a, b):
+    """Intersection area of two {'x', 'y', 'width', 'height'} boxes divided by the smaller box's area."""
+    ix = max(0, min(a['x'] + a['width'], b['x'] + b['width']) - max(a['x'], b['x']))
+    iy = max(0, min(a['y'] + a['height'], b['y'] + b['height']) - max(a['y'], b['y']))
+    smaller = min(a['width'] * a['height'], b['width'] * b['height'])
+    return ix * iy / smaller if smaller else 0.0
+
 
 class OCRProcessor:
-    def __init__(self, tesseract_path:str="C:/Program Files/Tesseract-OCR/Tesseract.exe"):
+    def __init__(self, tesseract_path:str=DEFAULT_TESSERACT_PATH, backend:str="auto", lang:str="eng", engine=None,
+                 preprocessing:str="adaptive", psm:int=3, scale:float|None=None, variables:dict|None=None):
         """
         Initialize the OCRProcessor with the path to the Tesseract OCR executable.
-        """
-        if tesseract_path:
-            if os.path.exists(tesseract_path):
-                pytesseract.pytesseract.tesseract_cmd = tesseract_path
-            else:
-                print(f"Warning: Tesseract path '{tesseract_path}' is invalid.")
-                pytesseract.pytesseract.tesseract_cmd = 'C:/Program Files/Tesseract-OCR/Tesseract.exe'  # Default fallback
 
-    def perform_ocr(self, image, conf_threshold:int=60):
+        Args:
+            tesseract_path (str): Path to the tesseract executable (also used to locate libtesseract and tessdata).
+            backend (str): "auto", "capi" (persistent in-process engine) or "pytesseract" (one process per call).
+            lang (str): Tesseract language(s) to load.
+            engine: An already created engine to share (see tesseract_engine.create_engine).
+            preprocessing (str): Full-page preprocessing: "adaptive" (rescale to the optimal text height and
+                                 pick the binarization method, see preprocess.py), "otsu" (global Otsu
+                                 at native resolution) or a fixed method ("adaptive_gaussian", "sauvola").
+            psm (int): Tesseract page segmentation mode for full-page OCR.
+            scale (float | None): Fixed rescale factor for full-page OCR; None measures the text height
+                                  and picks one (native resolution for "otsu").
+            variables (dict | None): Tesseract variables (e.g. tessedit_char_whitelist) for every OCR call.
+                                     They are passed with each call, so processors sharing an engine
+                                     do not see each other's settings.
         """
-        Perform OCR on the given image and annotate it with bounding boxes and recognized text.
-        
+        if preprocessing not in ("adaptive",) + METHODS:
+            raise ValueError(f"Invalid preprocessing: {preprocessing}")
+
+        if engine is None and tesseract_path and not os.path.exists(tesseract_path):
+            print(f"Warning: Tesseract path '{tesseract_path}' is invalid.")
+            tesseract_path = DEFAULT_TESSERACT_PATH if os.path.exists(DEFAULT_TESSERACT_PATH) else None  # Default fallback
+
+        # The engine is created once and kept loaded for every OCR call of this processor
+        self.engine = engine or create_engine(backend, tesseract_path=tesseract_path, lang=lang)
+        # Extra engines for parallel line OCR (see iter_lines) are created on demand with the same settings
+        self._engine_args = None if engine else {
+            'backend': "capi" if isinstance(self.engine, TesseractEngine) else "pytesseract",
+            'tesseract_path': tesseract_path,
+            'lang': lang,
+        }
+        self._line_engines = queue.Queue()
+        self._line_engines.put(self.engine)
+        self._document_pool = None
+        self._document_workers = 0
+        self.preprocessing = preprocessing
+        self.psm = psm
+        self.scale = scale
+        self.variables = dict(variables or {})
+        self.preprocessor = Preprocessor()
+        self.last_region_stats = None
+        self.last_preprocess_stats = None
+        self._last_image = None
+        self._last_results = []
+        self._annotated_image = None
+
+    def recognize(self, image, conf_threshold:int=60, text_regions:bool=False):
+        """
+        Perform OCR on an in-memory image. This is the main entry point: nothing is written
+        to disk and the image is not modified. The annotated image is only drawn if someone
+        asks for it (see annotated_image).
+
         Args:
-            image_path (str): Path to the image file.
+            image (np.ndarray): BGR image, e.g. straight from the camera.
             conf_threshold (int): Minimum confidence level to consider text valid.
+            text_regions (bool): Locate text regions first and only OCR those crops
+                                 (faster on cluttered camera frames, see text_regions.py).
 
         Returns:
-            str: JSON string containing recognized text and bounding box coordinates.
+            list: Recognized words, each {'text': str, 'conf': float, 'bbox': {'x', 'y', 'width', 'height'}}.
         """
+        if image is None:
+            raise ValueError("No image to perform OCR on.")
 
         # Convert the image to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # Apply thresholding, uncomment therholding method to use
-        # _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY) # Simple Threholding
-        # thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2) # Gaussian adaptive thresholding
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU) # Otsu's threholding
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
 
         # Perform OCR
         try:
-            data = pytesseract.image_to_data(thresh, output_type=pytesseract.Output.DICT)
+            if text_regions:
+                data = self._ocr_text_regions(gray)
+            elif self.preprocessing == "otsu" and self.scale is None:
+                _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU) # Otsu's threholding
+                data = self.engine.image_to_data(thresh, psm=self.psm, variables=self.variables)
+                self.last_region_stats = None
+            else:
+                data = self._ocr_adaptive(gray, conf_threshold)
+                self.last_region_stats = None
         except Exception as e:
             raise RuntimeError(f"Error occurred during OCR processing: {e}")
 
@@ -53,89 +156,389 @@ class OCRProcessor:
                 # Store the text and its bounding box
                 results.append({
                     'text': text,
+                    'conf': round(float(data['conf'][i]), 1),
                     'bbox': {'x': x, 'y': y, 'width': w, 'height': h}
                 })
 
-                # Annotate the image
-                cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(image, text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-        # Save the annotated image for later use
-        self.annotated_image = image
+        # Keep what is needed to draw the annotated image later, on demand
+        self._last_image = image
+        self._last_results = results
+        self._annotated_image = None
 
-        # Return results as a JSON string
-        return json.dumps(results, indent=4)
+        return results
 
-    def ocr_on_image(self, image_path, conf_threshold:int=60):
+    def perform_ocr(self, image, conf_threshold:int=60, text_regions:bool=False):
         """
-        Perform OCR on the given image and annotate it with bounding boxes and recognized text.
+        Perform OCR on the given image.
         
         Args:
-            image_path (str): Path to the image file.
+            image (np.ndarray): BGR image.
             conf_threshold (int): Minimum confidence level to consider text valid.
+            text_regions (bool): Only OCR detected text regions (see recognize).
 
         Returns:
             str: JSON string containing recognized text and bounding box coordinates.
         """
-        # Check if image exists
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"The image file '{image_path}' does not exist.")
+        return json.dumps(self.recognize(image, conf_threshold, text_regions), indent=4)
 
-        # Load the image
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to read the image '{image_path}'. Ensure it's a valid image file.")
+    def _ocr_adaptive(self, gray, conf_threshold):
+        """
+        Full-page OCR with adaptive preprocessing: the page is rescaled to the optimal text
+        height (or self.scale) and binarized with the most promising method; while the mean
+        word confidence stays below the preprocessor's accept_confidence the next method is
+        tried, and the attempt with the most confident words wins. A fixed preprocessing
+        method is used on its own. Word boxes are mapped back to the
+        original resolution. Details of the last call are kept in self.last_preprocess_stats.
+        """
+        start = time.perf_counter()
+        scaled, scale, text_height, methods, stats = self.preprocessor.prepare(gray, self.scale)
+        if self.preprocessing != "adaptive":
+            methods = [self.preprocessing]
+
+        attempts, best = [], None
+        for method in methods:
+            data = self.engine.image_to_data(binarize(scaled, method, text_height), psm=self.psm,
+                                             variables=self.variables)
+            confs = [float(c) for c, t in zip(data['conf'], data['text']) if t.strip() and float(c) >= 0]
+            mean_conf = sum(confs) / len(confs) if confs else 0.0
+            score = sum(c for c in confs if c > conf_threshold)
+            attempts.append({'method': method, 'mean_conf': round(mean_conf, 1), 'words': len(confs)})
+            if best is None or score > best[0]:
+                best = (score, method, data)
+            if confs and mean_conf >= self.preprocessor.accept_confidence:
+                break
+
+        _, method, data = best
+        self.preprocessor.record_win(method)
+        if scale != 1.0:
+            for column in ('left', 'top', 'width', 'height'):
+                data[column] = [int(round(v / scale)) for v in data[column]]
+
+        self.last_preprocess_stats = {
+            'method': method,
+            'scale': round(scale, 3),
+            'text_height': stats['text_height'],
+            'unevenness': round(stats['unevenness'], 3),
+            'contrast': round(stats['contrast'], 3),
+            'attempts': attempts,
+            'total_seconds': time.perf_counter() - start,
+        }
+        return data
+
+    def _ocr_text_regions(self, gray):
+        """
+        OCR only the detected text regions, each binarized with its own Otsu threshold.
+        Word boxes are shifted back to page coordinates and block numbers kept unique,
+        so the result has the same layout as a full-page image_to_data call.
+        Statistics of the last call are kept in self.last_region_stats.
+        """
+        start = time.perf_counter()
+        regions = find_text_regions(gray)
+        detect_time = time.perf_counter() - start
+
+        data = {column: [] for column in TSV_COLUMNS}
+        block_offset = 0
+        for x, y, w, h in regions:
+            _, thresh = cv2.threshold(gray[y:y + h, x:x + w], 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            region_data = self.engine.image_to_data(thresh, psm=6, variables=self.variables)  # psm 6: a single uniform block of text
+            offsets = {'left': x, 'top': y}
+            for column in TSV_COLUMNS:
+                if column in offsets:
+                    data[column].extend(v + offsets[column] for v in region_data[column])
+                elif column == 'block_num':
+                    data[column].extend(v + block_offset if v else 0 for v in region_data[column])
+                else:
+                    data[column].extend(region_data[column])
+            block_offset = max(data['block_num'], default=0)
+
+        self.last_region_stats = {
+            'regions': len(regions),
+            'pixels_skipped': 1.0 - region_coverage(gray.shape, regions),
+            'detect_seconds': detect_time,
+            'total_seconds': time.perf_counter() - start,
+        }
+        return data
+
+    def iter_lines(self, image, conf_threshold:int=60, workers:int=1, psm:int|None=None):
+        """
+        Incremental OCR: the page is split into text lines (see text_regions.find_text_lines)
+        and each line is yielded, in reading order, as soon as it has been recognized, so
+        the first line can be spoken while the rest of the page is still being processed.
 
-        # Convert the image to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        Lines are binarized with the processor's preprocessing. "adaptive" plans once per
+        page (see Preprocessor.prepare) and reads every line with the most promising
+        method, without retries, so the first line is not held up.
 
-        # Apply thresholding, uncomment therholding method to use
-        # _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY) # Simple Threholding
-        # thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2) # Gaussian adaptive thresholding
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU) # Otsu's threholding
+        Args:
+            image (np.ndarray): BGR image.
+            conf_threshold (int): Minimum confidence level to consider text valid.
+            workers (int): Lines recognized in parallel, each on its own engine
+                           (ignored when the processor was given a shared engine).
+            psm (int | None): Page segmentation mode for every line; None reads a line with
+                              psm 7 and touching lines the detector could not separate with psm 6.
+
+        Yields:
+            dict: {'index': int, 'text': str, 'words': list, 'bbox': {'x', 'y', 'width', 'height'}}
+                  for every line that contains recognized text. 'words' has the recognize() layout.
+        """
+        if image is None:
+            raise ValueError("No image to perform OCR on.")
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        lines = find_text_lines(gray)
+        if not lines:
+            page = None
+        elif self.preprocessing == "otsu" and self.scale is None:
+            page = (gray, 1.0, 0, "otsu")  # Each line with its own Otsu threshold, at native resolution
+        else:
+            scaled, scale, text_height, methods, _ = self.preprocessor.prepare(gray, self.scale)
+            page = (scaled, scale, text_height, methods[0] if self.preprocessing == "adaptive" else self.preprocessing)
+        # Boxes much taller than a typical line are touching lines the detector could not
+        # separate; those are read as a block instead of a single line
+        block_height = 1.8 * float(np.median([h for _, _, _, h in lines])) if lines else 0
+        workers = max(1, min(workers, len(lines))) if self._engine_args else 1
+
+        all_words = []
+        if workers == 1:
+            results = (self._ocr_line(page, box, block_height, conf_threshold, psm, self.engine) for box in lines)
+            executor = None
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="OCRLine")
+            futures = [executor.submit(self._ocr_line_pooled, page, box, block_height, conf_threshold, psm) for box in lines]
+            results = (future.result() for future in futures)  # Results are released in reading order
 
-        # Perform OCR
         try:
-            data = pytesseract.image_to_data(thresh, output_type=pytesseract.Output.DICT)
-        except Exception as e:
-            raise RuntimeError(f"Error occurred during OCR processing: {e}")
+            index = 0
+            for (x, y, w, h), words in zip(lines, results):
+                if not words:
+                    continue
+                all_words.extend(words)
+                yield {
+                    'index': index,
+                    'text': ' '.join(word['text'] for word in words),
+                    'words': words,
+                    'bbox': {'x': x, 'y': y, 'width': w, 'height': h},
+                }
+                index += 1
+        finally:
+            if executor:
+                # The caller may stop early (e.g. the user cancelled reading); skip the remaining lines
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+        self._last_image = image
+        self._last_results = all_words
+        self._annotated_image = None
+
+    def read_aloud(self, image, speak, conf_threshold:int=60, workers:int=2, psm:int|None=None, cancelled=None):
+        """
+        Speak the text of an image line by line as it is recognized (see iter_lines).
 
-        results = []
+        Args:
+            image (np.ndarray): BGR image.
+            speak (callable): Called with the text of each line, e.g. InputManager.speak.
+            conf_threshold (int): Minimum confidence level to consider text valid.
+            workers (int): Lines recognized in parallel.
+            psm (int | None): Page segmentation mode for every line (see iter_lines).
+            cancelled (callable | None): Checked before each line; once it returns True the
+                                         remaining lines are neither recognized nor spoken.
 
-        # Process detected text
-        for i in range(len(data['text'])):
-            text = data['text'][i].strip()  # Remove leading and trailing spaces
-            if int(data['conf'][i]) > conf_threshold and text:  # Ignore empty or low-confidence text
-                x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+        Returns:
+            list: The lines that were spoken.
+        """
+        lines = []
+        recognized = self.iter_lines(image, conf_threshold, workers, psm)
+        try:
+            for line in recognized:
+                if cancelled is not None and cancelled():
+                    break
+                speak(line['text'])
+                lines.append(line)
+        finally:
+            recognized.close()  # Skips the lines still being recognized
+        return lines
+
+    def _ocr_line(self, page, box, block_height, conf_threshold, psm, engine):
+        """
+        OCR one line crop. Returns its words in page coordinates.
 
-                # Store the text and its bounding box
-                results.append({
+        Args:
+            page (tuple): (prepared grayscale page, its scale, text height after scaling, binarization method),
+                          planned once per page by iter_lines.
+            box (tuple): Line box (x, y, w, h) in original page coordinates.
+        """
+        prepared, scale, text_height, method = page
+        x, y, w, h = box
+        crop = prepared[int(y * scale):int((y + h) * scale), int(x * scale):int((x + w) * scale)]
+        if method == "otsu":
+            _, thresh = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        else:
+            thresh = binarize(crop, method, text_height)
+        if psm is None:
+            psm = 6 if h > block_height else 7  # psm 7: a single text line, psm 6: a uniform block of text
+        data = engine.image_to_data(thresh, psm=psm, variables=self.variables)
+        words = []
+        for i in range(len(data['text'])):
+            text = data['text'][i].strip()
+            if int(data['conf'][i]) > conf_threshold and text:
+                words.append({
                     'text': text,
-                    'bbox': {'x': x, 'y': y, 'width': w, 'height': h}
+                    'conf': round(float(data['conf'][i]), 1),
+                    'bbox': {'x': int(round(data['left'][i] / scale)) + x, 'y': int(round(data['top'][i] / scale)) + y,
+                             'width': int(round(data['width'][i] / scale)), 'height': int(round(data['height'][i] / scale))}
                 })
+        return words
+
+    def _ocr_line_pooled(self, page, box, block_height, conf_threshold, psm):
+        """_ocr_line on an engine borrowed from the line engine pool (one engine per worker thread)."""
+        try:
+            engine = self._line_engines.get_nowait()
+        except queue.Empty:
+            engine = create_engine(**self._engine_args)
+        try:
+            return self._ocr_line(page, box, block_height, conf_threshold, psm, engine)
+        finally:
+            self._line_engines.put(engine)
+
+    def recognize_document(self, image, conf_threshold:int=60, workers:int|None=None):
+        """
+        Document mode for high-resolution page captures: the page is split into overlapping
+        horizontal bands cut at gaps between text lines (see text_regions.split_into_bands),
+        the bands are OCR'd in parallel on a pool of worker processes, and the words are
+        stitched back into page coordinates with duplicates from the overlaps removed.
+
+        The pool is started on the first call and kept for later ones (see close()).
+
+        Args:
+            image (np.ndarray): BGR image.
+            conf_threshold (int): Minimum confidence level to consider text valid.
+            workers (int | None): Worker processes (default: one per core). With a single
+                                  worker, or a shared engine, this is a plain recognize() call.
+
+        Returns:
+            list: Recognized words, as returned by recognize().
+        """
+        if image is None:
+            raise ValueError("No image to perform OCR on.")
+
+        workers = workers or os.cpu_count() or 1
+        if not self._engine_args:
+            workers = 1
+        if workers == 1:
+            return self.recognize(image, conf_threshold)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        bands = split_into_bands(gray, workers)
+        if len(bands) == 1:
+            return self.recognize(image, conf_threshold)
+
+        crops = [image[top:bottom] for top, bottom, _, _ in bands]
+        pool = self._get_document_pool(workers)
+        band_words = list(pool.map(_ocr_band, crops, [conf_threshold] * len(crops)))
+
+        results = []
+        for (top, _, own_top, own_bottom), words in zip(bands, band_words):
+            for word in words:
+                word['bbox']['y'] += top
+                # Each word is kept by the band that owns the row of its center; the
+                # overlap only exists so lines near a cut are complete in that band
+                center = word['bbox']['y'] + word['bbox']['height'] / 2
+                if not own_top <= center < own_bottom:
+                    continue
+                duplicate = next((r for r in results if box_overlap(r['bbox'], word['bbox']) > 0.5), None)
+                if duplicate is None:
+                    results.append(word)
+                elif word['conf'] > duplicate['conf']:
+                    results[results.index(duplicate)] = word
+
+        self._last_image = image
+        self._last_results = results
+        self._annotated_image = None
+        return results
+
+    def _get_document_pool(self, workers):
+        if self._document_pool is None or self._document_workers != workers:
+            self._shutdown_document_pool()
+            settings = {'preprocessing': self.preprocessing, 'psm': self.psm, 'scale': self.scale, 'variables': self.variables}
+            self._document_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_document_worker, initargs=(self._engine_args, settings))
+            self._document_workers = workers
+        return self._document_pool
+
+    def _shutdown_document_pool(self):
+        if self._document_pool is not None:
+            self._document_pool.shutdown(wait=True)  # recognize_document waits for its tiles, so none are queued
+            self._document_pool = None
+
+    def close(self):
+        """
+        Shut down the document worker processes, if any were started, and release the
+        engines this processor created (the main one and the pooled line engines).
+        An engine passed to the constructor belongs to the caller and is left open.
+        """
+        self._shutdown_document_pool()
+        while True:
+            try:
+                engine = self._line_engines.get_nowait()
+            except queue.Empty:
+                break
+            if self._engine_args:
+                engine.close()
+
+    def ocr_on_image(self, image_path, conf_threshold:int=60, text_regions:bool=False):
+        """
+        Perform OCR on an image file (or an image already in memory).
+        
+        Args:
+            image_path (str | np.ndarray): Path to the image file, or a BGR image.
+            conf_threshold (int): Minimum confidence level to consider text valid.
+            text_regions (bool): Only OCR detected text regions (see recognize).
+
+        Returns:
+            str: JSON string containing recognized text and bounding box coordinates.
+        """
+        if not isinstance(image_path, str):
+            return self.perform_ocr(image_path, conf_threshold, text_regions)
 
-                # Annotate the image
-                cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(image, text, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+        # Check if image exists
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"The image file '{image_path}' does not exist.")
 
-        # Save the annotated image for later use
-        self.annotated_image = image
+        # Load the image
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Failed to read the image '{image_path}'. Ensure it's a valid image file.")
+
+        return self.perform_ocr(image, conf_threshold, text_regions)
 
-        # Return results as a JSON string
-        return json.dumps(results, indent=4)
+    @property
+    def annotated_image(self):
+        """
+        The last OCR'd image with bounding boxes and recognized text, drawn on first access.
+        None if no OCR has been performed yet.
+        """
+        if self._annotated_image is None and self._last_image is not None:
+            self._annotated_image = draw_annotations(self._last_image, self._last_results)
+        return self._annotated_image
 
-    def display_annotated_image(self, window_name: str = "OCR Results"):
+    def display_annotated_image(self, window_name: str = "OCR Results", wait: bool = True):
         """
         Display the annotated image with bounding boxes and text.
 
         Args:
             window_name (str): Name of the display window.
+            wait (bool): Block until a key is pressed. For non-blocking display from an
+                         action handler use annotation_output.AnnotationOutput instead.
         """
-        if hasattr(self, 'annotated_image'):
+        if self.annotated_image is not None:
             cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
             cv2.imshow(window_name, self.annotated_image)
-            cv2.waitKey(0)
-            cv2.destroyAllWindows()
+            if wait:
+                cv2.waitKey(0)
+                cv2.destroyAllWindows()
+            else:
+                cv2.waitKey(1)
         else:
             print("No annotated image available. Perform OCR first.")
 
@@ -146,7 +549,7 @@ class OCRProcessor:
         Args:
             output_path (str): Path to save the annotated image.
         """
-        if hasattr(self, 'annotated_image'):
+        if self.annotated_image is not None:
             cv2.imwrite(output_path, self.annotated_image)
             print(f"Annotated image saved to {output_path}")
         else:
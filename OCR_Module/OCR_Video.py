@@ -1,80 +1,311 @@
-import threading
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import collections
+import concurrent.futures
+import json
+import multiprocessing
 import queue
+import threading
 import time
 import cv2
-import OCR_Processor  # Your OCR processor class
+from OCR_Module.OCR_Processor import OCRProcessor, draw_annotations
+from OCR_Module.text_tracker import TextTracker
+from Utils.latency_stats import LatencyStats
+
+DEFAULT_TESSERACT_PATH = 'C:/Program Files/Tesseract-OCR/Tesseract.exe'
 
-def ocr_worker(frame_queue, ocr_processor, results_queue):
+
+class DropOldestQueue:
+    """
+    Bounded FIFO queue that never blocks producers: when it is full, the oldest item
+    is discarded to make room for the new one. Consumers block in get() until an item
+    arrives, so there is no polling.
     """
-    Worker function to process frames for OCR.
+
+    def __init__(self, maxsize: int):
+        self._items = collections.deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Add an item, dropping the oldest one if the queue is full.
+
+        Returns:
+            The dropped item, or None.
+        """
+        with self._cond:
+            dropped = None
+            if len(self._items) >= self._maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+            return dropped
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        """
+        Remove and return the oldest item.
+
+        Raises:
+            queue.Empty: If no item is available (non-blocking, timed out, or closed and empty).
+        """
+        with self._cond:
+            if block and not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                raise queue.Empty
+            if not self._items:
+                raise queue.Empty
+            return self._items.popleft()
+
+    def close(self):
+        """Wake up all blocked consumers; get() raises queue.Empty once the queue is drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+# One OCR processor per worker process, created by _init_worker
+_worker_ocr = None
+
+
+def _init_worker(tesseract_path, text_regions):
+    global _worker_ocr
+    cv2.setNumThreads(1)
+    _worker_ocr = OCRProcessor(tesseract_path)
+    _worker_ocr.text_regions = text_regions
+
+
+def _ping():
+    return os.getpid()
+
+
+def _ocr_frame(frame):
+    """Run OCR in a worker process. Returns (results, error, ocr_seconds)."""
+    start = time.perf_counter()
+    try:
+        results = _worker_ocr.recognize(frame, text_regions=_worker_ocr.text_regions)
+        return results, None, time.perf_counter() - start
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start
+
+
+class OCRVideoPipeline:
     """
-    while True:
-        # Get a frame from the queue
-        if not frame_queue.empty():
-            frame = frame_queue.get()
+    Video OCR on a pool of worker processes.
 
-            # Perform OCR on the frame
+    Frames are submitted without blocking. At most `max_pending` frames wait for a free
+    worker; when more arrive the oldest waiting frame is dropped, so workers always get
+    the freshest frame. Results are delivered in frame order through a bounded
+    drop-oldest queue, with per-stage latency statistics (see metrics()).
+    """
+
+    STAGES = ('queue_wait', 'ocr', 'transfer', 'reorder', 'total')
+
+    def __init__(self, workers: int = 2, max_pending: int = 2, max_results: int = 8,
+                 tesseract_path: str = DEFAULT_TESSERACT_PATH, text_regions: bool = False):
+        """
+        Args:
+            workers (int): Number of OCR worker processes.
+            max_pending (int): Frames allowed to wait for a worker before the oldest is dropped.
+            max_results (int): Finished results kept for the consumer before the oldest is dropped.
+            tesseract_path (str): Path to the Tesseract executable.
+            text_regions (bool): Only OCR detected text regions (see OCRProcessor.perform_ocr).
+        """
+        self.workers = workers
+        self._pending = DropOldestQueue(max_pending)
+        self._results = DropOldestQueue(max_results)
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._order = collections.deque()  # Sequence numbers in dispatch order
+        self._finished = {}
+        self._next_seq = 0
+        self._stats = {stage: LatencyStats() for stage in self.STAGES}
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(tesseract_path, text_regions))
+        self._running = False
+        self._dispatcher = None
+
+    def start(self):
+        """Start the worker processes (waiting until they have loaded Tesseract) and the dispatcher."""
+        warm_up = [self._executor.submit(_ping) for _ in range(self.workers)]
+        concurrent.futures.wait(warm_up)
+        self._running = True
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True, name="OCRDispatcher")
+        self._dispatcher.start()
+
+    def submit(self, frame) -> int:
+        """
+        Queue a frame for OCR without blocking.
+
+        Returns:
+            int: The frame's sequence number.
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._pending.put({'seq': seq, 'frame': frame, 'submitted': time.perf_counter()})
+        return seq
+
+    def get_result(self, block: bool = True, timeout: float | None = None) -> dict:
+        """
+        Get the next result in frame order.
+
+        Returns:
+            dict: seq, frame, results (list of words, or None on error), error, timings (seconds per stage).
+
+        Raises:
+            queue.Empty: If no result is available.
+        """
+        return self._results.get(block, timeout)
+
+    def _dispatch_loop(self):
+        while self._running:
+            self._slots.acquire()  # Wait for a free worker before taking a frame
             try:
-                json_results = ocr_processor.perform_ocr(frame)
-                results_queue.put((frame, json_results))  # Store the annotated frame and results
-            except Exception as e:
-                print(f"OCR Error: {e}")
-                results_queue.put((frame, None))  # Store the original frame if OCR fails
+                item = self._pending.get()
+            except queue.Empty:
+                self._slots.release()
+                break  # Pipeline stopped
+            if not self._running:
+                self._slots.release()
+                break  # Frames still waiting at shutdown are discarded
 
-        # Small delay to avoid busy-waiting
-        time.sleep(0.1)
+            item['dispatched'] = time.perf_counter()
+            with self._lock:
+                self._order.append(item['seq'])
+            try:
+                future = self._executor.submit(_ocr_frame, item['frame'])
+            except RuntimeError:
+                self._slots.release()
+                break  # Executor shut down
+            future.add_done_callback(lambda f, item=item: self._on_done(item, f))
 
-def main():
-    # Initialize OCRProcessor
-    ocr = OCR_Processor.OCRProcessor('C:/Program Files/Tesseract-OCR/Tesseract.exe')
+    def _on_done(self, item, future):
+        self._slots.release()
+        item['completed'] = time.perf_counter()
+        try:
+            item['results'], item['error'], item['ocr_seconds'] = future.result()
+        except Exception as e:  # Worker crashed or pool shut down
+            item['results'], item['error'], item['ocr_seconds'] = None, str(e), 0.0
+
+        with self._lock:
+            self._finished[item['seq']] = item
+            # Release results strictly in dispatch order
+            while self._order and self._order[0] in self._finished:
+                self._emit(self._finished.pop(self._order.popleft()))
+
+    def _emit(self, item):
+        now = time.perf_counter()
+        timings = {
+            'queue_wait': item['dispatched'] - item['submitted'],
+            'ocr': item['ocr_seconds'],
+            'transfer': max(item['completed'] - item['dispatched'] - item['ocr_seconds'], 0.0),
+            'reorder': now - item['completed'],
+            'total': now - item['submitted'],
+        }
+        for stage, seconds in timings.items():
+            self._stats[stage].add(seconds)
+        self._results.put({
+            'seq': item['seq'],
+            'frame': item['frame'],
+            'results': item['results'],
+            'error': item['error'],
+            'timings': timings,
+        })
+
+    def metrics(self) -> dict:
+        """Per-stage latency statistics and drop counters."""
+        return {
+            'stages': {stage: stats.summary() for stage, stats in self._stats.items()},
+            'submitted': self._next_seq,
+            'dropped_frames': self._pending.dropped,
+            'dropped_results': self._results.dropped,
+            'pending': len(self._pending),
+        }
+
+    def stop(self):
+        """Stop dispatching, wait for in-flight frames and shut the workers down."""
+        self._running = False
+        self._pending.close()
+        if self._dispatcher:
+            self._dispatcher.join(timeout=5)
+        self._executor.shutdown(wait=True)
+        self._results.close()
 
+
+def main():
     # Initialize video capture
     cap = cv2.VideoCapture("http://192.168.100.7:8080/video")
     if not cap.isOpened():
         print("Error opening video stream or file")
         return
 
-    # Create thread-safe queues for frames and results
-    frame_queue = queue.Queue(maxsize=10)  # Limit queue size to avoid memory issues
-    results_queue = queue.Queue()
-
-    # Start the OCR worker thread
-    ocr_thread = threading.Thread(target=ocr_worker, args=(frame_queue, ocr, results_queue), daemon=True)
-    ocr_thread.start()
+    # OCR workers run in separate processes so Tesseract can use more than one core
+    # Region OCR means text masked out by the tracker costs (almost) nothing
+    pipeline = OCRVideoPipeline(workers=max(1, (os.cpu_count() or 2) - 1), max_pending=2, text_regions=True)
+    pipeline.start()
 
     frame_counter = 0
     ocr_frequency = 5  # Perform OCR every 5 frames
+    # Words are followed across frames; only new or changed text is reported and
+    # text that is stable on a steady camera is masked out of later OCR frames
+    tracker = TextTracker()
+    skipped_boxes = {}
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
 
-        # Add frames to the OCR queue at the specified frequency
-        if frame_counter % ocr_frequency == 0:
-            if not frame_queue.full():  # Avoid overloading the queue
-                frame_queue.put(frame)
+            # Add frames to the OCR pipeline at the specified frequency; stale frames are dropped
+            if frame_counter % ocr_frequency == 0:
+                ocr_frame, skipped = tracker.prepare_frame(frame)
+                if ocr_frame is not None:
+                    skipped_boxes[pipeline.submit(ocr_frame)] = skipped
 
-        # Check for OCR results
-        if not results_queue.empty():
-            annotated_frame, json_results = results_queue.get()
-            if json_results:
-                print("OCR Results:", json_results)
-                frame = annotated_frame  # Display the annotated frame
-
-        # Display the frame
-        cv2.imshow('Frame', frame)
+            # Check for OCR results without blocking the display loop
+            try:
+                result = pipeline.get_result(block=False)
+                skipped = skipped_boxes.pop(result['seq'], [])
+                for seq in [s for s in skipped_boxes if s < result['seq']]:
+                    del skipped_boxes[seq]  # Frames dropped by the pipeline
+                if result['error']:
+                    print(f"OCR Error: {result['error']}")
+                else:
+                    events = tracker.update(result['results'], result['seq'], skipped)
+                    if events:
+                        print(f"New text (frame {result['seq']}, {result['timings']['total'] * 1000:.0f} ms):",
+                              json.dumps(events, indent=4))
+            except queue.Empty:
+                pass
 
-        # Increment frame counter
-        frame_counter += 1
+            # Display the live frame with the tracked words drawn on it
+            tracked_words = tracker.words()
+            cv2.imshow('Frame', draw_annotations(frame, tracked_words) if tracked_words else frame)
 
-        # Press 'q' to exit
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            # Increment frame counter
+            frame_counter += 1
 
-    # Release resources
-    cap.release()
-    cv2.destroyAllWindows()
+            # Press 'q' to exit
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        # Release resources
+        pipeline.stop()
+        print("OCR pipeline metrics:", json.dumps(pipeline.metrics(), indent=4))
+        print("Text tracker metrics:", json.dumps(tracker.metrics(), indent=4))
+        cap.release()
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
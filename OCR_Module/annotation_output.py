@@ -0,0 +1,101 @@
+from __future__ import annotations
+import threading
+import queue
+import cv2
+from OCR_Module.OCR_Processor import draw_annotations
+
+
+class AnnotationOutput:
+    """
+    Optional, non-blocking side channel for OCR annotations.
+    Drawing and JPEG encoding/saving happen on a background thread, so the OCR action
+    returns as soon as the text is recognized. Only the newest annotation is kept if the
+    thread falls behind.
+
+    OpenCV windows only work reliably from the main thread, so display is left to it:
+    call show() from the main loop to put the newest annotated image on screen.
+    """
+
+    def __init__(self, save_path: str | None = None, display: bool = False, window_name: str = "OCR Results"):
+        """
+        Args:
+            save_path (str | None): Where to save the annotated image (None to skip saving).
+            display (bool): Show the annotated image in a window.
+            window_name (str): Name of the display window.
+        """
+        self.save_path = save_path
+        self.display = display
+        self.window_name = window_name
+        self._queue = queue.Queue(maxsize=1)
+        self._lock = threading.Lock()
+        self._to_show = None  # Newest annotated image not yet displayed
+        self._window_open = False
+        self._thread = None
+        if save_path or display:
+            self._thread = threading.Thread(target=self._output_loop, daemon=True, name="AnnotationOutput")
+            self._thread.start()
+
+    def publish(self, image, results):
+        """
+        Hand an OCR'd image and its words to the background thread. Never blocks.
+
+        Args:
+            image (np.ndarray): The image that was OCR'd (it must not be modified afterwards).
+            results (list): Words as returned by OCRProcessor.recognize.
+        """
+        if self._thread is None:
+            return
+        with self._lock:
+            try:
+                self._queue.get_nowait()  # Replace an annotation that has not been handled yet
+            except queue.Empty:
+                pass
+            self._queue.put_nowait((image, results))
+
+    def _output_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            image, results = item
+            try:
+                annotated = draw_annotations(image, results)
+                if self.save_path:
+                    cv2.imwrite(self.save_path, annotated)
+                if self.display:
+                    with self._lock:
+                        self._to_show = annotated
+            except Exception as e:
+                print(f"Annotation output error: {e}")
+
+    def show(self, wait_ms: int = 1):
+        """
+        Display the newest annotated image and keep the window responsive. Call it
+        regularly from the main thread; it does nothing until there is something to show.
+        """
+        if not self.display:
+            return
+        with self._lock:
+            annotated, self._to_show = self._to_show, None
+        if annotated is not None:
+            cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+            cv2.imshow(self.window_name, annotated)
+            self._window_open = True
+        if self._window_open:
+            cv2.waitKey(wait_ms)
+
+    def stop(self):
+        """Stop the background thread and close the window (call it from the main thread)."""
+        if self._thread and self._thread.is_alive():
+            with self._lock:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(None)
+            self._thread.join(timeout=3)
+        self._thread = None
+        if self._window_open:
+            cv2.destroyWindow(self.window_name)
+            self._window_open = False
@@ -1,12 +1,19 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from typing import Callable
+import asyncio
 import keyboard
 import time
 import threading
 import logging
-import pyttsx3
 import winsound
 
 import queue # Import the queue module
+import concurrent.futures
+from Input_Manager.speech_backend import PersistentTTS
+from Input_Manager.speech_queue import SpeechFuture, cancel_speech
 
 # Set up logging
 logging.basicConfig(
@@ -57,18 +64,19 @@ class HapticFeedback:
 class SpeechEngine:
     """
     Robust Text-to-speech engine wrapper using pyttsx3 with a dedicated speech thread.
-    Creates a new engine instance for each utterance to prevent state issues.
-    Uses a queue to handle speech requests non-blockingly.
+    The speech thread keeps one engine alive for all utterances and replaces it if it
+    breaks (see PersistentTTS). Uses a queue to handle speech requests non-blockingly.
     """
 
     _stop_sentinel = object()
 
-    def __init__(self, rate: int = 150):
+    def __init__(self, rate: int = 150, startup_timeout: float = 10.0):
         """
         Initialize the speech engine with a dedicated thread.
 
         Args:
             rate (int): Speech rate in words per minute.
+            startup_timeout (float): Seconds to wait for the engine health check.
         """
         logger.debug("Initializing SpeechEngine...")
         
@@ -77,34 +85,46 @@ class SpeechEngine:
         logging.getLogger('comtypes.client').setLevel(logging.WARNING)
 
         self.rate = rate  # Store rate for later use
+        self.tts = PersistentTTS(rate)
+        self.health = None  # Startup health check report
         self._speech_queue = queue.Queue()
+        self._current = None                 # Future of the text being spoken
+        self._interrupt = threading.Event()  # Cuts the text being spoken off at the next word
+        self._lock = threading.Lock()
         self._speech_thread = None
-        self._initialize_thread()
+        self._initialize_thread(startup_timeout)
 
-    def _initialize_thread(self):
-        """Initialize and start the speech processing thread."""
+    def _initialize_thread(self, startup_timeout: float):
+        """Start the speech processing thread and wait for its engine health check."""
+        ready = threading.Event()
         try:
-            # Test engine initialization first
-            test_engine = pyttsx3.init()
-            test_engine.setProperty('rate', self.rate)
-            test_engine.stop()
-            
             self._speech_thread = threading.Thread(
                 target=self._speech_loop,
+                args=(ready,),
                 daemon=True,
                 name="SpeechEngineThread"
             )
             self._speech_thread.start()
-            logger.debug("Speech thread started successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize speech thread: {e}", exc_info=True)
             raise RuntimeError("Speech engine initialization failed") from e
 
-    def _speech_loop(self):
+        if not ready.wait(startup_timeout):
+            raise RuntimeError("Speech engine initialization timed out")
+        if not self.health['ok']:
+            logger.error(f"Speech engine health check failed: {self.health['error']}")
+            raise RuntimeError("Speech engine initialization failed")
+        logger.debug(f"Speech thread started successfully: {self.health}")
+
+    def _speech_loop(self, ready: threading.Event):
         """
         The main loop for the dedicated speech thread.
-        Creates a new engine instance for each utterance to ensure reliability.
+        Creates the engine (which must live on this thread), checks it and reuses it for every utterance.
         """
+        self.health = self.tts.health_check()
+        ready.set()
+        if not self.health['ok']:
+            return
         logger.debug("Speech processing loop started.")
         
         while True:
@@ -116,8 +136,20 @@ class SpeechEngine:
                     self._speech_queue.task_done()
                     break
                     
-                if isinstance(item, str) and item.strip():
-                    self._process_speech_item(item)
+                text, queued_at, future = item
+                # A future cancelled while it was queued is skipped
+                if future.set_running_or_notify_cancel():
+                    with self._lock:
+                        self._interrupt.clear()
+                        self._current = future
+                    try:
+                        future.set_result(self._process_speech_item(text, queued_at))
+                    except Exception as e:
+                        future.set_exception(e)
+                        raise
+                    finally:
+                        with self._lock:
+                            self._current = None
                     
                 self._speech_queue.task_done()
                 
@@ -125,61 +157,111 @@ class SpeechEngine:
                 logger.error(f"Unexpected error in speech loop: {e}", exc_info=True)
                 self._speech_queue.task_done()
                 time.sleep(0.1)  # Prevent tight error loop
+        self.tts.close()
 
-    def _process_speech_item(self, text: str):
+    def _process_speech_item(self, text: str, queued_at: float) -> bool:
         """
-        Process a single speech item by creating a new engine instance.
+        Speak a single item on the persistent engine.
         
         Args:
             text (str): Text to be spoken.
+            queued_at (float): time.perf_counter() when the text was queued.
+
+        Returns:
+            bool: True if the text was spoken to the end, False if it failed or was cut off.
         """
-        engine = None
-        try:
-            logger.debug(f"Processing speech item: '{text}'")
-            start_time = time.time()
-            
-            engine = pyttsx3.init()
-            engine.setProperty('rate', self.rate)
-            engine.say(text)
-            engine.runAndWait()
-            
+        logger.debug(f"Processing speech item: '{text}'")
+        start_time = time.time()
+        spoken = self.tts.speak(text, queued_at, self._interrupt)
+        if spoken:
             duration = time.time() - start_time
             logger.debug(f"Finished speaking in {duration:.2f}s: '{text}'")
-            
-        except Exception as e:
-            logger.error(f"Error during speech synthesis: {e}", exc_info=True)
-        finally:
-            if engine:
-                try:
-                    engine.stop()
-                except:
-                    pass
-
-    def speak(self, text: str):
+        return spoken
+
+    def speak(self, text: str) -> concurrent.futures.Future | None:
         """
         Queue text to be spoken by the dedicated speech thread.
         
         Args:
             text (str): Text to be spoken.
+
+        Returns:
+            Future | None: Resolves to True when the text has been spoken (False if the engine
+                           failed to say it or it was cut off), so callers can sequence haptics
+                           or camera capture after it with future.result(timeout).
+                           future.cancel() drops the text before it is spoken; cancel(future)
+                           also cuts it off while it is being spoken. None for empty text.
             
         Raises:
             RuntimeError: If the speech engine is not properly initialized.
         """
         if not isinstance(text, str) or not text.strip():
             logger.warning("Attempted to speak empty or non-string text")
-            return
+            return None
             
         if not self._speech_thread or not self._speech_thread.is_alive():
             logger.error("Speech thread not available")
             raise RuntimeError("Speech engine is not running")
             
         try:
-            self._speech_queue.put(text)
+            future = SpeechFuture(self)
+            self._speech_queue.put((text, time.perf_counter(), future))
             logger.debug(f"Queued speech text: '{text}'")
+            return future
         except Exception as e:
             logger.error(f"Failed to queue speech text: {e}", exc_info=True)
             raise RuntimeError("Failed to queue speech text") from e
 
+    async def speak_async(self, text: str) -> bool:
+        """
+        speak() for asyncio code: resolves once the text has been spoken. Cancelling the
+        awaiting task (e.g. through asyncio.wait_for) drops the text, or cuts it off if it
+        is being spoken.
+        """
+        future = self.speak(text)
+        if future is None:
+            return True
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel_speech(future)
+            raise
+
+    def interrupt_future(self, future) -> bool:
+        """Cut off the text being spoken if `future` belongs to it (see SpeechFuture.interrupt)."""
+        with self._lock:
+            if future is not self._current:
+                return False
+            self._interrupt.set()
+            return True
+
+    def cancel(self, future) -> bool:
+        """
+        Stop one speak() call: drop the text if it is still queued, or cut it off if it is
+        being spoken.
+
+        Returns:
+            bool: False if it had already been spoken (or dropped).
+        """
+        return cancel_speech(future)
+
+    def flush(self):
+        """Drop all queued speech and cut off the text being spoken."""
+        while True:
+            try:
+                item = self._speech_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._stop_sentinel:
+                self._speech_queue.put(item)  # Shutting down; the speech thread still has to see it
+                self._speech_queue.task_done()
+                break
+            item[2].cancel()
+            self._speech_queue.task_done()
+        with self._lock:
+            if self._current is not None:
+                self._interrupt.set()
+
     def stop(self):
         """Stop the speech engine and its dedicated thread."""
         if self._speech_thread and self._speech_thread.is_alive():
@@ -196,14 +278,22 @@ class SpeechEngine:
         self._speech_thread = None
         logger.info("SpeechEngine stopped.")
 
+    def metrics(self) -> dict:
+        """
+        Speech engine counters and timing percentiles, including time to first audio per
+        utterance (see PersistentTTS.metrics), and the number of queued items.
+        """
+        return dict(self.tts.metrics(), queued=self._speech_queue.qsize())
+
     def is_speaking(self) -> bool:
         """
-        Check if there are pending speech items in the queue.
+        Check if speech is playing or waiting in the queue.
         
         Returns:
-            bool: True if there are items in the queue, False otherwise.
+            bool: True if an item is being spoken or queued, False otherwise.
         """
-        return not self._speech_queue.empty()
+        with self._speech_queue.mutex:
+            return self._speech_queue.unfinished_tasks > 0
 
     def wait_until_done(self, timeout: float | None = None) -> bool:
         """
@@ -215,11 +305,9 @@ class SpeechEngine:
         Returns:
             bool: True if all items processed, False if timeout occurred.
         """
-        try:
-            self._speech_queue.join()
-            return True
-        except:
-            return False
+        finished = self._speech_queue.all_tasks_done
+        with finished:
+            return finished.wait_for(lambda: not self._speech_queue.unfinished_tasks, timeout)
 
 # ----------------------------------------
 
@@ -446,11 +534,26 @@ class InputManager:
         logger.info("Input manager started. Listening for key presses on A and B.")
         self.speak("System ready. Listening for input on keys A and B.")
     
-    def speak(self, text):
+    def speak(self, text) -> concurrent.futures.Future | None:
+        """Queue text to be spoken; returns its future (see SpeechEngine.speak), failed if it could not be queued."""
         try:
-            self.speech_engine.speak(text)
+            return self.speech_engine.speak(text)
         except Exception as e:
             logger.error(f"Error in speak method: {e}")
+            future = concurrent.futures.Future()
+            future.set_exception(e)
+            return future
+
+    async def speak_async(self, text) -> bool:
+        """Speak and wait without blocking the event loop (see SpeechEngine.speak_async)."""
+        return await self.speech_engine.speak_async(text)
+
+    def cancel_speech(self, future=None):
+        """Cut off one speak() call (see SpeechEngine.cancel), or with no future all queued and playing speech."""
+        if future is None:
+            self.speech_engine.flush()
+        else:
+            self.speech_engine.cancel(future)
     
     def stop(self):
         try:
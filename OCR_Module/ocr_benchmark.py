@@ -0,0 +1,260 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import datetime
+import glob
+import itertools
+import json
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from OCR_Module.OCR_Processor import OCRProcessor
+from OCR_Module.preprocess import METHODS
+from OCR_Module.tesseract_engine import create_engine
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sample_Images_Text")
+GROUND_TRUTH_SUFFIX = ".gt.txt"
+MODES = ("full", "regions", "lines")
+
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two sequences (strings or word lists)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        current = [i]
+        for j, hyp in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref != hyp)))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text:str) -> str:
+    """Collapse all whitespace (line breaks included) to single spaces."""
+    return " ".join(text.split())
+
+
+def error_counts(reference:str, hypothesis:str) -> dict:
+    """Character and word edit counts of an OCR result against its ground truth."""
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    return {
+        'char_errors': edit_distance(reference, hypothesis),
+        'chars': len(reference),
+        'word_errors': edit_distance(reference.split(), hypothesis.split()),
+        'words': len(reference.split()),
+    }
+
+
+def latency_summary(seconds) -> dict:
+    samples = np.array(seconds)
+    return {
+        'count': int(samples.size),
+        'mean_ms': round(float(samples.mean()) * 1000, 1),
+        'p50_ms': round(float(np.percentile(samples, 50)) * 1000, 1),
+        'p95_ms': round(float(np.percentile(samples, 95)) * 1000, 1),
+    }
+
+
+def load_dataset(paths):
+    """
+    Images and their ground truth. The ground truth of `name.png` is read from
+    `name.gt.txt` next to it; images without one are timed but not scored.
+
+    Returns:
+        list: (image path, ground truth text or None)
+    """
+    dataset = []
+    for path in paths:
+        if "annotated" in os.path.basename(path).lower() or path.endswith(".txt"):
+            continue
+        gt_path = os.path.splitext(path)[0] + GROUND_TRUTH_SUFFIX
+        truth = None
+        if os.path.exists(gt_path):
+            with open(gt_path, encoding="utf-8") as f:
+                truth = f.read()
+        dataset.append((path, truth))
+    return dataset
+
+
+def config_name(config:dict) -> str:
+    """Name of a configuration, from the settings its mode uses."""
+    parts = [config['mode']]
+    if config['preprocessing'] is not None:
+        parts.append(config['preprocessing'])
+    if config['psm'] is not None:
+        parts.append(f"psm{config['psm']}")
+    if config['mode'] != "regions":
+        parts.append("scale-" + ("auto" if config['scale'] is None else f"{config['scale']:g}"))
+    return "/".join(parts)
+
+
+def build_configs(modes, preprocessings, psms, scales) -> list:
+    """
+    The configurations to benchmark. Only the settings a mode uses are varied: line OCR
+    picks its own PSM per line, and region OCR its own PSM, scale and threshold per
+    region, so it runs once. Unused settings are None.
+    """
+    configs = []
+    for mode in modes:
+        if mode == "full":
+            combos = itertools.product(preprocessings, psms, scales)
+        elif mode == "lines":
+            combos = itertools.product(preprocessings, [None], scales)
+        else:
+            combos = [(None, None, None)]
+        for preprocessing, psm, scale in combos:
+            configs.append({'mode': mode, 'preprocessing': preprocessing, 'psm': psm, 'scale': scale})
+    return configs
+
+
+def run_config(ocr, image, mode:str) -> str:
+    """OCR an image in one mode and return the recognized text."""
+    if mode == "lines":
+        return "\n".join(line['text'] for line in ocr.iter_lines(image))
+    words = ocr.recognize(image, text_regions=(mode == "regions"))
+    return " ".join(word['text'] for word in words)
+
+
+def benchmark(engine, dataset, configs, repeats:int, warmup:int=1) -> list:
+    """
+    Run every configuration over the dataset.
+
+    Returns:
+        list: One result per configuration with aggregate CER/WER (total edits over total
+              ground-truth length), latency percentiles over all runs, and per-image details.
+    """
+    images = [(path, cv2.imread(path), truth) for path, truth in dataset]
+    images = [(path, image, truth) for path, image, truth in images if image is not None]
+
+    results = []
+    for config in configs:
+        ocr = OCRProcessor(engine=engine, preprocessing=config['preprocessing'] or "adaptive",
+                           psm=config['psm'] or 3, scale=config['scale'])
+        totals = {'char_errors': 0, 'chars': 0, 'word_errors': 0, 'words': 0}
+        latencies, per_image = [], []
+        for path, image, truth in images:
+            for _ in range(warmup):
+                run_config(ocr, image, config['mode'])
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                text = run_config(ocr, image, config['mode'])
+                times.append(time.perf_counter() - start)
+            latencies.extend(times)
+
+            entry = {'image': os.path.basename(path), 'p50_ms': round(float(np.median(times)) * 1000, 1), 'text': text}
+            if truth is not None:
+                counts = error_counts(truth, text)
+                for key in totals:
+                    totals[key] += counts[key]
+                entry['cer'] = round(counts['char_errors'] / max(counts['chars'], 1), 4)
+                entry['wer'] = round(counts['word_errors'] / max(counts['words'], 1), 4)
+            per_image.append(entry)
+
+        results.append({
+            'name': config_name(config),
+            **config,
+            'cer': round(totals['char_errors'] / totals['chars'], 4) if totals['chars'] else None,
+            'wer': round(totals['word_errors'] / totals['words'], 4) if totals['words'] else None,
+            'latency': latency_summary(latencies) if latencies else None,
+            'images': per_image,
+        })
+    return results
+
+
+def machine_info(engine) -> dict:
+    """Where the numbers were measured; only compare reports from the same machine."""
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'engine': type(engine).__name__,
+        'tesseract': getattr(engine, 'version', None),
+    }
+
+
+def print_table(results, baseline=None):
+    """Print one line per configuration, with the change against a baseline report if given."""
+    previous = {r['name']: r for r in baseline['results']} if baseline else {}
+
+    def fmt(value, old, digits):
+        if value is None:
+            return "n/a"
+        text = f"{value:.{digits}f}"
+        return text + (f" ({value - old:+.{digits}f})" if old is not None else "")
+
+    print(f"{'configuration':44} {'CER':>16} {'WER':>16} {'p50 ms':>16} {'p95 ms':>16}")
+    for r in results:
+        old = previous.get(r['name'], {})
+        latency = r['latency'] or {}
+        old_latency = old.get('latency') or {}
+        print(f"{r['name']:44} {fmt(r['cer'], old.get('cer'), 3):>16} {fmt(r['wer'], old.get('wer'), 3):>16} "
+              f"{fmt(latency.get('p50_ms'), old_latency.get('p50_ms'), 1):>16} "
+              f"{fmt(latency.get('p95_ms'), old_latency.get('p95_ms'), 1):>16}")
+
+
+def parse_list(value:str, convert=str):
+    return [convert(v) for v in value.split(",") if v]
+
+
+def parse_scale(value:str):
+    return None if value == "auto" else float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR accuracy (CER/WER) and latency benchmark over labeled images")
+    parser.add_argument("images", nargs="*", help="Images to test (default: the sample images). "
+                                                  "Ground truth is read from <image name>" + GROUND_TRUTH_SUFFIX)
+    parser.add_argument("--preprocessing", default="adaptive,otsu",
+                        help="Comma separated: adaptive, " + ", ".join(METHODS) + " (full and lines modes)")
+    parser.add_argument("--psm", default="3", help="Comma separated page segmentation modes (full mode only)")
+    parser.add_argument("--scale", default="auto", help="Comma separated scale factors, or auto (full and lines modes)")
+    parser.add_argument("--modes", default="full", help="Comma separated: " + ", ".join(MODES))
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per image and configuration")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--tesseract", default=None, help="Path to the tesseract executable")
+    args = parser.parse_args()
+
+    modes = parse_list(args.modes)
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"invalid mode: {mode}")
+
+    configs = build_configs(modes, parse_list(args.preprocessing), parse_list(args.psm, int),
+                            parse_list(args.scale, parse_scale))
+
+    paths = args.images or sorted(glob.glob(os.path.join(SAMPLE_DIR, "*")))
+    dataset = load_dataset(paths)
+    engine = create_engine(tesseract_path=args.tesseract)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec="seconds"),
+        'machine': machine_info(engine),
+        'repeats': args.repeats,
+        'images': [{'image': os.path.basename(path), 'labeled': truth is not None} for path, truth in dataset],
+        'results': benchmark(engine, dataset, configs, args.repeats),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get('machine', {}).get('hostname') != report['machine']['hostname']:
+            print("Warning: the baseline report was measured on a different machine; latencies are not comparable.")
+    print_table(report['results'], baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
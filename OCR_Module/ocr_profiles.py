@@ -0,0 +1,158 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import collections
+import threading
+import time
+import numpy as np
+from OCR_Module.OCR_Processor import DEFAULT_TESSERACT_PATH, OCRProcessor
+from Utils.latency_stats import LatencyStats
+
+# Named OCR settings per kind of target.
+#   psm:            Tesseract page segmentation mode (11 = sparse text, 7 = one line, 3 = full layout analysis)
+#   mode:           "full" (one full-page call), "regions" (only detected text regions) or "document"
+#                   (tiled over worker processes, see OCRProcessor.recognize_document)
+#   variables:      Tesseract variables, e.g. a character whitelist
+#   lang:           Tesseract language data to load
+#   preprocessing:  see OCRProcessor
+#   line_psm:       optional page segmentation mode for every line read by read_aloud(); without it
+#                   each line is read as one line (7), or as a block (6) when lines touch
+PROFILES = {
+    # Short text in a cluttered scene (street signs, door plates): no page layout analysis, and a
+    # single Sauvola pass, since outdoor lighting is rarely even and retries cost more than they find
+    'sign': {'psm': 11, 'mode': "full", 'preprocessing': "sauvola", 'lang': "eng", 'variables': {},
+             'conf_threshold': 60},
+    # One line of text filling most of the frame (a label, a button, a title)
+    'single_line': {'psm': 7, 'mode': "full", 'preprocessing': "adaptive", 'lang': "eng", 'variables': {},
+                    'conf_threshold': 60},
+    # A page of text
+    'document': {'psm': 3, 'mode': "document", 'preprocessing': "adaptive", 'lang': "eng", 'variables': {},
+                 'conf_threshold': 60},
+    # Prices, numbers and codes; the whitelist stops digits being read as look-alike letters.
+    # With a whitelist the LSTM engine reports a confidence of 0, so every word is kept.
+    'digits': {'psm': 7, 'mode': "full", 'preprocessing': "sauvola", 'lang': "eng",
+               'variables': {'tessedit_char_whitelist': "0123456789.,:-/$€£%"}, 'conf_threshold': -1},
+}
+
+
+class ProfileStats:
+    """Latency and word confidence statistics of one profile."""
+
+    def __init__(self, window:int=200):
+        self.latency = LatencyStats(window)
+        self._confidences = collections.deque(maxlen=window)
+        self.calls = 0
+        self.empty = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds:float, words:list):
+        self.latency.add(seconds)
+        with self._lock:
+            self.calls += 1
+            if words:
+                self._confidences.append(float(np.mean([word['conf'] for word in words])))
+            else:
+                self.empty += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            confidences = np.array(self._confidences)
+            summary = {'calls': self.calls, 'empty': self.empty}
+        summary['latency'] = self.latency.summary()
+        if confidences.size:
+            summary['mean_conf'] = round(float(confidences.mean()), 1)
+            summary['p05_conf'] = round(float(np.percentile(confidences, 5)), 1)
+        return summary
+
+
+class OCRProfiles:
+    """
+    OCR with named profiles (see PROFILES), selectable per action. Each profile gets its
+    own OCRProcessor, created on first use; profiles that use the same language share
+    one Tesseract engine. Latency and confidence are tracked per profile, separately for
+    recognize() and read_aloud() (see metrics()).
+    """
+
+    def __init__(self, tesseract_path:str=DEFAULT_TESSERACT_PATH, backend:str="auto", profiles:dict|None=None):
+        """
+        Args:
+            tesseract_path (str): Path to the tesseract executable.
+            backend (str): OCR backend (see OCRProcessor).
+            profiles (dict | None): Extra or overridden profiles, in the PROFILES format.
+        """
+        self.tesseract_path = tesseract_path
+        self.backend = backend
+        self.profiles = dict(PROFILES, **(profiles or {}))
+        self.stats = {name: ProfileStats() for name in self.profiles}
+        self.line_stats = {name: ProfileStats() for name in self.profiles}  # read_aloud() calls
+        self._processors = {}
+        self._engines = {}  # Language -> engine shared by the profiles using it
+        self._lock = threading.Lock()
+
+    def processor(self, name:str) -> OCRProcessor:
+        """The OCRProcessor configured for a profile (created on first use)."""
+        if name not in self.profiles:
+            raise ValueError(f"Unknown OCR profile: {name}")
+        with self._lock:
+            if name not in self._processors:
+                profile = self.profiles[name]
+                settings = {'preprocessing': profile['preprocessing'], 'psm': profile['psm'],
+                            'variables': profile['variables']}
+                if profile['mode'] == "document":
+                    # Document mode starts worker processes, which need to create engines of their own
+                    processor = OCRProcessor(self.tesseract_path, self.backend, profile['lang'], **settings)
+                else:
+                    engine = self._engines.get(profile['lang'])
+                    processor = OCRProcessor(self.tesseract_path, self.backend, profile['lang'], engine=engine, **settings)
+                    self._engines[profile['lang']] = processor.engine
+                self._processors[name] = processor
+            return self._processors[name]
+
+    def recognize(self, image, profile:str="sign") -> list:
+        """
+        OCR an image with a profile.
+
+        Returns:
+            list: Recognized words, as returned by OCRProcessor.recognize.
+        """
+        processor = self.processor(profile)
+        settings = self.profiles[profile]
+        start = time.perf_counter()
+        if settings['mode'] == "document":
+            words = processor.recognize_document(image, settings['conf_threshold'])
+        else:
+            words = processor.recognize(image, settings['conf_threshold'], text_regions=(settings['mode'] == "regions"))
+        self.stats[profile].add(time.perf_counter() - start, words)
+        return words
+
+    def read_aloud(self, image, speak, profile:str="document", workers:int=2, cancelled=None) -> list:
+        """
+        Speak the text of an image line by line as it is recognized (see OCRProcessor.read_aloud).
+        The profile's preprocessing and variables apply to every line. Its psm and mode do not,
+        since they describe the whole page: lines are read with the profile's line_psm if it
+        has one, otherwise OCRProcessor.iter_lines picks the mode per line.
+
+        Returns:
+            list: The lines that were spoken.
+        """
+        processor = self.processor(profile)
+        settings = self.profiles[profile]
+        start = time.perf_counter()
+        lines = processor.read_aloud(image, speak, settings['conf_threshold'], workers, psm=settings.get('line_psm'),
+                                     cancelled=cancelled)
+        self.line_stats[profile].add(time.perf_counter() - start, [word for line in lines for word in line['words']])
+        return lines
+
+    def metrics(self) -> dict:
+        """Per-profile call counts, empty results, latency percentiles and word confidence; read_aloud() calls as "<profile>/read_aloud"."""
+        metrics = {name: stats.summary() for name, stats in self.stats.items() if stats.calls}
+        metrics.update({f"{name}/read_aloud": stats.summary() for name, stats in self.line_stats.items() if stats.calls})
+        return metrics
+
+    def close(self):
+        with self._lock:
+            for processor in self._processors.values():
+                processor.close()
+            self._processors.clear()
+            self._engines.clear()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import collections
+import threading
+import cv2
+import numpy as np
+from OCR_Module.text_regions import detect_text_blobs
+
+# Tesseract reads best when capital letters are roughly 20-40 px tall. The blob detector
+# measures the full line height (ascenders to descenders), so the range is a little wider.
+MIN_TEXT_HEIGHT = 20
+MAX_TEXT_HEIGHT = 48
+
+METHODS = ("otsu", "adaptive_gaussian", "sauvola")
+
+
+def estimate_text_height(gray):
+    """
+    Median height in pixels of the text blobs in a grayscale image, or 0 if no text was found.
+    """
+    _, text_height = detect_text_blobs(gray, pad=0)
+    return text_height
+
+
+def binarize(gray, method:str, text_height:int=MIN_TEXT_HEIGHT):
+    """
+    Binarize a grayscale image to black text on white.
+
+    Args:
+        gray (np.ndarray): Grayscale image.
+        method (str): "otsu" (global), "adaptive_gaussian" or "sauvola" (both local).
+        text_height (int): Text height in pixels, used to size the local window.
+
+    Returns:
+        np.ndarray: Binary image.
+    """
+    # Local methods look at a window a few characters wide (always odd, at least 15 px)
+    block = max(15, int(text_height * 2) | 1)
+    if method == "otsu":
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    elif method == "adaptive_gaussian":
+        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+    elif method == "sauvola":
+        # T = m * (1 + k * (s / R - 1)) with local mean m and standard deviation s
+        image = gray.astype(np.float32)
+        mean = cv2.boxFilter(image, -1, (block, block))
+        sq_mean = cv2.boxFilter(image * image, -1, (block, block))
+        std = np.sqrt(np.maximum(sq_mean - mean * mean, 0))
+        threshold = mean * (1 + 0.2 * (std / 128.0 - 1))
+        thresh = np.where(image > threshold, 255, 0).astype(np.uint8)
+    else:
+        raise ValueError(f"Invalid binarization method: {method}")
+    return thresh
+
+
+def illumination_stats(gray):
+    """
+    Cheap image statistics used to choose a binarization method.
+
+    Returns:
+        dict: 'unevenness' (spread of the background brightness, 0..1), 'contrast'
+              (standard deviation of the image, 0..1) and 'dark_background' (light text on
+              a dark background, e.g. a dark-mode screen).
+    """
+    # A heavily blurred thumbnail approximates the background lighting
+    thumb = cv2.resize(gray, (64, 64), interpolation=cv2.INTER_AREA)
+    background = cv2.GaussianBlur(thumb, (0, 0), 8)
+    p5, p95 = np.percentile(background, (5, 95))
+    return {
+        'unevenness': float(p95 - p5) / 255.0,
+        'contrast': float(thumb.std()) / 255.0,
+        'dark_background': bool(np.median(thumb) < 110),
+    }
+
+
+class Preprocessor:
+    """
+    Adaptive preprocessing for full-page OCR.
+
+    The image is rescaled so its text height falls in the range Tesseract reads best (camera
+    frames are usually downscaled, which also makes Tesseract much faster), inverted if it
+    shows light text on a dark background, then binarized with the method the image
+    statistics suggest. OCRProcessor retries with the next method when
+    the result has low confidence; the method that won each call is counted in `wins`.
+    """
+
+    def __init__(self, min_height:int=MIN_TEXT_HEIGHT, max_height:int=MAX_TEXT_HEIGHT, min_scale:float=0.25, max_scale:float=2.0,
+                 uneven_threshold:float=0.2, low_contrast:float=0.12, accept_confidence:float=75.0):
+        """
+        Args:
+            min_height (int): Smaller text is upscaled to this height in pixels.
+            max_height (int): Larger text is downscaled to this height in pixels.
+            min_scale (float): Smallest scale factor (limits downscaling of huge text).
+            max_scale (float): Largest scale factor (limits upscaling of tiny text).
+            uneven_threshold (float): Background unevenness above which local methods are tried first.
+            low_contrast (float): Contrast below which adaptive Gaussian is tried before Sauvola.
+            accept_confidence (float): Mean word confidence at which no further method is tried.
+        """
+        self.min_height = min_height
+        self.max_height = max_height
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.uneven_threshold = uneven_threshold
+        self.low_contrast = low_contrast
+        self.accept_confidence = accept_confidence
+        self.wins = collections.Counter()
+        self._lock = threading.Lock()
+
+    def scale_for(self, text_height:int) -> float:
+        """Scale factor that brings `text_height` into the target range (1.0 if it already is, or no text was measured)."""
+        if not text_height or self.min_height <= text_height <= self.max_height:
+            return 1.0
+        target = self.min_height if text_height < self.min_height else self.max_height
+        return min(max(target / text_height, self.min_scale), self.max_scale)
+
+    def method_order(self, stats:dict) -> list:
+        """Binarization methods to try, most promising first."""
+        if stats['unevenness'] > self.uneven_threshold:
+            local = ["adaptive_gaussian", "sauvola"] if stats['contrast'] < self.low_contrast else ["sauvola", "adaptive_gaussian"]
+            return local + ["otsu"]
+        return ["otsu", "sauvola", "adaptive_gaussian"]
+
+    def prepare(self, gray, scale:float|None=None):
+        """
+        Rescale (and if needed invert) a grayscale image and plan the binarization methods.
+
+        Args:
+            gray (np.ndarray): Grayscale image.
+            scale (float | None): Fixed scale factor; None picks one from the measured text height.
+
+        Returns:
+            tuple: (prepared grayscale image, scale factor, text height after scaling, method order, stats dict)
+        """
+        text_height = estimate_text_height(gray)
+        if scale is None:
+            scale = self.scale_for(text_height)
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+        stats = illumination_stats(gray)
+        stats['text_height'] = text_height
+        if stats['dark_background']:
+            gray = cv2.bitwise_not(gray)  # Local thresholds expect dark text on a light background
+        return gray, scale, int(text_height * scale) or self.min_height, self.method_order(stats), stats
+
+    def record_win(self, method:str):
+        with self._lock:
+            self.wins[method] += 1
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import glob
+import time
+
+import cv2
+
+from OCR_Module.OCR_Processor import OCRProcessor
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sample_Images_Text")
+
+
+def time_ocr(ocr, image, text_regions, repeats):
+    """Best-of-N wall time and word list for one OCR mode."""
+    best, words = None, []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        words = ocr.recognize(image, text_regions=text_regions)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, [w['text'] for w in words]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-frame OCR with text-region OCR")
+    parser.add_argument("images", nargs="*", help="Images to test (default: the sample images, excluding annotated outputs)")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per image and mode (best time is kept)")
+    args = parser.parse_args()
+
+    images = args.images or sorted(p for p in glob.glob(os.path.join(SAMPLE_DIR, "*"))
+                                   if "annotated" not in os.path.basename(p).lower())
+    ocr = OCRProcessor()
+
+    total_full = total_regions = 0.0
+    print(f"{'image':45} {'full s':>8} {'region s':>9} {'speedup':>8} {'skipped':>8} {'words':>11}")
+    for path in images:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        full_time, full_words = time_ocr(ocr, image, False, args.repeats)
+        region_time, region_words = time_ocr(ocr, image, True, args.repeats)
+        stats = ocr.last_region_stats
+        total_full += full_time
+        total_regions += region_time
+        print(f"{os.path.basename(path)[:45]:45} {full_time:8.3f} {region_time:9.3f} {full_time / region_time:7.2f}x "
+              f"{stats['pixels_skipped']:7.1%} {len(full_words):5}/{len(region_words):<5}")
+
+    if total_regions:
+        print(f"{'total':45} {total_full:8.3f} {total_regions:9.3f} {total_full / total_regions:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
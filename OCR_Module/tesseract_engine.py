@@ -0,0 +1,306 @@
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytesseract
+
+# Column names of Tesseract's TSV output, in order. Both engines return a dict of
+# lists keyed by these names, the same structure as pytesseract.Output.DICT.
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+
+TESSERACT_LIBRARY_ENV = "TESSERACT_LIBRARY"
+
+# Library file names to try when no explicit path is given
+_LIBRARY_NAMES = {
+    "win32": ["libtesseract-5.dll", "libtesseract-4.dll", "tesseract53.dll", "tesseract50.dll"],
+    "darwin": ["libtesseract.5.dylib", "libtesseract.dylib"],
+}.get(sys.platform, ["libtesseract.so.5", "libtesseract.so.4", "libtesseract.so"])
+
+
+def parse_tsv(tsv: str) -> dict:
+    """
+    Parse Tesseract TSV output into a dict of lists (pytesseract.Output.DICT layout).
+
+    Args:
+        tsv (str): TSV text, with or without the header row.
+
+    Returns:
+        dict: Lists keyed by TSV_COLUMNS; 'conf' is a float, 'text' a str, everything else int.
+    """
+    data = {column: [] for column in TSV_COLUMNS}
+    for line in tsv.splitlines():
+        cells = line.split('\t')
+        if len(cells) < len(TSV_COLUMNS) - 1 or cells[0] == 'level':
+            continue
+        if len(cells) == len(TSV_COLUMNS) - 1:
+            cells.append('')  # Rows without text may drop the trailing cell
+        for column, cell in zip(TSV_COLUMNS[:-2], cells):
+            data[column].append(int(cell))
+        data['conf'].append(float(cells[10]))
+        data['text'].append(cells[11])
+    return data
+
+
+class TesseractEngine:
+    """
+    Persistent in-process Tesseract engine using the C API through ctypes.
+    The language data is loaded once, and images are handed over as memory buffers,
+    so there is no temporary file, no process spawn and no model reload per call.
+    A lock serialises calls because a single TessBaseAPI handle is not thread-safe;
+    use one engine per thread or process for parallel OCR.
+    """
+
+    def __init__(self, library_path: str | None = None, tessdata_path: str | None = None,
+                 lang: str = "eng", psm: int = 3, variables: dict | None = None):
+        """
+        Load libtesseract and initialise an engine.
+
+        Args:
+            library_path (str | None): Path to the libtesseract shared library. Defaults to the
+                                       TESSERACT_LIBRARY environment variable, then the system search path.
+            tessdata_path (str | None): Folder containing the *.traineddata files (default: Tesseract's own).
+            lang (str): Language(s) to load, e.g. "eng" or "eng+ara".
+            psm (int): Default page segmentation mode.
+            variables (dict | None): Tesseract variables to set after initialisation.
+
+        Raises:
+            OSError: If the library cannot be found or loaded.
+            RuntimeError: If Tesseract fails to initialise (e.g. missing language data).
+        """
+        self.lang = lang
+        self.psm = psm
+        self._lock = threading.Lock()
+        self._lib = self._load_library(library_path)
+        self._declare_api()
+
+        self._handle = self._lib.TessBaseAPICreate()
+        datapath = tessdata_path.encode() if tessdata_path else None
+        if self._lib.TessBaseAPIInit3(self._handle, datapath, lang.encode()) != 0:
+            self._lib.TessBaseAPIDelete(self._handle)
+            self._handle = None
+            raise RuntimeError(f"Failed to initialise Tesseract with language '{lang}' (tessdata: {tessdata_path})")
+
+        self._variables = {}
+        for name, value in (variables or {}).items():
+            self._set_variable(name, value)
+
+    @staticmethod
+    def _load_library(library_path):
+        candidates = [library_path, os.environ.get(TESSERACT_LIBRARY_ENV), ctypes.util.find_library("tesseract")]
+        candidates += _LIBRARY_NAMES
+        errors = []
+        for candidate in candidates:
+            if not candidate:
+                continue
+            try:
+                return ctypes.CDLL(candidate)
+            except OSError as e:
+                errors.append(f"{candidate}: {e}")
+        raise OSError("Could not load libtesseract. Tried: " + "; ".join(errors or ["no candidates"]))
+
+    def _declare_api(self):
+        lib = self._lib
+        handle = ctypes.c_void_p
+        lib.TessVersion.restype = ctypes.c_char_p
+        lib.TessBaseAPICreate.restype = handle
+        lib.TessBaseAPIInit3.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPIInit3.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetVariable.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetVariable.restype = ctypes.c_int
+        lib.TessBaseAPIGetStringVariable.argtypes = [handle, ctypes.c_char_p]
+        lib.TessBaseAPIGetStringVariable.restype = ctypes.c_char_p
+        lib.TessBaseAPIGetIntVariable.argtypes = [handle, ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
+        lib.TessBaseAPIGetIntVariable.restype = ctypes.c_int
+        lib.TessBaseAPIGetBoolVariable.argtypes = [handle, ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
+        lib.TessBaseAPIGetBoolVariable.restype = ctypes.c_int
+        lib.TessBaseAPIGetDoubleVariable.argtypes = [handle, ctypes.c_char_p, ctypes.POINTER(ctypes.c_double)]
+        lib.TessBaseAPIGetDoubleVariable.restype = ctypes.c_int
+        lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                            ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPISetSourceResolution.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPIRecognize.argtypes = [handle, ctypes.c_void_p]
+        lib.TessBaseAPIRecognize.restype = ctypes.c_int
+        # Returned strings must be released with TessDeleteText, so keep them as raw pointers
+        lib.TessBaseAPIGetTsvText.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPIGetTsvText.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [handle]
+        lib.TessBaseAPIEnd.argtypes = [handle]
+        lib.TessBaseAPIDelete.argtypes = [handle]
+
+    @property
+    def version(self) -> str:
+        return self._lib.TessVersion().decode()
+
+    def _set_variable(self, name, value):
+        if self._variables.get(name) == str(value):
+            return
+        if not self._lib.TessBaseAPISetVariable(self._handle, name.encode(), str(value).encode()):
+            raise ValueError(f"Unknown Tesseract variable: {name}")
+        self._variables[name] = str(value)
+
+    def _get_variable(self, name) -> str:
+        """Current value of a variable on the handle, as the string SetVariable takes."""
+        if name in self._variables:
+            return self._variables[name]
+        key = name.encode()
+        value = self._lib.TessBaseAPIGetStringVariable(self._handle, key)
+        if value is not None:
+            return value.decode()
+        number = ctypes.c_int()
+        if self._lib.TessBaseAPIGetIntVariable(self._handle, key, ctypes.byref(number)):
+            return str(number.value)
+        if self._lib.TessBaseAPIGetBoolVariable(self._handle, key, ctypes.byref(number)):
+            return str(number.value)
+        real = ctypes.c_double()
+        if self._lib.TessBaseAPIGetDoubleVariable(self._handle, key, ctypes.byref(real)):
+            return repr(real.value)
+        raise ValueError(f"Unknown Tesseract variable: {name}")
+
+    def image_to_data(self, image: np.ndarray, psm: int | None = None, variables: dict | None = None,
+                      dpi: int | None = None) -> dict:
+        """
+        Run OCR on an image held in memory.
+
+        Args:
+            image (np.ndarray): Grayscale (H, W) or BGR (H, W, 3) uint8 image.
+            psm (int | None): Page segmentation mode for this call (default: the engine's).
+            variables (dict | None): Tesseract variables for this call only; the engine's own
+                                     values are restored afterwards.
+            dpi (int | None): Source resolution hint; Tesseract estimates it when None.
+
+        Returns:
+            dict: Word and layout boxes in the pytesseract.Output.DICT layout.
+        """
+        if self._handle is None:
+            raise RuntimeError("Tesseract engine has been closed")
+
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        elif image.ndim != 2:
+            raise ValueError(f"Unsupported image shape {image.shape}; expected grayscale or BGR")
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else 3
+
+        with self._lock:
+            restore = {}
+            try:
+                for name, value in (variables or {}).items():
+                    previous = self._get_variable(name)
+                    if previous != str(value):
+                        restore.setdefault(name, previous)
+                        self._set_variable(name, value)
+                self._lib.TessBaseAPISetPageSegMode(self._handle, self.psm if psm is None else psm)
+                self._lib.TessBaseAPISetImage(self._handle, image.ctypes.data, width, height,
+                                              bytes_per_pixel, image.strides[0])
+                if dpi:
+                    self._lib.TessBaseAPISetSourceResolution(self._handle, dpi)
+                if self._lib.TessBaseAPIRecognize(self._handle, None) != 0:
+                    self._lib.TessBaseAPIClear(self._handle)
+                    raise RuntimeError("Tesseract failed to recognise the image")
+
+                text_ptr = self._lib.TessBaseAPIGetTsvText(self._handle, 0)
+                try:
+                    tsv = ctypes.string_at(text_ptr).decode("utf-8", errors="replace") if text_ptr else ""
+                finally:
+                    if text_ptr:
+                        self._lib.TessDeleteText(text_ptr)
+                    self._lib.TessBaseAPIClear(self._handle)
+            finally:
+                # Per-call variables (e.g. one profile's whitelist) must not leak into the next call
+                for name, value in restore.items():
+                    self._set_variable(name, value)
+
+        return parse_tsv(tsv)
+
+    def close(self):
+        """Release the Tesseract engine and its language data."""
+        with self._lock:
+            if self._handle is not None:
+                self._lib.TessBaseAPIEnd(self._handle)
+                self._lib.TessBaseAPIDelete(self._handle)
+                self._handle = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PytesseractEngine:
+    """
+    Fallback engine using pytesseract, which runs the tesseract executable once per call.
+    Has the same image_to_data interface as TesseractEngine.
+    """
+
+    def __init__(self, tesseract_cmd: str | None = None, lang: str = "eng", psm: int = 3,
+                 variables: dict | None = None):
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.lang = lang
+        self.psm = psm
+        self._variables = {name: str(value) for name, value in (variables or {}).items()}
+
+    def image_to_data(self, image: np.ndarray, psm: int | None = None, variables: dict | None = None,
+                      dpi: int | None = None) -> dict:
+        call_variables = dict(self._variables, **{name: str(value) for name, value in (variables or {}).items()})
+        config = f"--psm {self.psm if psm is None else psm}"
+        if dpi:
+            config += f" --dpi {dpi}"
+        config += "".join(f" -c {name}={value}" for name, value in call_variables.items())
+        return pytesseract.image_to_data(image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT)
+
+    def close(self):
+        pass
+
+
+def create_engine(backend: str = "auto", tesseract_path: str | None = None, lang: str = "eng",
+                  psm: int = 3, variables: dict | None = None, library_path: str | None = None,
+                  tessdata_path: str | None = None):
+    """
+    Create an OCR engine.
+
+    Args:
+        backend (str): "capi" (persistent in-process engine), "pytesseract" (one process per call)
+                       or "auto" (C API when libtesseract can be loaded, else pytesseract).
+        tesseract_path (str | None): Path to the tesseract executable. The C API backend also looks
+                                     for libtesseract and tessdata next to it (Windows installer layout).
+        lang (str): Language(s) to load.
+        psm (int): Default page segmentation mode.
+        variables (dict | None): Tesseract variables to set.
+        library_path (str | None): Explicit libtesseract path for the C API backend.
+        tessdata_path (str | None): Explicit tessdata folder for the C API backend.
+
+    Returns:
+        TesseractEngine | PytesseractEngine
+    """
+    if backend not in ("auto", "capi", "pytesseract"):
+        raise ValueError(f"Invalid OCR backend: {backend}")
+
+    if backend in ("auto", "capi"):
+        install_dir = os.path.dirname(tesseract_path) if tesseract_path and os.path.exists(tesseract_path) else None
+        if install_dir and library_path is None:
+            for name in _LIBRARY_NAMES:
+                if os.path.exists(os.path.join(install_dir, name)):
+                    library_path = os.path.join(install_dir, name)
+                    break
+        if install_dir and tessdata_path is None and os.path.isdir(os.path.join(install_dir, "tessdata")):
+            tessdata_path = os.path.join(install_dir, "tessdata")
+
+        try:
+            return TesseractEngine(library_path, tessdata_path, lang=lang, psm=psm, variables=variables)
+        except (OSError, RuntimeError) as e:
+            if backend == "capi":
+                raise
+            print(f"Warning: persistent Tesseract engine unavailable ({e}); falling back to pytesseract.")
+
+    return PytesseractEngine(tesseract_path, lang=lang, psm=psm, variables=variables)
@@ -0,0 +1,197 @@
+import cv2
+import numpy as np
+
+
+def detect_text_blobs(gray, max_side:int=1000, min_size:int=6, min_fill:float=0.45, pad:int=4):
+    """
+    Locate word/line-sized text blobs with a morphological-gradient detector.
+    Text strokes give strong local gradients; closing them horizontally joins characters
+    into word/line blobs, which are then filtered by size and density.
+
+    Args:
+        gray (np.ndarray): Grayscale image.
+        max_side (int): Detection runs on a copy downscaled so its longest side is at most this.
+        min_size (int): Minimum blob width and height in pixels (at detection scale).
+        min_fill (float): Minimum fraction of a blob's bounding box that the blob covers.
+        pad (int): Padding added around each blob in page pixels.
+
+    Returns:
+        tuple: (boxes, text_height) with (x0, y0, x1, y1) boxes in page coordinates
+               and the median blob height (0 if nothing was found).
+    """
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+
+    # Connected components rather than external contours, so text inside a frame
+    # (a sign border, a label outline) is not swallowed by the frame's contour.
+    count, _, stats, _ = cv2.connectedComponentsWithStats(connected, connectivity=8)
+
+    small_h = small.shape[0]
+    boxes, heights = [], []
+    for x, y, w, h, area in stats[1:count]:
+        if h < min_size or w < min_size or h > 0.8 * small_h:
+            continue
+        if area / float(w * h) < min_fill:
+            continue
+        x0 = max(int(x / scale) - pad, 0)
+        y0 = max(int(y / scale) - pad, 0)
+        x1 = min(int((x + w) / scale) + pad, width)
+        y1 = min(int((y + h) / scale) + pad, height)
+        boxes.append((x0, y0, x1, y1))
+        heights.append(y1 - y0)
+
+    return boxes, int(np.median(heights)) if heights else 0
+
+
+def find_text_regions(gray, merge_gap:float=1.0, **detect_args):
+    """
+    Locate text blocks: text blobs (see detect_text_blobs) closer than `merge_gap`
+    median text heights are merged, so Tesseract is called once per block rather
+    than once per word.
+
+    Returns:
+        list: (x, y, w, h) boxes in page coordinates, sorted in reading order.
+    """
+    boxes, text_height = detect_text_blobs(gray, **detect_args)
+    boxes = merge_boxes(boxes, int(text_height * merge_gap))
+    boxes.sort(key=lambda b: (b[1], b[0]))
+    return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in boxes]
+
+
+def find_text_lines(gray, word_gap:float=2.0, block_gap:float=1.0, **detect_args):
+    """
+    Locate individual text lines in reading order: blocks top to bottom (then left to
+    right), and lines top to bottom within each block.
+
+    Args:
+        gray (np.ndarray): Grayscale image.
+        word_gap (float): Blobs on the same line closer than this many text heights are joined.
+        block_gap (float): Lines closer than this many text heights belong to the same block.
+
+    Returns:
+        list: (x, y, w, h) line boxes in page coordinates, in reading order.
+    """
+    boxes, text_height = detect_text_blobs(gray, **detect_args)
+    lines = merge_into_lines(boxes, int(text_height * word_gap))
+    blocks = sorted(merge_boxes(lines, int(text_height * block_gap)), key=lambda b: (b[1], b[0]))
+
+    def block_index(line):
+        cx, cy = (line[0] + line[2]) / 2, (line[1] + line[3]) / 2
+        for i, (x0, y0, x1, y1) in enumerate(blocks):
+            if x0 <= cx <= x1 and y0 <= cy <= y1:
+                return i
+        return len(blocks)
+
+    lines.sort(key=lambda l: (block_index(l), l[1], l[0]))
+    return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in lines]
+
+
+def split_into_bands(gray, bands:int, overlap:float=0.5, **detect_args):
+    """
+    Split a page into horizontal bands for parallel OCR. Cuts are placed in the gap
+    between text lines closest to an even split, and every band is extended by a
+    margin so a line cut by mistake is still complete in one of its two bands.
+
+    Args:
+        gray (np.ndarray): Grayscale image.
+        bands (int): Number of bands wanted (fewer are returned for pages with few lines).
+        overlap (float): Margin added above and below each band, in median text heights.
+
+    Returns:
+        list: (top, bottom, own_top, own_bottom) rows per band, top to bottom. A word belongs
+              to the band whose own rows (own_top <= center < own_bottom) contain its center.
+    """
+    height = gray.shape[0]
+    boxes, text_height = detect_text_blobs(gray, pad=0, **detect_args)
+    if bands <= 1 or not boxes:
+        return [(0, height, 0, height)]
+
+    lines = merge_into_lines(boxes, text_height * 2)
+    covered = np.zeros(height, dtype=bool)
+    for _, y0, _, y1 in lines:
+        covered[y0:y1] = True
+    gap_rows = np.flatnonzero(~covered)
+
+    cuts = []
+    for k in range(1, min(bands, len(lines))):
+        target = k * height // bands
+        cut = int(gap_rows[np.abs(gap_rows - target).argmin()]) if gap_rows.size else target
+        if cuts and cut <= cuts[-1] + text_height:
+            continue  # Two targets found the same gap
+        cuts.append(cut)
+
+    margin = int(text_height * overlap) + 1
+    edges = [0] + cuts + [height]
+    return [(max(top - margin, 0), min(bottom + margin, height), top, bottom)
+            for top, bottom in zip(edges[:-1], edges[1:])]
+
+
+def merge_into_lines(boxes, gap:int):
+    """
+    Join boxes that share a text line (they overlap vertically by at least half the
+    smaller height) and are at most `gap` pixels apart horizontally.
+
+    Args:
+        boxes (list): (x0, y0, x1, y1) boxes.
+        gap (int): Maximum horizontal distance between boxes on the same line.
+
+    Returns:
+        list: (x0, y0, x1, y1) line boxes.
+    """
+    lines = []
+    for x0, y0, x1, y1 in sorted(boxes):
+        for i, (lx0, ly0, lx1, ly1) in enumerate(lines):
+            overlap = min(y1, ly1) - max(y0, ly0)
+            if overlap >= 0.5 * min(y1 - y0, ly1 - ly0) and x0 <= lx1 + gap and lx0 <= x1 + gap:
+                lines[i] = (min(x0, lx0), min(y0, ly0), max(x1, lx1), max(y1, ly1))
+                break
+        else:
+            lines.append((x0, y0, x1, y1))
+    return lines
+
+
+def merge_boxes(boxes, gap:int=0):
+    """
+    Merge boxes that overlap or lie within `gap` pixels of each other until none do.
+
+    Args:
+        boxes (list): (x0, y0, x1, y1) boxes.
+        gap (int): Maximum distance between boxes that are merged.
+
+    Returns:
+        list: Merged (x0, y0, x1, y1) boxes.
+    """
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        while boxes:
+            x0, y0, x1, y1 = boxes.pop()
+            i = 0
+            while i < len(boxes):
+                bx0, by0, bx1, by1 = boxes[i]
+                if bx0 <= x1 + gap and x0 <= bx1 + gap and by0 <= y1 + gap and y0 <= by1 + gap:
+                    x0, y0, x1, y1 = min(x0, bx0), min(y0, by0), max(x1, bx1), max(y1, by1)
+                    boxes.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            result.append((x0, y0, x1, y1))
+        boxes = result
+    return boxes
+
+
+def region_coverage(shape, regions):
+    """
+    Fraction of the image area covered by the given (x, y, w, h) regions.
+    """
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    for x, y, w, h in regions:
+        mask[y:y + h, x:x + w] = 1
+    return float(mask.mean()) if mask.size else 0.0
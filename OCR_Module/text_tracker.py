@@ -0,0 +1,232 @@
+import collections
+import difflib
+import itertools
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection over union of two {'x', 'y', 'width', 'height'} boxes."""
+    ix = max(0, min(a['x'] + a['width'], b['x'] + b['width']) - max(a['x'], b['x']))
+    iy = max(0, min(a['y'] + a['height'], b['y'] + b['height']) - max(a['y'], b['y']))
+    inter = ix * iy
+    union = a['width'] * a['height'] + b['width'] * b['height'] - inter
+    return inter / union if union else 0.0
+
+
+def text_similarity(a:str, b:str) -> float:
+    """String similarity in [0, 1], tolerant of the single-character errors OCR makes."""
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+class TextTrack:
+    """One word followed across frames."""
+
+    _ids = itertools.count()
+
+    def __init__(self, word, seq):
+        self.id = next(self._ids)
+        self.bbox = dict(word['bbox'])
+        self.votes = collections.Counter()  # Accumulated confidence per spelling
+        self.votes[word['text']] += word.get('conf', 0.0)
+        self.conf = word.get('conf', 0.0)
+        self.hits = 1
+        self.missed = 0
+        self.first_seq = self.last_seq = seq
+        self.reported_text = None
+
+    @property
+    def text(self) -> str:
+        """The spelling with the most accumulated confidence."""
+        return self.votes.most_common(1)[0][0]
+
+    def update(self, word, seq, smoothing):
+        conf = word.get('conf', 0.0)
+        self.votes[word['text']] += conf
+        self.conf = smoothing * self.conf + (1 - smoothing) * conf
+        # Follow the word if the camera drifts, without letting a single bad box jump it
+        for key in self.bbox:
+            self.bbox[key] = int(round((self.bbox[key] + word['bbox'][key]) / 2))
+        self.hits += 1
+        self.missed = 0
+        self.last_seq = seq
+
+    def as_word(self) -> dict:
+        return {'text': self.text, 'conf': round(self.conf, 1), 'bbox': dict(self.bbox), 'track': self.id}
+
+
+class TextTracker:
+    """
+    Associates OCR words across video frames by position (box overlap) and string
+    similarity, fuses their confidences over time and reports only new or changed text.
+
+    Tracks that are stable (seen on enough frames with a high fused confidence) are
+    masked out of later frames before OCR, and unchanged frames are skipped altogether
+    (see prepare_frame), so a steady camera only re-reads text that actually changed.
+    Any camera motion makes all tracks unstable again.
+    """
+
+    def __init__(self, min_hits:int=2, max_missed:int=3, stable_hits:int=4, stable_conf:float=85.0,
+                 min_iou:float=0.3, min_similarity:float=0.6, smoothing:float=0.6,
+                 motion_threshold:float=6.0, recheck_every:int=10):
+        """
+        Args:
+            min_hits (int): Frames a word must be seen on before it is reported.
+            max_missed (int): OCR'd frames a track may go unseen before it is dropped.
+            stable_hits (int): Frames after which a confident track counts as stable.
+            stable_conf (float): Fused confidence a track needs to count as stable.
+            min_iou (float): Minimum box overlap to associate a word with a track.
+            min_similarity (float): Minimum string similarity to associate a word with a track.
+            smoothing (float): Weight of the previous fused confidence (exponential moving average).
+            motion_threshold (float): Mean absolute thumbnail difference treated as camera motion.
+            recheck_every (int): Stable tracks are OCR'd again on every n-th frame anyway.
+        """
+        self.min_hits = min_hits
+        self.max_missed = max_missed
+        self.stable_hits = stable_hits
+        self.stable_conf = stable_conf
+        self.min_iou = min_iou
+        self.min_similarity = min_similarity
+        self.smoothing = smoothing
+        self.motion_threshold = motion_threshold
+        self.recheck_every = recheck_every
+        self.tracks = []
+        self._frames = 0
+        self._last_thumb = None
+        self.stats = collections.Counter()
+
+    def is_stable(self, track) -> bool:
+        return track.hits >= self.stable_hits and track.conf >= self.stable_conf
+
+    def prepare_frame(self, frame):
+        """
+        Decide how much of a frame needs OCR. The frame is compared with the last frame
+        sent to OCR: on camera motion every track loses its stability and the whole frame
+        is OCR'd (after shifting the tracks by the estimated pan); if nothing changed since
+        text became stable the frame is skipped; otherwise
+        the boxes of stable tracks are blanked out so only the rest is read again.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            tuple: (frame to OCR or None to skip it, list of skipped boxes). Pass the
+                   skipped boxes to update() with the frame's results, so their tracks are not aged.
+        """
+        self._frames += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, (160, 120), interpolation=cv2.INTER_AREA).astype(np.int16)
+        if self._last_thumb is None:
+            self._last_thumb = thumb
+            return frame, []
+
+        diff = np.abs(thumb - self._last_thumb)
+        if diff.mean() > self.motion_threshold:
+            # Follow a camera pan so the tracks still line up with their words, and make
+            # every track earn its stability again
+            (dx, dy), _ = cv2.phaseCorrelate(self._last_thumb.astype(np.float32), thumb.astype(np.float32))
+            dx, dy = int(round(dx * gray.shape[1] / 160)), int(round(dy * gray.shape[0] / 120))
+            for track in self.tracks:
+                track.bbox['x'] += dx
+                track.bbox['y'] += dy
+                track.hits = min(track.hits, self.min_hits)
+            self.stats['motion_resets'] += 1
+            self._last_thumb = thumb
+            return frame, []
+        if self.recheck_every and self._frames % self.recheck_every == 0:
+            self._last_thumb = thumb
+            return frame, []
+
+        stable = [track for track in self.tracks if self.is_stable(track)]
+        # Words seen for the first time on the last OCR'd frame need another look before they are reported
+        pending = any(track.hits < self.min_hits and not track.missed for track in self.tracks)
+        if not stable:
+            self._last_thumb = thumb
+            return frame, []
+
+        # Mean difference per 8x8 tile of the thumbnail; a changed tile means new or changed content
+        changed = diff.reshape(15, 8, 20, 8).mean(axis=(1, 3)).max() > 2 * self.motion_threshold
+        if not changed and not pending:
+            self.stats['frames_skipped'] += 1
+            return None, [dict(track.bbox) for track in stable]
+
+        self._last_thumb = thumb
+        skipped = [dict(track.bbox) for track in stable]
+        masked = frame.copy()
+        height, width = frame.shape[:2]
+        for b in skipped:
+            x0, y0 = max(b['x'] - 2, 0), max(b['y'] - 2, 0)
+            x1, y1 = min(b['x'] + b['width'] + 2, width), min(b['y'] + b['height'] + 2, height)
+            # Fill with the surrounding background so no new edges are created
+            border = np.concatenate([masked[y0, x0:x1], masked[y1 - 1, x0:x1]])
+            masked[y0:y1, x0:x1] = np.median(border, axis=0)
+        self.stats['boxes_skipped'] += len(skipped)
+        return masked, skipped
+
+    def update(self, words, seq:int, skipped=()):
+        """
+        Feed the OCR results of one frame.
+
+        Args:
+            words (list): Words as returned by OCRProcessor.recognize (with 'conf').
+            seq (int): Frame sequence number.
+            skipped (list): Boxes that were masked out of this frame (see prepare_frame).
+
+        Returns:
+            list: Events for new or changed text, each a word dict (see TextTrack.as_word)
+                  with 'status' set to "new" or "changed".
+        """
+        self.stats['frames'] += 1
+        self.stats['words'] += len(words)
+
+        # Greedy association, best (overlap + similarity) pairs first
+        candidates = []
+        for wi, word in enumerate(words):
+            for ti, track in enumerate(self.tracks):
+                iou = box_iou(word['bbox'], track.bbox)
+                if iou < self.min_iou:
+                    continue
+                similarity = max(text_similarity(word['text'], spelling) for spelling in track.votes)
+                if similarity >= self.min_similarity:
+                    candidates.append((iou + similarity, wi, ti))
+        candidates.sort(reverse=True)
+
+        matched_words, matched_tracks = set(), set()
+        for _, wi, ti in candidates:
+            if wi in matched_words or ti in matched_tracks:
+                continue
+            matched_words.add(wi)
+            matched_tracks.add(ti)
+            self.tracks[ti].update(words[wi], seq, self.smoothing)
+
+        for wi, word in enumerate(words):
+            if wi not in matched_words:
+                self.tracks.append(TextTrack(word, seq))
+
+        # Age tracks that should have been seen; masked tracks were simply not looked at
+        for ti, track in enumerate(self.tracks):
+            if ti in matched_tracks or track.last_seq == seq:
+                continue
+            if any(box_iou(track.bbox, b) > 0.5 for b in skipped):
+                continue
+            track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        events = []
+        for track in self.tracks:
+            if track.hits < self.min_hits or track.text == track.reported_text:
+                continue
+            event = track.as_word()
+            event['status'] = "new" if track.reported_text is None else "changed"
+            track.reported_text = track.text
+            events.append(event)
+        self.stats['events'] += len(events)
+        return sorted(events, key=lambda e: (e['bbox']['y'], e['bbox']['x']))
+
+    def words(self) -> list:
+        """All confirmed tracks as words, e.g. for drawing with draw_annotations."""
+        return [track.as_word() for track in self.tracks if track.hits >= self.min_hits]
+
+    def metrics(self) -> dict:
+        """Counters (frames, words, events, frames_skipped, boxes_skipped, motion_resets) and current track counts."""
+        return dict(self.stats, tracks=len(self.tracks), stable_tracks=sum(self.is_stable(t) for t in self.tracks))
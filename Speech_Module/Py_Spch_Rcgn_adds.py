@@ -1,20 +1,21 @@
-"""
-#     Add a wake word system
-def is_wake_word(command, wake_words=["glasses", "assistant", "hey"]):
-    return any(word in command for word in wake_words)
-
-# Continuous listening
-def continuous_listener(callback):
-    r = sr.Recognizer()
-    with get_audio_source() as source:
-        r.adjust_for_ambient_noise(source)
-        while True:
-            try:
-                audio = r.listen(source, timeout=3)
-                text = r.recognize_google(audio)
-                callback(text.lower())
-            except sr.WaitTimeoutError:
-                continue
-            except Exception as e:
-                print(f"Error: {e}")
-"""
\ No newline at end of file
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Speech_Module.streaming_recognizer import MicrophoneSource
+from Speech_Module.wake_word import WAKE_WORDS, WakeWordListener
+
+#     Add a wake word system
+def is_wake_word(command, wake_words=WAKE_WORDS):
+    return any(word in command.split() for word in wake_words)
+
+# Continuous listening: only the commands said after a wake word reach the callback
+def continuous_listener(callback, on_wake=None):
+    listener = WakeWordListener()
+    with MicrophoneSource() as source:
+        listener.run(source, lambda command: callback(command) if command else None, on_wake=on_wake)
+
+# Test it
+if __name__ == "__main__":
+    continuous_listener(lambda command: print(f"Processing command: {command}"),
+                        on_wake=lambda word: print(f"Heard '{word}', listening..."))
@@ -1,6 +1,12 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import time
 import speech_recognition as sr
 
+from Speech_Module.noise_floor import shared_noise_floor
+from Speech_Module.streaming_recognizer import shared_listener
+
 def get_audio_source():
     for i in range(3):  # Try 3 times
         try:
@@ -11,12 +17,29 @@ def get_audio_source():
     return None
 
 def listen_for_command():
+    # Offline recognition on the microphone stream that stays open between calls; Google's
+    # service below is the fallback when there is no Vosk model
+    listener = shared_listener()
+    if listener is not None:
+        recognizer, source = listener
+        print("Listening...")
+        command = recognizer.listen(source, timeout=15, phrase_time_limit=15,
+                                    on_partial=lambda partial: print(f"... {partial}"))
+        print(f"You said: {command}" if command else "No speech detected")
+        return command
+
     r = sr.Recognizer()
+    noise_floor = shared_noise_floor()
     
     # Adjust for ambient noise and set timeout
     with sr.Microphone() as source:
-        print("Calibrating microphone...")
-        r.adjust_for_ambient_noise(source, duration=1)
+        if noise_floor is not None:
+            # Kept current in the background, so there is nothing to wait for
+            r.energy_threshold = noise_floor.threshold()
+            r.dynamic_energy_threshold = False
+        else:
+            print("Calibrating microphone...")
+            r.adjust_for_ambient_noise(source, duration=1)
         print("Listening...")
         try:
             audio = r.listen(source, timeout=15, phrase_time_limit=15)
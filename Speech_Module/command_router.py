@@ -0,0 +1,187 @@
+from __future__ import annotations
+import collections
+import itertools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Classes of the object detection model (Pascal VOC), as its detections name them
+VOC_CLASSES = ("aeroplane", "bicycle", "bird", "boat", "bottle", "bus", "car", "cat", "chair", "cow", "diningtable",
+               "dog", "horse", "motorbike", "person", "pottedplant", "sheep", "sofa", "train", "tvmonitor")
+
+# How people say the class names that are not everyday words
+SPOKEN_NAMES = {
+    'aeroplane': ["plane", "aeroplane", "airplane"],
+    'diningtable': ["table", "dining table"],
+    'motorbike': ["motorbike", "motorcycle"],
+    'pottedplant': ["plant", "potted plant"],
+    'tvmonitor': ["tv", "television", "monitor"],
+}
+IRREGULAR_PLURALS = {'person': "people", 'sheep': "sheep"}
+
+
+def plural(phrase: str) -> str:
+    """Plural of a (possibly several word) noun phrase: "dining table" -> "dining tables"."""
+    *head, word = phrase.split()
+    if word in IRREGULAR_PLURALS:
+        word = IRREGULAR_PLURALS[word]
+    elif word.endswith(("s", "x", "ch", "sh")):
+        word += "es"
+    else:
+        word += "s"
+    return " ".join(head + [word])
+
+
+def object_values(class_names) -> dict:
+    """
+    Slot values for the classes of a detection model: every way of saying a class, in the
+    singular and the plural, mapped to the class name its detections carry.
+    """
+    values = {}
+    for name in class_names:
+        for spoken in SPOKEN_NAMES.get(name, [name]):
+            values.setdefault(spoken, name)
+            values.setdefault(plural(spoken), name)
+    return values
+
+
+# Slot values; a phrase names a slot as {slot}
+SLOTS = {
+    'object': object_values(VOC_CLASSES),
+}
+
+# Voice commands: intent -> phrases that say it
+INTENTS = {
+    'detect_objects': ["what is in front of me", "what do you see", "what's in front of me", "detect objects"],
+    'find_object': ["find my {object}", "find the {object}", "find {object}", "where is my {object}",
+                    "where are my {object}", "where is the {object}"],
+    'read_text': ["read this", "read it", "read the text", "read text"],
+    'count_money': ["how much money", "how much money is this", "how much is this", "count the money",
+                    "count money", "what note is this"],
+    'detect_color': ["what color is this", "what colour is this", "what color", "what colour"],
+    'stop': ["stop", "cancel", "be quiet"],
+}
+
+TOKEN = re.compile(r"[a-z0-9']+")
+SLOT = re.compile(r"^\{(\w+)\}$")
+
+
+def tokens(text: str) -> list:
+    return TOKEN.findall(text.lower())
+
+
+class Command:
+    __slots__ = ("intent", "slots", "text")
+
+    def __init__(self, intent: str, slots: dict, text: str):
+        self.intent = intent
+        self.slots = slots
+        self.text = text
+
+    def __repr__(self):
+        return f"Command({self.intent!r}, {self.slots!r}, {self.text!r})"
+
+
+class CommandRouter:
+    """
+    Maps recognized speech to intents and dispatches them to handlers.
+
+    The grammar (INTENTS and SLOTS) is compiled once into a token trie with every slot
+    value expanded in place, so matching is one dictionary lookup per token for each
+    phrase that could be in progress. At most as many phrases as the longest one has
+    tokens can be in progress, which keeps the work per token constant however large
+    the grammar grows. Matches are found anywhere in the text ("glasses, read this
+    please"); the longest one wins.
+
+    phrases() lists everything the grammar can say, to restrict the speech recognizer
+    to it (see StreamingRecognizer.set_grammar).
+    """
+
+    def __init__(self, intents: dict = INTENTS, slots: dict = SLOTS):
+        """
+        Args:
+            intents (dict): Intent name -> phrases; slots are written as {slot}.
+            slots (dict): Slot name -> values (a value may be several words), or a dict of
+                          spoken value -> the value the command reports (see object_values).
+        """
+        self._root = {}
+        self._phrases = []
+        self._depth = 0
+        self.handlers = {}
+        self.stats = collections.Counter()
+        for intent, phrases in intents.items():
+            for phrase in phrases:
+                self._compile(intent, phrase.lower().split(), slots)
+
+    def _compile(self, intent, parts, slots):
+        names = [SLOT.match(part)[1] for part in parts if SLOT.match(part)]
+        unknown = [name for name in names if name not in slots]
+        if unknown:
+            raise ValueError(f"Intent '{intent}' uses undefined slot(s): {', '.join(unknown)}")
+        for spoken in itertools.product(*(slots[name] for name in names)):
+            filled = iter(spoken)
+            words = []
+            for part in parts:
+                words.extend(tokens(next(filled)) if SLOT.match(part) else tokens(part))
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            if "" not in node:  # The first phrase to claim a word sequence keeps it
+                values = {name: slots[name][said] if isinstance(slots[name], dict) else said
+                          for name, said in zip(names, spoken)}
+                node[""] = (intent, values)
+                self._phrases.append(" ".join(words))
+                self._depth = max(self._depth, len(words))
+
+    def phrases(self) -> list:
+        """Every phrase of the grammar, plus "[unk]" so other speech is recognized as unknown rather than forced into a command."""
+        return self._phrases + ["[unk]"]
+
+    def match(self, text: str) -> Command | None:
+        """The longest command said anywhere in `text`, or None."""
+        best, best_length = None, 0
+        active = []  # (trie node, tokens matched so far) of the phrases in progress
+        for word in tokens(text):
+            advanced = []
+            for node, length in active + [(self._root, 0)]:
+                child = node.get(word)
+                if child is not None:
+                    advanced.append((child, length + 1))
+                    if "" in child and length + 1 > best_length:
+                        best, best_length = child[""], length + 1
+            active = advanced
+        if best is None:
+            return None
+        intent, slots = best
+        return Command(intent, dict(slots), text)
+
+    def register(self, intent: str, handler):
+        """Call `handler(command)` for an intent."""
+        self.handlers[intent] = handler
+
+    def route(self, text: str) -> bool:
+        """
+        Match `text` and dispatch it to its intent's handler.
+
+        Returns:
+            bool: False if no command was recognized or nothing handles it.
+        """
+        command = self.match(text)
+        if command is None:
+            self.stats['unmatched'] += 1
+            logger.info(f"No command in '{text}'")
+            return False
+        handler = self.handlers.get(command.intent)
+        if handler is None:
+            self.stats['unhandled'] += 1
+            logger.warning(f"No handler for voice command {command.intent}")
+            return False
+        self.stats['routed'] += 1
+        logger.info(f"Voice command: {command.intent} {command.slots or ''}")
+        handler(command)
+        return True
+
+    def metrics(self) -> dict:
+        """Counters (routed, unmatched, unhandled) and the grammar size."""
+        return dict(self.stats, phrases=len(self._phrases), max_phrase_tokens=self._depth)
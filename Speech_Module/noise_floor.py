@@ -0,0 +1,219 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import collections
+import json
+import threading
+import time
+
+import numpy as np
+
+from Speech_Module.streaming_recognizer import SAMPLE_RATE, MicrophoneSource
+
+
+class NoiseFloor:
+    """
+    Background noise level of the microphone, and the energy threshold above which audio
+    counts as speech.
+
+    The floor is calibrated once from a second of audio and then follows the background:
+    every chunk below the threshold moves it a little towards that chunk's level. When
+    everything has been "speech" for longer than anyone talks in one go (walking out onto
+    a busy street), the floor follows that too, slowly, instead of staying stuck below a
+    background that never goes quiet again.
+
+    The threshold is in the RMS units of 16-bit audio that speech_recognition's
+    Recognizer.energy_threshold uses. Its history is kept (one entry per
+    `history_interval` seconds of audio) for tuning the parameters.
+    """
+
+    def __init__(self, sample_rate:int=SAMPLE_RATE, frame_ms:int=20, ratio:float=3.0, min_threshold:float=100.0,
+                 adapt:float=0.05, max_speech_seconds:float=10.0, history_interval:float=1.0, history_size:int=3600):
+        """
+        Args:
+            sample_rate (int): Sample rate of the chunks.
+            frame_ms (int): Frame length the energy is measured over.
+            ratio (float): How much louder than the floor speech is (3.0 is about 10 dB).
+            min_threshold (float): Lowest threshold, so digital silence does not make every click speech.
+            adapt (float): How fast the floor follows the background (fraction per chunk).
+            max_speech_seconds (float): Continuous "speech" after which the floor adapts to it anyway.
+            history_interval (float): Seconds of audio between history entries.
+            history_size (int): History entries kept.
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.adapt = adapt
+        self.max_speech_seconds = max_speech_seconds
+        self.history_interval = history_interval
+        self.history = collections.deque(maxlen=history_size)
+        self.floor = None
+        self.stats = collections.Counter()
+        self._speech_seconds = 0.0
+        self._since_history = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def calibrated(self) -> bool:
+        return self.floor is not None
+
+    def threshold(self) -> float:
+        with self._lock:
+            return max((self.floor or 0.0) * self.ratio, self.min_threshold)
+
+    def frame_rms(self, chunk:bytes) -> np.ndarray:
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        frames = samples[:samples.size // self.frame_samples * self.frame_samples].reshape(-1, self.frame_samples)
+        if not frames.size:
+            frames = samples.reshape(1, -1)
+        return np.sqrt((frames * frames).mean(axis=1))
+
+    def calibrate(self, source, seconds:float=1.0):
+        """Set the floor from `seconds` of audio that should contain no speech."""
+        levels = []
+        heard = 0.0
+        while heard < seconds:
+            chunk = source.read()
+            if not chunk:
+                break
+            heard += len(chunk) / 2 / self.sample_rate
+            levels.extend(self.frame_rms(chunk))
+        if levels:
+            with self._lock:
+                self.floor = float(np.median(levels))
+                self.stats['calibrations'] += 1
+                self._record('calibrated')
+
+    def observe(self, chunk:bytes) -> bool:
+        """
+        Classify a chunk and update the floor from it if it is background.
+
+        Returns:
+            bool: True if any frame of the chunk is above the threshold (speech).
+        """
+        rms = self.frame_rms(chunk)
+        level = float(rms.mean())
+        duration = len(chunk) / 2 / self.sample_rate
+        with self._lock:
+            if self.floor is None:
+                self.floor = level
+            speech = rms.max() > max(self.floor * self.ratio, self.min_threshold)
+            if not speech:
+                self._speech_seconds = 0.0
+                self.floor += self.adapt * (level - self.floor)
+            else:
+                self._speech_seconds += duration
+                self.stats['speech_chunks'] += 1
+                if self._speech_seconds > self.max_speech_seconds:
+                    self.floor += self.adapt / 10 * (level - self.floor)
+                    self.stats['loud_background_chunks'] += 1
+            self.stats['chunks'] += 1
+            self._since_history += duration
+            if self._since_history >= self.history_interval:
+                self._since_history = 0.0
+                self._record('speech' if speech else 'background')
+        return speech
+
+    def _record(self, state:str):
+        self.history.append({'time': round(time.time(), 2), 'floor': round(self.floor, 1),
+                             'threshold': round(max(self.floor * self.ratio, self.min_threshold), 1), 'state': state})
+
+    def reset(self):
+        with self._lock:
+            self.floor = None
+            self._speech_seconds = 0.0
+
+    def save_history(self, path:str):
+        """Append the threshold history to a JSON Lines file."""
+        with self._lock:
+            entries = list(self.history)
+        with open(path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def metrics(self) -> dict:
+        """Counters (chunks, speech_chunks, loud_background_chunks, calibrations), floor and threshold."""
+        with self._lock:
+            floor = self.floor
+        return dict(self.stats, floor=round(floor, 1) if floor is not None else None, threshold=round(self.threshold(), 1))
+
+
+class NoiseFloorMonitor:
+    """
+    Keeps a NoiseFloor current from a microphone stream of its own, on a background thread,
+    so the threshold is ready whenever a listen call needs it.
+    """
+
+    def __init__(self, noise_floor:NoiseFloor|None=None, calibration_seconds:float=1.0):
+        self.noise_floor = noise_floor or NoiseFloor()
+        self.calibration_seconds = calibration_seconds
+        self.calibrated = threading.Event()
+        self.error = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with MicrophoneSource(sample_rate=self.noise_floor.sample_rate) as source:
+                self.noise_floor.calibrate(source, self.calibration_seconds)
+                self.calibrated.set()
+                while not self._stopped.is_set():
+                    self.noise_floor.observe(source.read())
+        except Exception as e:
+            self.error = e
+        finally:
+            self.calibrated.set()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def shared_noise_floor(timeout:float=3.0) -> NoiseFloor | None:
+    """
+    The process-wide noise floor, kept current in the background. The first call waits for
+    the one-time calibration; later calls return at once.
+
+    Returns:
+        NoiseFloor | None: None if the microphone could not be monitored (the reason is printed).
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = NoiseFloorMonitor()
+            _monitor.start()
+    _monitor.calibrated.wait(timeout)
+    if _monitor.error is not None or not _monitor.noise_floor.calibrated:
+        print(f"Noise floor unavailable: {_monitor.error or 'calibration timed out'}")
+        return None
+    return _monitor.noise_floor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the noise floor and speech threshold of the microphone over time")
+    parser.add_argument("--seconds", type=float, default=60.0, help="How long to record")
+    parser.add_argument("--output", default="noise_floor_history.jsonl", help="JSON Lines file the history is appended to")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between history entries")
+    args = parser.parse_args()
+
+    noise_floor = NoiseFloor(history_interval=args.interval)
+    with MicrophoneSource() as source:
+        noise_floor.calibrate(source)
+        end = time.monotonic() + args.seconds
+        while time.monotonic() < end:
+            noise_floor.observe(source.read())
+    noise_floor.save_history(args.output)
+    print(noise_floor.metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import collections
+import json
+import threading
+import time
+import wave
+
+import numpy as np
+
+from Utils.latency_stats import LatencyStats
+
+SAMPLE_RATE = 16000  # What the small Vosk models are trained on
+CHUNK_MS = 100       # Audio is decoded in chunks of this length
+DEFAULT_MODEL_PATH = os.environ.get(
+    "VOSK_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-us-0.15"))
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_path:str=DEFAULT_MODEL_PATH):
+    """
+    Load a Vosk model once per process; loading takes a few seconds, decoding with it is cheap.
+
+    Raises:
+        ImportError: If the vosk package is not installed.
+        FileNotFoundError: If there is no model at `model_path`.
+    """
+    with _models_lock:
+        if model_path not in _models:
+            import vosk  # Optional dependency, only needed for offline recognition
+            if not os.path.isdir(model_path):
+                raise FileNotFoundError(f"No Vosk model at {model_path} (download one from "
+                                        f"https://alphacephei.com/vosk/models or set VOSK_MODEL_PATH)")
+            vosk.SetLogLevel(-1)
+            _models[model_path] = vosk.Model(model_path)
+        return _models[model_path]
+
+
+def to_pcm16(samples, channels:int, rate:int, sample_rate:int=SAMPLE_RATE) -> bytes:
+    """Convert interleaved samples (any integer width) to mono 16-bit PCM at `sample_rate`."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.uint8:
+        samples = (samples.astype(np.int16) - 128) << 8
+    elif samples.dtype == np.int32:
+        samples = samples >> 16
+    samples = samples.astype(np.float32).reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate and samples.size:
+        positions = np.arange(0, samples.size, rate / sample_rate)
+        samples = np.interp(positions, np.arange(samples.size), samples)
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def read_wav(path:str, sample_rate:int=SAMPLE_RATE) -> bytes:
+    """Read a WAV file as mono 16-bit PCM at `sample_rate`."""
+    with wave.open(path, "rb") as wav:
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width == 3:  # 24 bit: widen to 32 bit
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        frames = np.pad(raw, ((0, 0), (1, 0))).tobytes()
+        width = 4
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[width]
+    return to_pcm16(np.frombuffer(frames, dtype=dtype), channels, rate, sample_rate)
+
+
+class WavSource:
+    """
+    Audio chunks from a WAV file, in the same format MicrophoneSource delivers, so the
+    recognizers can be tested and benchmarked on recordings.
+    """
+
+    def __init__(self, path:str, chunk_ms:int=CHUNK_MS, sample_rate:int=SAMPLE_RATE, realtime:bool=False,
+                 trailing_silence_ms:int=1000):
+        """
+        Args:
+            path (str): WAV file (any sample rate, width and channel count).
+            chunk_ms (int): Chunk length in milliseconds.
+            sample_rate (int): Sample rate to convert to.
+            realtime (bool): Deliver chunks no faster than a microphone would.
+            trailing_silence_ms (int): Silence appended to the recording, so the end of the last
+                                       phrase is detected as it would be live.
+        """
+        self.sample_rate = sample_rate
+        self.chunk_bytes = int(sample_rate * chunk_ms / 1000) * 2
+        self.realtime = realtime
+        silence = bytes(int(sample_rate * trailing_silence_ms / 1000) * 2)
+        self._audio = read_wav(path, sample_rate) + silence
+        self._offset = 0
+        self._started = None
+
+    @property
+    def duration(self) -> float:
+        return len(self._audio) / 2 / self.sample_rate
+
+    @property
+    def exhausted(self) -> bool:
+        return self._offset >= len(self._audio)
+
+    def read(self) -> bytes | None:
+        """The next chunk, or None at the end of the file."""
+        if self.exhausted:
+            return None
+        chunk = self._audio[self._offset:self._offset + self.chunk_bytes]
+        self._offset += len(chunk)
+        if self.realtime:
+            if self._started is None:
+                self._started = time.perf_counter()
+            delay = self._started + self._offset / 2 / self.sample_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk
+
+    def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MicrophoneSource:
+    """
+    One PyAudio input stream, opened once and kept open, delivering fixed-size chunks of
+    mono 16-bit PCM. Opening a microphone takes long enough to clip the start of a command.
+    """
+
+    def __init__(self, chunk_ms:int=CHUNK_MS, sample_rate:int=SAMPLE_RATE, device_index:int|None=None):
+        import pyaudio
+        self.sample_rate = sample_rate
+        self.chunk_frames = int(sample_rate * chunk_ms / 1000)
+        self.chunk_bytes = self.chunk_frames * 2
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, input=True,
+                                        input_device_index=device_index, frames_per_buffer=self.chunk_frames)
+
+    def read(self) -> bytes:
+        return self._stream.read(self.chunk_frames, exception_on_overflow=False)
+
+    def drain(self):
+        """Throw away audio buffered since the last read, so a new listen starts from now."""
+        available = self._stream.get_read_available()
+        if available:
+            self._stream.read(available, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamingRecognizer:
+    """
+    Offline speech recognition with Vosk, decoded incrementally chunk by chunk as audio
+    arrives, with partial hypotheses while the user is still speaking. Nothing is sent over
+    the network, and there is no calibration step: Vosk finds the end of a phrase itself.
+    """
+
+    def __init__(self, model_path:str=DEFAULT_MODEL_PATH, sample_rate:int=SAMPLE_RATE, grammar:list|None=None):
+        """
+        Args:
+            model_path (str): Vosk model directory.
+            sample_rate (int): Sample rate of the audio that will be fed.
+            grammar (list | None): Phrases to restrict recognition to (see set_grammar).
+        """
+        import vosk
+        self.sample_rate = sample_rate
+        self.model = load_model(model_path)
+        self._recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        if grammar:
+            self.set_grammar(grammar)
+        self.stats = collections.Counter()
+        self._decode_seconds = 0.0
+        self._audio_seconds = 0.0
+        self.chunk_decode = LatencyStats()  # Decode time per chunk
+        self.final_delay = LatencyStats()   # From the end of the audio to the final result of a phrase
+
+    def set_grammar(self, phrases):
+        """
+        Restrict recognition to the given words and phrases; "[unk]" in the list lets other
+        speech through as unknown. A small vocabulary decodes faster and more accurately.
+        """
+        self._recognizer.SetGrammar(json.dumps(list(phrases)))
+        self.reset()
+
+    def reset(self):
+        self._recognizer.Reset()
+
+    def accept(self, chunk:bytes):
+        """
+        Decode one chunk of audio.
+
+        Returns:
+            tuple: (kind, text) with kind "final" when a phrase has ended, otherwise "partial".
+        """
+        start = time.perf_counter()
+        final = self._recognizer.AcceptWaveform(chunk)
+        result = json.loads(self._recognizer.Result() if final else self._recognizer.PartialResult())
+        elapsed = time.perf_counter() - start
+        self.chunk_decode.add(elapsed)
+        self._decode_seconds += elapsed
+        self._audio_seconds += len(chunk) / 2 / self.sample_rate
+        self.stats['chunks'] += 1
+        return ("final", result.get('text', "")) if final else ("partial", result.get('partial', ""))
+
+    def finish(self) -> str:
+        """Force the end of the current phrase and return its text."""
+        return json.loads(self._recognizer.FinalResult()).get('text', "")
+
+    def results(self, source, timeout:float|None=5.0, phrase_time_limit:float|None=15.0, drain:bool=True):
+        """
+        Decode a source until one phrase has been recognized.
+
+        Args:
+            source: WavSource, MicrophoneSource or anything with read() returning PCM chunks.
+            timeout (float | None): Give up after this many seconds of audio without speech.
+            phrase_time_limit (float | None): Cut the phrase off after this many seconds of audio.
+            drain (bool): Discard audio the source buffered before the call. Leave it False when
+                          the phrase may already have started (e.g. right after a wake word).
+
+        Yields:
+            tuple: ("partial", text) while the phrase is spoken, then one ("final", text);
+                   the final text is empty if nothing was said.
+        """
+        self.reset()
+        if drain:
+            source.drain()
+        audio_seconds = 0.0
+        speech_started = None
+        partial = ""
+        while True:
+            chunk = source.read()
+            if not chunk:
+                yield "final", self.finish()
+                return
+            read_at = time.perf_counter()
+            audio_seconds += len(chunk) / 2 / self.sample_rate
+            kind, text = self.accept(chunk)
+            if kind == "final":
+                if text or speech_started is not None:
+                    self.final_delay.add(time.perf_counter() - read_at)
+                    self.stats['phrases'] += 1
+                    yield "final", text
+                    return
+                continue
+            if text and text != partial:
+                partial = text
+                if speech_started is None:
+                    speech_started = audio_seconds
+                yield "partial", text
+            if speech_started is None and timeout is not None and audio_seconds > timeout:
+                self.stats['timeouts'] += 1
+                yield "final", ""
+                return
+            if speech_started is not None and phrase_time_limit is not None and audio_seconds - speech_started > phrase_time_limit:
+                yield "final", self.finish()
+                return
+
+    def listen(self, source, timeout:float|None=5.0, phrase_time_limit:float|None=15.0, on_partial=None,
+               drain:bool=True) -> str:
+        """
+        Recognize one phrase (see results()).
+
+        Args:
+            on_partial (callable | None): Called with each partial hypothesis.
+
+        Returns:
+            str: Recognized text in lower case, or "" if nothing was said.
+        """
+        for kind, text in self.results(source, timeout, phrase_time_limit, drain):
+            if kind == "partial":
+                if on_partial:
+                    on_partial(text)
+            else:
+                return text.lower()
+        return ""
+
+    def metrics(self) -> dict:
+        """Counters (chunks, phrases, timeouts), the real-time factor (decode time / audio time) and timing percentiles."""
+        return dict(self.stats,
+                    real_time_factor=round(self._decode_seconds / self._audio_seconds, 3) if self._audio_seconds else None,
+                    chunk_decode=self.chunk_decode.summary(),
+                    final_delay=self.final_delay.summary())
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_listener(model_path:str=DEFAULT_MODEL_PATH):
+    """
+    The process-wide offline recognizer and microphone stream, created on first use, so every
+    listen call reuses the open stream and the loaded model.
+
+    Returns:
+        tuple | None: (StreamingRecognizer, MicrophoneSource), or None if offline recognition
+                      is not available (no vosk, no model or no microphone); the reason is
+                      printed once.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            try:
+                _shared = (StreamingRecognizer(model_path), MicrophoneSource())
+            except Exception as e:
+                print(f"Offline speech recognition unavailable: {e}")
+                _shared = False
+        return _shared or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline streaming speech recognition of WAV files or the microphone")
+    parser.add_argument("wavs", nargs="*", help="WAV files to recognize (default: listen on the microphone)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Vosk model directory")
+    parser.add_argument("--grammar", help="Comma separated phrases to restrict recognition to")
+    parser.add_argument("--realtime", action="store_true", help="Feed WAV files at real-time speed")
+    args = parser.parse_args()
+
+    recognizer = StreamingRecognizer(args.model, grammar=args.grammar.split(",") + ["[unk]"] if args.grammar else None)
+    sources = [(path, WavSource(path, realtime=args.realtime)) for path in args.wavs] or [("microphone", MicrophoneSource())]
+    for name, source in sources:
+        with source:
+            start = time.perf_counter()
+            while True:
+                text = recognizer.listen(source, timeout=None if args.wavs else 5.0,
+                                         on_partial=lambda partial: print(f"  ... {partial}"))
+                print(f"{name} [{time.perf_counter() - start:.2f}s]: {text}")
+                if not args.wavs or source.exhausted:
+                    break
+    print(recognizer.metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+from __future__ import annotations
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import collections
+import datetime
+import glob
+import json
+import platform
+import time
+
+from Utils.latency_stats import LatencyStats
+from Speech_Module.noise_floor import NoiseFloor
+from Speech_Module.streaming_recognizer import (CHUNK_MS, DEFAULT_MODEL_PATH, MicrophoneSource, StreamingRecognizer,
+                                                WavSource)
+
+WAKE_WORDS = ("glasses", "assistant")
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sample_Audio")
+
+
+class EnergyGate:
+    """
+    Cheap voice activity gate: a chunk counts as speech when any of its short frames is
+    above the threshold of a NoiseFloor, which follows the level of the chunks that are
+    not speech, so the gate adapts to a quiet room or a busy street. After speech the gate
+    stays open for `hangover_ms`, so pauses inside a phrase do not cut it up.
+    """
+
+    def __init__(self, noise_floor:NoiseFloor|None=None, hangover_ms:int=400):
+        """
+        Args:
+            noise_floor (NoiseFloor | None): Noise model of the source; None starts a new one.
+            hangover_ms (int): How long the gate stays open after the last loud frame.
+        """
+        self.noise_floor = noise_floor or NoiseFloor()
+        self.sample_rate = self.noise_floor.sample_rate
+        self.hangover = hangover_ms / 1000
+        self._open_for = 0.0
+
+    def is_speech(self, chunk:bytes) -> bool:
+        """Whether the gate is open for this chunk (it is speech, or follows speech within the hangover)."""
+        if self.noise_floor.observe(chunk):
+            self._open_for = self.hangover
+            return True
+        if self._open_for > 0:
+            self._open_for -= len(chunk) / 2 / self.sample_rate
+            return True
+        return False
+
+    def reset(self):
+        self.noise_floor.reset()
+        self._open_for = 0.0
+
+
+class HandoverSource:
+    """
+    Reads the chunks the spotter had not decoded yet when the wake word was heard, then
+    the source itself, so the command recognizer starts right where the wake word ended.
+    """
+
+    def __init__(self, chunks, source):
+        self._chunks = collections.deque(chunks)
+        self._source = source
+
+    def read(self) -> bytes | None:
+        return self._chunks.popleft() if self._chunks else self._source.read()
+
+    def drain(self):
+        self._chunks.clear()
+        self._source.drain()
+
+
+class WakeWordListener:
+    """
+    Continuous listening in three stages, each only running when the one before it fires:
+
+    1. EnergyGate on every chunk: a few numpy operations, so idling costs next to nothing.
+    2. A keyword spotter while the gate is open: a Vosk recognizer restricted to the wake
+       words, fed from a short pre-roll so the start of the word is not lost, and checked
+       on every partial hypothesis so it fires while the word is still being decoded.
+    3. The full command recognizer, for one phrase after a wake word.
+    """
+
+    def __init__(self, wake_words=WAKE_WORDS, model_path:str=DEFAULT_MODEL_PATH, gate:EnergyGate|None=None,
+                 pre_roll_ms:int=300, command_grammar:list|None=None):
+        """
+        Args:
+            wake_words (iterable): Words that wake the listener.
+            model_path (str): Vosk model directory (shared by the spotter and the command recognizer).
+            gate (EnergyGate | None): Voice activity gate; None uses the defaults.
+            pre_roll_ms (int): Audio from before the gate opened that is fed to the spotter.
+            command_grammar (list | None): Phrases to restrict command recognition to
+                                           (see CommandRouter.phrases); None for free speech.
+        """
+        self.wake_words = {word.lower() for word in wake_words}
+        self.model_path = model_path
+        self.command_grammar = command_grammar
+        self.gate = gate or EnergyGate()
+        self.pre_roll = collections.deque(maxlen=max(1, round(pre_roll_ms / CHUNK_MS)))
+        self.spotter = StreamingRecognizer(model_path, grammar=sorted(self.wake_words) + ["[unk]"])
+        self._command_recognizer = None
+        self._disarmed = False  # After a hit, until the gate closes: the rest of that speech is not a new wake word
+        self.handover = []  # Chunks read but not decoded when the last wake word was heard
+        self.stats = collections.Counter()
+        self._audio_seconds = 0.0
+        self._spotted_seconds = 0.0
+        self.detection_latency = LatencyStats()  # From the start of speech to the wake word hit
+        self.last_latency = None
+
+    @property
+    def command_recognizer(self) -> StreamingRecognizer:
+        if self._command_recognizer is None:
+            self._command_recognizer = StreamingRecognizer(self.model_path, grammar=self.command_grammar)
+        return self._command_recognizer
+
+    def _wake_word(self, text:str) -> str | None:
+        for word in text.lower().split():
+            if word in self.wake_words:
+                return word
+        return None
+
+    def wait_for_wake_word(self, source, timeout:float|None=None) -> str | None:
+        """
+        Read a source until a wake word is heard.
+
+        Args:
+            source: WavSource, MicrophoneSource or anything with read() returning PCM chunks.
+            timeout (float | None): Give up after this many seconds of audio.
+
+        Returns:
+            str | None: The wake word, or None on timeout or at the end of the source.
+        """
+        waited = 0.0
+        onset = None
+        self.pre_roll.clear()
+        self.handover = []
+        while True:
+            chunk = source.read()
+            if not chunk:
+                return None
+            duration = len(chunk) / 2 / self.gate.sample_rate
+            waited += duration
+            self._audio_seconds += duration
+            self.stats['chunks'] += 1
+
+            if not self.gate.is_speech(chunk):
+                self._disarmed = False
+                if onset is not None:
+                    onset = None
+                    self.stats['false_wakes'] += 1  # The gate opened for something else
+                self.pre_roll.append(chunk)
+                if timeout is not None and waited > timeout:
+                    return None
+                continue
+            if self._disarmed:
+                continue
+
+            if onset is None:
+                onset = waited - duration
+                self.stats['gate_openings'] += 1
+                self.spotter.reset()
+                chunks = [*self.pre_roll, chunk]
+                self.pre_roll.clear()
+            else:
+                chunks = [chunk]
+            for index, fed in enumerate(chunks):
+                start = time.perf_counter()
+                _, text = self.spotter.accept(fed)
+                self._spotted_seconds += len(fed) / 2 / self.gate.sample_rate
+                word = self._wake_word(text)
+                if word:
+                    # In audio time, which is wall time for a live microphone, plus the time to decode the chunk
+                    self.last_latency = waited - onset + time.perf_counter() - start
+                    self.detection_latency.add(self.last_latency)
+                    self.stats['wake_words'] += 1
+                    self.spotter.reset()
+                    self._disarmed = True
+                    self.handover = chunks[index + 1:]
+                    return word
+
+    def run(self, source, on_command, on_wake=None, command_timeout:float=5.0, phrase_time_limit:float=10.0):
+        """
+        Listen until the source ends: wait for a wake word, then recognize one command.
+        The command recognizer gets the audio right after the wake word, including what the
+        source buffered meanwhile, so "glasses where is my bottle" said in one go is not cut.
+
+        Args:
+            on_command (callable): Called with each recognized command ("" if nothing was said).
+            on_wake (callable | None): Called with the wake word as soon as it is heard.
+        """
+        while True:
+            word = self.wait_for_wake_word(source)
+            if word is None:
+                return
+            if on_wake:
+                on_wake(word)
+            on_command(self.command_recognizer.listen(HandoverSource(self.handover, source), timeout=command_timeout,
+                                                      phrase_time_limit=phrase_time_limit, drain=False))
+
+    def metrics(self) -> dict:
+        """Counters (chunks, gate_openings, wake_words, false_wakes), the share of audio the spotter decoded and detection latency."""
+        return dict(self.stats,
+                    spotter_duty=round(self._spotted_seconds / self._audio_seconds, 3) if self._audio_seconds else None,
+                    detection_latency=self.detection_latency.summary(),
+                    noise_floor=self.gate.noise_floor.metrics(),
+                    spotter=self.spotter.metrics())
+
+
+def measure(listener:WakeWordListener, path:str) -> dict:
+    """
+    Run the wake word stages over a recording as fast as they go.
+
+    Returns:
+        dict: Wake words heard, detection latency and CPU usage, as a percentage of one core
+              at real-time speed (process CPU time / audio duration).
+    """
+    source = WavSource(path)
+    listener.gate.reset()
+    heard, latencies = [], []
+    cpu = time.process_time()
+    while (word := listener.wait_for_wake_word(source)) is not None:
+        heard.append(word)
+        latencies.append(round(listener.last_latency * 1000))
+    cpu = time.process_time() - cpu
+    return {
+        'file': os.path.basename(path),
+        'seconds': round(source.duration, 2),
+        'wake_words': heard,
+        'latency_ms': latencies,
+        'cpu_percent': round(100 * cpu / source.duration, 2),
+    }
+
+
+def measure_gate(gate:EnergyGate, path:str) -> dict:
+    """
+    Run only the energy gate over a recording (no Vosk model needed): how often it opens and
+    how much of the audio it would pass on to the spotter.
+
+    Returns:
+        dict: Gate openings, the share of the audio the gate was open for and CPU usage (as in measure()).
+    """
+    source = WavSource(path)
+    gate.reset()
+    openings, open_seconds, was_open = 0, 0.0, False
+    cpu = time.process_time()
+    while (chunk := source.read()) is not None:
+        is_open = gate.is_speech(chunk)
+        if is_open:
+            open_seconds += len(chunk) / 2 / gate.sample_rate
+            openings += not was_open
+        was_open = is_open
+    cpu = time.process_time() - cpu
+    return {
+        'file': os.path.basename(path),
+        'seconds': round(source.duration, 2),
+        'gate_openings': openings,
+        'open_share': round(open_seconds / source.duration, 3),
+        'cpu_percent': round(100 * cpu / source.duration, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the wake word listener on WAV recordings, or its idle CPU usage on the microphone")
+    parser.add_argument("wavs", nargs="*", help="WAV recordings (with and without wake words; default: the files in Sample_Audio)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Vosk model directory")
+    parser.add_argument("--wake-words", default=",".join(WAKE_WORDS), help="Comma separated wake words")
+    parser.add_argument("--idle", type=float, metavar="SECONDS", help="Listen on the microphone for this long and report CPU usage")
+    parser.add_argument("--gate-only", action="store_true", help="Only measure the energy gate (no Vosk model needed)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    paths = args.wavs or ([] if args.idle else sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.wav"))))
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec="seconds"),
+        'machine': {'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+                    'python': platform.python_version()},
+        'stages': "gate" if args.gate_only else "gate, spotter",
+        'results': [],
+    }
+    if args.gate_only:
+        gate = EnergyGate()
+        for path in paths:
+            report['results'].append(measure_gate(gate, path))
+            print(report['results'][-1])
+    else:
+        listener = WakeWordListener(args.wake_words.split(","), args.model)
+        for path in paths:
+            report['results'].append(measure(listener, path))
+            print(report['results'][-1])
+        if args.idle:
+            with MicrophoneSource() as source:
+                wall, cpu = time.perf_counter(), time.process_time()
+                heard = listener.wait_for_wake_word(source, timeout=args.idle)
+                wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            report['idle'] = {'idle_seconds': round(wall, 1), 'cpu_percent': round(100 * cpu / wall, 2), 'wake_word': heard}
+            print(report['idle'])
+        report['metrics'] = listener.metrics()
+        print(report['metrics'])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import collections
+import threading
+
+import numpy as np
+
+
+class LatencyStats:
+    """Rolling latency statistics (count, mean, p50, p95, max) over the last `window` samples."""
+
+    def __init__(self, window: int = 200):
+        self._samples = collections.deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = np.array(self._samples)
+        if samples.size == 0:
+            return {'count': self.count}
+        return {
+            'count': self.count,
+            'mean_ms': round(float(samples.mean()) * 1000, 1),
+            'p50_ms': round(float(np.percentile(samples, 50)) * 1000, 1),
+            'p95_ms': round(float(np.percentile(samples, 95)) * 1000, 1),
+            'max_ms': round(float(samples.max()) * 1000, 1),
+        }
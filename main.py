@@ -1,9 +1,16 @@
 import Input_Manager.InputManager as InputManager
 from Object_Detection_Module.Obj_Detection import YOLODetector as ObjectDetector
-from OCR_Module.OCR_Processor import OCRProcessor
+from OCR_Module.ocr_profiles import OCRProfiles
+from OCR_Module.annotation_output import AnnotationOutput
+from OCR_Module.code_reader import CodeReader, speech_text
 from Currency_Module.curr import YOLODetector as CurrencyDetector
+from Color_Detection.Color_Detection import colordetector
 from Camera_Module.CameraModule import CameraModule
+from Speech_Module.command_router import CommandRouter, object_values
+from Speech_Module.streaming_recognizer import MicrophoneSource
+from Speech_Module.wake_word import WakeWordListener
 
+import threading
 import cv2
 import numpy
 
@@ -22,62 +29,180 @@ NEXT_TRACK = -176       # For Object Detection
 PREV_TRACK = -177       # For OCR
 PLAY_PAUSE = -179       # For Currency Detection
 
+OBJECT_MODEL = "Object_Detection_Module/VOC_n100_runs/best.pt"
+COLOR_MODEL = "Color_Detection/yolo11n.pt"
+
+# Fixed phrases, rendered ahead of time so they play without waiting for speech synthesis
+SPEECH_PHRASES = [
+    "System ready. Listening for headset buttons.",
+    "Running object detection", "No objects detected", "Object detection error",
+    "Running OCR", "No text detected", "OCR error",
+    "Running currency detection", "No currency detected", "Currency detection error",
+    "Running color detection", "Color detection error",
+    "Sorry, I did not understand",
+]
+
+# Show OCR annotations in a window (saving and display run in the background)
+SHOW_OCR_WINDOW = False
+
+# Listen for spoken commands after "glasses" or "assistant" (needs a Vosk model, see README)
+VOICE_COMMANDS = True
+
 def main():
+    input_manager = ocr_profiles = annotation_output = None
     try:
-        input_manager = InputManager.InputManager()
+        input_manager = InputManager.InputManager(speech_phrases=SPEECH_PHRASES)
+        ocr_profiles = OCRProfiles()  # Created once so the Tesseract engines stay loaded between presses
+        code_reader = CodeReader()
+        annotation_output = AnnotationOutput(save_path="OCR_Module/annotated_image.jpg", display=SHOW_OCR_WINDOW)
+        precached_models = set()
+
+        def precache_labels(model_path, detector):
+            """Queue the "<label> detected" phrases of a model for rendering, the first time it is loaded."""
+            if model_path not in precached_models:
+                precached_models.add(model_path)
+                input_manager.speech_engine.precache(f"{name} detected" for name in detector.model.names.values())
+
+        def cancelled():
+            """True once a newer action superseded the one running on this thread; its handler should stop."""
+            return input_manager.dispatcher.cancelled()
+
+        def read_line(text):
+            """Speak one line of a page being read aloud; it waits however long the page is, until the next action."""
+            return input_manager.speak(text, max_age=InputManager.NO_EXPIRY)
+
+        def detect_objects(target=None):
+            """Object detection; with a target class ("chair"), only say whether that object is in view."""
+            try:
+                input_manager.speak("Running object detection", InputManager.STATUS, flush=True)
+                InputManager.HapticFeedback.short_pulse()
+                detector = ObjectDetector(OBJECT_MODEL)
+                precache_labels(OBJECT_MODEL, detector)
+                current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
+                cv2.imwrite("Object_Detection_Module/current_image.jpg", current_image)
+                detector.run_inference(current_image)
+                detections = detector.process_results(normalize=True)
+                detector.visualize_detections("Object_Detection_Module/current_image.jpg", detections, "Object_Detection_Module/output_visualized.jpg")
+                if target is not None:
+                    detections = [det for det in detections if det['text'] == target]
+                if cancelled():
+                    return
+                if detections:
+                    for det in detections:
+                        if cancelled():
+                            return
+                        input_manager.speak(f"{det['text']} detected")
+                else:
+                    input_manager.speak(f"No {target} detected" if target else "No objects detected")
+            except Exception as e:
+                input_manager.speak(f"Object detection error")
+                logger.error(f"Object detection error: {e}")
+
+        def read_text():
+            try:
+                input_manager.speak("Running OCR", InputManager.STATUS, flush=True)
+                InputManager.HapticFeedback.short_pulse()
+                current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
+                # A QR code or barcode usually encodes the text the user wants and decodes in milliseconds
+                codes = code_reader.read(current_image)
+                for code in codes:
+                    input_manager.speak(speech_text(code))
+                if codes:
+                    return
+                # Each line is spoken as soon as it is recognized, in reading order
+                lines = ocr_profiles.read_aloud(current_image, read_line, "document", cancelled=cancelled)
+                if cancelled():
+                    return
+                if not lines:
+                    input_manager.speak("No text detected")
+                annotation_output.publish(current_image, [word for line in lines for word in line['words']])
+            except Exception as e:
+                input_manager.speak("OCR error")
+                logger.error(f"OCR error: {e}")
+
+        def detect_currency():
+            try:
+                input_manager.speak("Running currency detection", InputManager.STATUS, flush=True)
+                InputManager.HapticFeedback.short_pulse()
+                detector = CurrencyDetector("Currency_Module/cur_n100_runs/best.pt")
+                precache_labels("Currency_Module/cur_n100_runs/best.pt", detector)
+                current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
+                cv2.imwrite("Currency_Module/current_image.jpg", current_image)
+                detector.run_inference(current_image)
+                detections = detector.process_results(normalize=True)
+                detector.visualize_detections("Currency_Module/current_image.jpg", detections, "Currency_Module/output_visualized.jpg")
+                if cancelled():
+                    return
+                if detections:
+                    for det in detections:
+                        if cancelled():
+                            return
+                        input_manager.speak(f"{det['text']} detected")
+                else:
+                    input_manager.speak("No currency detected")
+            except Exception as e:
+                input_manager.speak("Currency detection error")
+                logger.error(f"Currency detection error: {e}")
+
+        def detect_color():
+            """Name the color of each object in view ("red car")."""
+            try:
+                input_manager.speak("Running color detection", InputManager.STATUS, flush=True)
+                InputManager.HapticFeedback.short_pulse()
+                detector = colordetector(COLOR_MODEL)
+                current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
+                detections = detector.detect(current_image)
+                if cancelled():
+                    return
+                if detections:
+                    for det in detections:
+                        if cancelled():
+                            return
+                        input_manager.speak(f"{det['color']} {det['label']}")
+                else:
+                    input_manager.speak("No objects detected")
+            except Exception as e:
+                input_manager.speak("Color detection error")
+                logger.error(f"Color detection error: {e}")
 
         def handle_single_press(scan_code):
             if scan_code == NEXT_TRACK:
-                try:
-                    input_manager.speak("Running object detection")
-                    InputManager.HapticFeedback.short_pulse()
-                    detector = ObjectDetector("Object_Detection_Module/VOC_n100_runs/best.pt")
-                    current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
-                    cv2.imwrite("Object_Detection_Module/current_image.jpg", current_image)
-                    detector.run_inference(current_image)
-                    detections = detector.process_results(normalize=True)
-                    detector.visualize_detections("Object_Detection_Module/current_image.jpg", detections, "Object_Detection_Module/output_visualized.jpg")
-                    if detections:
-                        for det in detections:
-                            input_manager.speak(f"{det['text']} detected")
-                    else:
-                        input_manager.speak("No objects detected")
-                except Exception as e:
-                    input_manager.speak(f"Object detection error")
-                    logger.error(f"Object detection error: {e}")
-
+                detect_objects()
             elif scan_code == PREV_TRACK:
-                try:
-                    input_manager.speak("Running OCR")
-                    InputManager.HapticFeedback.short_pulse()
-                    ocr_processor = OCRProcessor()
-                    current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
-                    cv2.imwrite("OCR_Module/current_image.jpg", current_image)
-                    ocr_processor.ocr_on_image("OCR_Module/current_image.jpg")
-                    ocr_processor.save_annotated_image("OCR_Module/annotated_image.jpg")
-                    ocr_processor.display_annotated_image("OCR_Module/annotated_image.jpg")
-                except Exception as e:
-                    input_manager.speak("OCR error")
-                    logger.error(f"OCR error: {e}")
-
+                read_text()
             elif scan_code == PLAY_PAUSE:
-                try:
-                    input_manager.speak("Running currency detection")
-                    InputManager.HapticFeedback.short_pulse()
-                    detector = CurrencyDetector("Currency_Module/cur_n100_runs/best.pt")
-                    current_image = numpy.array(Camera.get_image(), dtype=numpy.uint8)
-                    cv2.imwrite("Currency_Module/current_image.jpg", current_image)
-                    detector.run_inference(current_image)
-                    detections = detector.process_results(normalize=True)
-                    detector.visualize_detections("Currency_Module/current_image.jpg", detections, "Currency_Module/output_visualized.jpg")
-                    if detections:
-                        for det in detections:
-                            input_manager.speak(f"{det['text']} detected")
-                    else:
-                        input_manager.speak("No currency detected")
-                except Exception as e:
-                    input_manager.speak("Currency detection error")
-                    logger.error(f"Currency detection error: {e}")
+                detect_currency()
+
+        def build_command_router(object_classes):
+            """Voice commands run the same actions as the buttons, on the same dispatcher."""
+            command_router = CommandRouter(slots={'object': object_values(object_classes)})
+            command_router.register('detect_objects', lambda command: input_manager.dispatch(command.intent, detect_objects))
+            command_router.register('find_object', lambda command: input_manager.dispatch(command.intent, detect_objects, command.slots['object']))
+            command_router.register('read_text', lambda command: input_manager.dispatch(command.intent, read_text))
+            command_router.register('count_money', lambda command: input_manager.dispatch(command.intent, detect_currency))
+            command_router.register('detect_color', lambda command: input_manager.dispatch(command.intent, detect_color))
+            command_router.register('stop', lambda command: input_manager.cancel_actions())
+            return command_router
+
+        def listen_for_voice_commands():
+            try:
+                # Objects can only be found by the names the detection model gives its classes
+                # ("find the table" looks for "diningtable")
+                command_router = build_command_router(ObjectDetector(OBJECT_MODEL).model.names.values())
+                # Recognition is restricted to the command phrases: faster and fewer misheard commands
+                listener = WakeWordListener(command_grammar=command_router.phrases())
+                source = MicrophoneSource()
+            except Exception as e:
+                logger.info(f"Voice commands unavailable: {e}")
+                return
+            def on_command(command):
+                if command and not command_router.route(command):
+                    input_manager.speak("Sorry, I did not understand")
+            with source:
+                listener.run(source, on_command, on_wake=lambda word: InputManager.HapticFeedback.short_pulse())
+
+        if VOICE_COMMANDS:
+            threading.Thread(target=listen_for_voice_commands, daemon=True).start()
 
         # Register handler
         input_manager.set_action_handler('single', handle_single_press)
@@ -86,12 +211,21 @@ def main():
         input_manager.start(scan_codes=[NEXT_TRACK, PREV_TRACK, PLAY_PAUSE])
 
         while True:
+            annotation_output.show()  # OpenCV windows must be driven from the main thread
             InputManager.time.sleep(0.1)
 
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
+    finally:
+        # Close the OCR window and worker processes, unhook the keys and stop the worker and speech threads
+        if annotation_output is not None:
+            annotation_output.stop()
+        if ocr_profiles is not None:
+            ocr_profiles.close()
+        if input_manager is not None:
+            input_manager.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
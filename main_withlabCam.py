@@ -1,6 +1,8 @@
 import Input_Manager.InputManager as InputManager
 from Object_Detection_Module.Obj_Detection import YOLODetector as ObjectDetector
-from OCR_Module.OCR_Processor import OCRProcessor
+from OCR_Module.ocr_profiles import OCRProfiles
+from OCR_Module.annotation_output import AnnotationOutput
+from OCR_Module.code_reader import CodeReader, speech_text
 from Currency_Module.curr import YOLODetector as CurrencyDetector
 from Camera_Module.LabCameraModule import LabCameraModule
 from Color_Detection.Color_Detection import colordetector
@@ -19,14 +21,22 @@ for handler in logger.handlers:
     handler.setLevel(level)
 
 def main():
+    input_manager = ocr_profiles = annotation_output = None
     try:
         input_manager = InputManager.InputManager()
+        ocr_profiles = OCRProfiles()  # Created once so the Tesseract engines stay loaded between presses
+        code_reader = CodeReader()
+        annotation_output = AnnotationOutput(save_path="OCR_Module/annotated_image.jpg", display=True)
         keys = list(input_manager.key_detectors.keys())
         key1 = keys[0]
         key2 = keys[1]
         logger.info(f"Listening for key presses: {key1} and {key2}")
         logger.info("Press Ctrl+C to exit.")
 
+        def read_line(text):
+            """Speak one line of a page being read aloud; it waits however long the page is, until the next action."""
+            return input_manager.speak(text, max_age=InputManager.NO_EXPIRY)
+
         # EXAMPLE: Customize action handlers
         # def custom_single_handler(key):
         #     HapticFeedback.short_pulse()
@@ -53,7 +63,7 @@ def main():
 
             if key == key1:
                 try:
-                    input_manager.speak("Running object detection")
+                    input_manager.speak("Running object detection", InputManager.STATUS, flush=True)
                     detector = ObjectDetector("Object_Detection_Module/VOC_n100_runs/best.pt")
 
                     current_image = numpy.array(Camera.get_image(),dtype=numpy.uint8)
@@ -80,7 +90,7 @@ def main():
 
             elif key == key2:
                 try:
-                    input_manager.speak("Running currency detection")
+                    input_manager.speak("Running currency detection", InputManager.STATUS, flush=True)
                     detector = CurrencyDetector("Currency_Module/cur_n100_runs/best.pt")
                     
                     current_image = numpy.array(Camera.get_image(),dtype=numpy.uint8)
@@ -115,27 +125,39 @@ def main():
 
             if key == key1:
                 try:
-                    input_manager.speak("Color Detection")
-                    detector = colordetector("C:/Users/mahmoy2/OneDrive - Medtronic PLC/Downloads/Graduation-Project-Smart-Glasses/Color_Detection/yolo11n.pt")
-                    detector.run_inference(Camera.get_image())
-                    detections = detector.process_results(normalize=True)
-                    detector.visualize_detections("Color_Detection_Module/cars_on_road.jpeg", detections, "Color_Detection_Module/output_visualized.jpg")
-                except:
+                    input_manager.speak("Color Detection", InputManager.STATUS, flush=True)
+                    detector = colordetector("Color_Detection/yolo11n.pt")
+                    current_image = numpy.array(Camera.get_image(),dtype=numpy.uint8)
+                    detections = detector.detect(current_image)
+
+                    print(detections,"\n")
+
+                    if detections:
+                        for det in detections:
+                            input_manager.speak(f"{det['color']} {det['label']}")
+                    else:
+                        input_manager.speak("No objects detected")
+                except Exception as e:
                     input_manager.speak("Error running color detection")
-                    logger.error("Error running color detection")
+                    logger.error(f"Error running color detection: {str(e)}")
 
             elif key == key2:
                 try:
-                    input_manager.speak("Running OCR")
-                    ocr_processor = OCRProcessor()
+                    input_manager.speak("Running OCR", InputManager.STATUS, flush=True)
 
                     current_image = numpy.array(Camera.get_image(),dtype=numpy.uint8)
-                    cv2.imwrite("OCR_Module/current_image.jpg", current_image)
-                    current_image_path = "OCR_Module/current_image.jpg"
-
-                    ocr_processor.ocr_on_image(current_image_path)
-                    ocr_processor.save_annotated_image("OCR_Module/annotated_image.jpg")
-                    ocr_processor.display_annotated_image("OCR_Module/annotated_image.jpg")
+                    # A QR code or barcode usually encodes the text the user wants and decodes in milliseconds
+                    codes = code_reader.read(current_image)
+                    for code in codes:
+                        input_manager.speak(speech_text(code))
+                    if codes:
+                        return
+                    # Each line is spoken as soon as it is recognized
+                    lines = ocr_profiles.read_aloud(current_image, read_line, "document",
+                                                    cancelled=input_manager.dispatcher.cancelled)
+                    if not lines:
+                        input_manager.speak("No text detected")
+                    annotation_output.publish(current_image, [word for line in lines for word in line['words']])
                 except Exception as e:
                     input_manager.speak(f"Error running OCR: {str(e)}")
                     logger.error(f"Error running OCR: {str(e)}")
@@ -149,7 +171,7 @@ def main():
             InputManager.HapticFeedback.long_pulse()
             if key == key1:
                 try:
-                    input_manager.speak("Running object detection")
+                    input_manager.speak("Running object detection", InputManager.STATUS, flush=True)
                     detector = ObjectDetector("Object_Detection_Module/VOC_n100_runs/best.pt")
                     detector.run_inference(Camera.get_image())
                     detections = detector.process_results(normalize=True)
@@ -160,10 +182,12 @@ def main():
 
             elif key == key2:
                 try:
-                    input_manager.speak("Running OCR")
-                    ocr_processor = OCRProcessor()
-                    ocr_processor.ocr_on_image(Camera.get_image())
-                    ocr_processor.display_annotated_image("Object_Detection_Module/cars_on_road.jpeg")
+                    input_manager.speak("Running OCR", InputManager.STATUS, flush=True)
+                    current_image = numpy.array(Camera.get_image(),dtype=numpy.uint8)
+                    # Short text in the scene (signs, door plates): no page layout analysis
+                    words = ocr_profiles.recognize(current_image, "sign")
+                    input_manager.speak(" ".join(word['text'] for word in words) if words else "No text detected")
+                    annotation_output.publish(current_image, words)
                 except Exception as e:
                     input_manager.speak(f"Error running OCR: {str(e)}")
                     logger.error(f"Error running OCR: {str(e)}")
@@ -177,6 +201,7 @@ def main():
         input_manager.start()
         
         while True:
+            annotation_output.show()  # OpenCV windows must be driven from the main thread
             InputManager.time.sleep(0.1)
             
     except KeyboardInterrupt:
@@ -184,6 +209,14 @@ def main():
     
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
+    finally:
+        # Close the OCR window and worker processes, unhook the keys and stop the worker and speech threads
+        if annotation_output is not None:
+            annotation_output.stop()
+        if ocr_profiles is not None:
+            ocr_profiles.close()
+        if input_manager is not None:
+            input_manager.stop()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,32 @@
 import speech_recognition as sr
 
+from Speech_Module.noise_floor import shared_noise_floor
+from Speech_Module.streaming_recognizer import shared_listener
+
 def listen_for_search_query(prompt="What are you looking for?"):
+    listener = shared_listener()
+    if listener is not None:
+        recognizer, source = listener
+        print(prompt)
+        print("Listening...")
+        query = recognizer.listen(source, timeout=5)
+        if not query:
+            print("Sorry, I could not understand the audio.")
+            return None
+        print(f"You said: {query}")
+        return query
+
     recognizer = sr.Recognizer()
     microphone = sr.Microphone()
+    noise_floor = shared_noise_floor()
 
     print(prompt)
     with microphone as source:
-        recognizer.adjust_for_ambient_noise(source)
+        if noise_floor is not None:
+            recognizer.energy_threshold = noise_floor.threshold()
+            recognizer.dynamic_energy_threshold = False
+        else:
+            recognizer.adjust_for_ambient_noise(source)
         print("Listening...")
         audio = recognizer.listen(source, timeout=5)
 
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+
+from Color_Detection.color_cli import load_records, prepare_resume
+
+
+def write_lines(path, lines):
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+
+def test_resume_retries_failures_and_keeps_one_record_per_image(tmp_path):
+    output = str(tmp_path / "colors.jsonl")
+    write_lines(output, [
+        json.dumps({"image_path": "a.jpg", "detected_objects": []}) + "\n",
+        json.dumps({"image_path": "b.jpg", "detected_objects": [], "error": "timeout"}) + "\n",
+        '{"image_path": "c.jp',  # Cut off by the interruption
+    ])
+
+    done, pending = prepare_resume(output, ["a.jpg", "b.jpg", "c.jpg"])
+
+    assert done == 1
+    assert pending == ["b.jpg", "c.jpg"]
+    with open(output) as f:
+        assert [json.loads(line)["image_path"] for line in f] == ["a.jpg"]
+
+    # The retried image succeeds this time; the file ends up with one record for it
+    with open(output, "a") as f:
+        f.write(json.dumps({"image_path": "b.jpg", "detected_objects": []}) + "\n")
+    records = load_records(output)
+    assert list(records) == ["a.jpg", "b.jpg"]
+    assert "error" not in records["b.jpg"]
+
+
+def test_readers_keep_the_last_record_of_an_image(tmp_path):
+    output = str(tmp_path / "colors.jsonl")
+    write_lines(output, [
+        json.dumps({"image_path": "a.jpg", "detected_objects": [], "error": "timeout"}) + "\n",
+        json.dumps({"image_path": "a.jpg", "detected_objects": [{"label": "cup"}]}) + "\n",
+    ])
+
+    records = load_records(output)
+
+    assert records["a.jpg"]["detected_objects"] == [{"label": "cup"}]
+    assert "error" not in records["a.jpg"]
+
+
+def test_resume_without_output_file_processes_everything(tmp_path):
+    output = str(tmp_path / "colors.jsonl")
+
+    assert prepare_resume(output, ["a.jpg"]) == (0, ["a.jpg"])
@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from OCR_Module.ocr_benchmark import build_configs, config_name, print_table
+
+
+def test_grid_only_varies_the_settings_a_mode_uses():
+    configs = build_configs(["full", "lines", "regions"], ["adaptive", "otsu"], [3, 6], [None, 2.0])
+    names = [config_name(c) for c in configs]
+
+    assert len(names) == len(set(names))
+    assert sum(c['mode'] == "full" for c in configs) == 8
+    assert [config_name(c) for c in configs if c['mode'] == "lines"] == [
+        "lines/adaptive/scale-auto", "lines/adaptive/scale-2",
+        "lines/otsu/scale-auto", "lines/otsu/scale-2"]
+    assert [config_name(c) for c in configs if c['mode'] == "regions"] == ["regions"]
+
+
+def test_print_table_shows_missing_values(capsys):
+    results = [
+        {'name': "full/adaptive/psm3/scale-auto", 'cer': None, 'wer': None, 'latency': None},
+        {'name': "lines/adaptive/scale-auto", 'cer': 0.1, 'wer': 0.2,
+         'latency': {'p50_ms': 12.0, 'p95_ms': None}},
+    ]
+    baseline = {'results': [{'name': "lines/adaptive/scale-auto", 'cer': 0.2, 'wer': None, 'latency': None}]}
+
+    print_table(results, baseline)
+
+    rows = capsys.readouterr().out.splitlines()[1:]
+    assert rows[0].split()[1:] == ["n/a"] * 4
+    assert rows[1].split()[1:] == ["0.100", "(-0.100)", "0.200", "12.0", "n/a"]
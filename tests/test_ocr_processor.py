@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import OCR_Module.OCR_Processor as ocr_processor
+from OCR_Module.OCR_Processor import OCRProcessor
+
+
+class FakeEngine:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_releases_pooled_line_engines(monkeypatch):
+    created = []
+
+    def create_engine(*args, **kwargs):
+        created.append(FakeEngine())
+        return created[-1]
+
+    monkeypatch.setattr(ocr_processor, "create_engine", create_engine)
+    ocr = OCRProcessor()
+    used = []
+
+    def ocr_line(page, box, block_height, conf_threshold, psm, engine):
+        used.append(engine)
+        if len(used) == 1:
+            # A second line read while the first holds the engine gets an engine of its own
+            ocr._ocr_line_pooled(page, box, block_height, conf_threshold, psm)
+        return []
+
+    ocr._ocr_line = ocr_line
+    ocr._ocr_line_pooled(None, None, 0, 60, None)
+    assert used[0] is not used[1]
+
+    ocr.close()
+
+    assert len(created) == 2
+    assert all(engine.closed for engine in created)
+
+
+def test_close_leaves_a_passed_engine_open():
+    engine = FakeEngine()
+    ocr = OCRProcessor(engine=engine)
+
+    ocr.close()
+
+    assert not engine.closed
+
+
+def test_read_aloud_leaves_the_line_psm_to_the_processor_unless_the_profile_sets_one(monkeypatch):
+    from OCR_Module.ocr_profiles import OCRProfiles
+
+    profiles = OCRProfiles(profiles={'labels': {'psm': 11, 'mode': "full", 'preprocessing': "adaptive", 'lang': "eng",
+                                                'variables': {}, 'conf_threshold': 60, 'line_psm': 13}})
+    psms = []
+
+    def read_aloud(image, speak, conf_threshold, workers, psm=None, cancelled=None):
+        psms.append(psm)
+        return []
+
+    for name in ("document", "labels"):
+        monkeypatch.setattr(profiles.processor(name), "read_aloud", read_aloud)
+        profiles.read_aloud(None, print, name)
+
+    assert psms == [None, 13]
+
+
+def test_read_aloud_stops_once_cancelled():
+    ocr = OCRProcessor(engine=FakeEngine())
+    closed = []
+
+    def iter_lines(image, conf_threshold, workers, psm):
+        try:
+            for index in range(10):
+                yield {'index': index, 'text': f"line {index}", 'words': []}
+        finally:
+            closed.append(True)
+
+    ocr.iter_lines = iter_lines
+    spoken = []
+
+    lines = ocr.read_aloud(None, spoken.append, cancelled=lambda: len(spoken) == 3)
+
+    assert spoken == ["line 0", "line 1", "line 2"]
+    assert len(lines) == 3
+    assert closed == [True]
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import threading
+import wave
+
+import pytest
+
+from Input_Manager.phrase_cache import PhraseCache
+
+
+def write_wav(path, seconds=0.05, rate=8000):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def test_hits_are_only_counted_once_playback_started(tmp_path):
+    cache = PhraseCache(str(tmp_path))
+    key = cache.key("Person ahead", 150)
+    write_wav(cache.path(key))
+    assert cache.add(key)
+
+    assert cache.get("person  AHEAD", 150) == cache.path(key)
+    assert cache.get("person ahead", 200) is None
+    assert cache.metrics()['hit_rate'] == 0
+    cache.played(True)
+    assert cache.get("person ahead", 150) is not None
+    cache.played(False)
+
+    metrics = cache.metrics()
+    assert (metrics['lookups'], metrics['hits'], metrics['misses'], metrics['play_failures']) == (3, 1, 1, 1)
+
+
+def test_invalid_files_are_dropped(tmp_path):
+    cache = PhraseCache(str(tmp_path))
+    key = cache.key("stop", 150)
+    with open(cache.path(key), "wb") as f:
+        f.write(b"not audio")
+    assert not cache.add(key)
+    assert not os.path.exists(cache.path(key))
+
+    with open(cache.path(key), "wb") as f:
+        f.write(b"x" * 100)
+    cache = PhraseCache(str(tmp_path))  # found by the disk scan, checked on first use
+    assert cache.get("stop", 150) is None
+    assert key not in cache
+
+
+class FakeWinsound:
+    SND_FILENAME, SND_NODEFAULT, SND_ASYNC, SND_MEMORY = 0x20000, 0x2, 0x1, 0x4
+
+    def __init__(self):
+        self.calls = []
+
+    def PlaySound(self, sound, flags):
+        if flags & self.SND_MEMORY and flags & self.SND_ASYNC:
+            raise RuntimeError("Cannot play asynchronously from memory")
+        self.calls.append((sound, flags))
+
+
+def test_play_wav_plays_the_file_asynchronously(tmp_path, monkeypatch):
+    pytest.importorskip("pyttsx3")
+    from Input_Manager import speech_backend
+
+    winsound = FakeWinsound()
+    monkeypatch.setattr(speech_backend, "winsound", winsound)
+    path = str(tmp_path / "phrase.wav")
+    write_wav(path, seconds=5)
+    interrupt = threading.Event()
+    interrupt.set()
+
+    assert speech_backend.play_wav(path, interrupt) is not None
+    assert winsound.calls == [(path, FakeWinsound.SND_FILENAME | FakeWinsound.SND_NODEFAULT | FakeWinsound.SND_ASYNC),
+                              (None, 0)]
+    assert speech_backend.play_wav(str(tmp_path / "missing.wav"), interrupt) is None
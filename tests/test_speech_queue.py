@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import queue
+import types
+
+import pytest
+
+from Input_Manager import speech_queue
+from Input_Manager.speech_queue import NO_EXPIRY, RESULT, STATUS, SpeechQueue, cancel_speech
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(speech_queue, "time", types.SimpleNamespace(perf_counter=lambda: clock.now))
+    return clock
+
+
+def read_page(speech, clock, seconds_per_line):
+    said = []
+    while speech.depth():
+        try:
+            item = speech.get(timeout=0)
+        except queue.Empty:
+            break
+        clock.now += seconds_per_line
+        said.append(item.text)
+        speech.done(True)
+    return said
+
+
+def test_long_page_is_read_to_the_end(clock):
+    speech = SpeechQueue()
+    futures = [speech.put(f"line {i}", RESULT, max_age=NO_EXPIRY) for i in range(40)]
+
+    said = read_page(speech, clock, seconds_per_line=3.0)  # Two minutes of speech
+
+    assert said == [f"line {i}" for i in range(40)]
+    assert all(future.result(0) for future in futures)
+    assert speech.metrics().get('expired', 0) == 0
+
+
+def test_results_expire_by_default(clock):
+    speech = SpeechQueue()
+    futures = [speech.put(f"line {i}", RESULT) for i in range(40)]
+
+    said = read_page(speech, clock, seconds_per_line=3.0)
+
+    assert len(said) == 11  # The line taken at 30 s is still said, later ones are dropped
+    assert futures[-1].cancelled()
+    assert speech.metrics()['expired'] == 29
+
+
+def test_flush_drops_lines_without_expiry(clock):
+    speech = SpeechQueue()
+    lines = [speech.put(f"line {i}", RESULT, max_age=NO_EXPIRY) for i in range(5)]
+
+    speech.put("Running object detection", STATUS, flush=True)
+
+    assert all(future.cancelled() for future in lines)
+    assert read_page(speech, clock, seconds_per_line=1.0) == ["Running object detection"]
+
+
+def test_cancel_only_drops_queued_text_and_interrupt_cuts_it_off(clock):
+    speech = SpeechQueue()
+    playing = speech.put("first")
+    queued = speech.put("second")
+    assert speech.get(timeout=0).text == "first"
+
+    assert not playing.cancel()
+    assert not speech.interrupt.is_set()
+    assert not queued.interrupt()
+    assert playing.interrupt()
+    assert speech.interrupt.is_set()
+    speech.done(False)
+    assert playing.result(0) is False and not playing.cancelled()
+
+    assert cancel_speech(queued)
+    assert queued.cancelled()
+    assert speech.metrics()['interrupted'] == 1
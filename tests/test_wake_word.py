@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import types
+import wave
+
+import numpy as np
+import pytest
+
+from Speech_Module import streaming_recognizer
+from Speech_Module.streaming_recognizer import SAMPLE_RATE, WavSource
+from Speech_Module.wake_word import HandoverSource, WakeWordListener, measure
+
+# Real spotter latency and CPU need a Vosk model and a recorded wake word; these tests run the
+# listener on a synthetic recording with a stand-in recognizer that hears tones as words.
+TONE_WORDS = {1000: "glasses", 600: "bottle"}
+
+
+class ToneRecognizer:
+    """Stands in for vosk.KaldiRecognizer: each run of a loud tone is one word, quiet ends the phrase."""
+
+    def __init__(self, model, sample_rate):
+        self.grammar = None
+        self.Reset()
+
+    def SetGrammar(self, grammar):
+        self.grammar = set(" ".join(json.loads(grammar)).split())
+
+    def Reset(self):
+        self.words, self.tone, self.result = [], None, ""
+
+    def AcceptWaveform(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        if samples.std() > 1000:
+            tone = int(round(np.argmax(np.abs(np.fft.rfft(samples))) * SAMPLE_RATE / samples.size, -2))
+            word = TONE_WORDS.get(tone)
+            if tone != self.tone and word and (self.grammar is None or word in self.grammar):
+                self.words.append(word)
+            self.tone = tone
+            return False
+        self.tone = None
+        if not self.words:
+            return False
+        self.result, self.words = " ".join(self.words), []
+        return True
+
+    def Result(self):
+        return json.dumps({'text': self.result})
+
+    def PartialResult(self):
+        return json.dumps({'partial': " ".join(self.words)})
+
+    def FinalResult(self):
+        text, self.words = " ".join(self.words), []
+        return json.dumps({'text': text})
+
+
+@pytest.fixture
+def tone_model(monkeypatch):
+    monkeypatch.setitem(sys.modules, "vosk", types.SimpleNamespace(KaldiRecognizer=ToneRecognizer))
+    monkeypatch.setattr(streaming_recognizer, "load_model", lambda model_path: None)
+
+
+def write_recording(path, parts):
+    """A quiet room with tones in it: parts are (seconds, tone frequency or None)."""
+    rng = np.random.default_rng(46)
+    audio = []
+    for seconds, frequency in parts:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        chunk = rng.normal(0, 30, t.size)
+        if frequency:
+            chunk += 6000 * np.sin(2 * np.pi * frequency * t)
+        audio.append(chunk)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(np.concatenate(audio).astype("<i2").tobytes())
+    return path
+
+
+@pytest.fixture
+def wake_word_recording(tmp_path):
+    """The wake word "glasses" followed by "bottle" without a pause, between two seconds of quiet."""
+    return write_recording(str(tmp_path / "glasses_bottle.wav"), [(2.0, None), (0.4, 1000), (0.5, 600), (2.0, None)])
+
+
+class DrainCountingSource(WavSource):
+    """A WavSource that records drain() calls, which on a live microphone would discard the buffered command."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.drains = 0
+
+    def drain(self):
+        self.drains += 1
+
+
+def test_measure_reports_latency_and_cpu(tone_model, wake_word_recording):
+    result = measure(WakeWordListener(), wake_word_recording)
+
+    assert result['wake_words'] == ["glasses"]
+    assert 0 < result['latency_ms'][0] <= 200  # Heard in the first chunk of the word
+    assert result['cpu_percent'] >= 0
+
+
+def test_command_said_right_after_the_wake_word_reaches_the_command_recognizer(tone_model, wake_word_recording):
+    listener = WakeWordListener(command_grammar=["where is my bottle", "[unk]"])
+    source = DrainCountingSource(wake_word_recording)
+    woken, commands = [], []
+
+    listener.run(source, commands.append, woken.append)
+
+    assert woken == ["glasses"]
+    assert commands == ["bottle"]
+    assert source.drains == 0
+    assert listener.metrics()['wake_words'] == 1
+
+
+def test_handover_source_reads_undecoded_chunks_first():
+    class Source:
+        def __init__(self):
+            self.chunks, self.drained = [b"c"], False
+
+        def read(self):
+            return self.chunks.pop(0) if self.chunks else None
+
+        def drain(self):
+            self.drained = True
+
+    source = Source()
+    handover = HandoverSource([b"a", b"b"], source)
+    assert [handover.read(), handover.read(), handover.read(), handover.read()] == [b"a", b"b", b"c", None]
+
+    source = Source()
+    handover = HandoverSource([b"a"], source)
+    handover.drain()
+    assert handover.read() == b"c"
+    assert source.drained